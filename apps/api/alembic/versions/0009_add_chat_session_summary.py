@@ -0,0 +1,24 @@
+"""add rolling summary columns to chat_sessions"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009_add_chat_session_summary"
+down_revision = "0008_add_couple_features"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("chat_sessions") as batch_op:
+        batch_op.add_column(sa.Column("summary", sa.Text(), nullable=True))
+        batch_op.add_column(
+            sa.Column("summary_upto_id", sa.Integer(), nullable=False, server_default="0")
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("chat_sessions") as batch_op:
+        batch_op.drop_column("summary_upto_id")
+        batch_op.drop_column("summary")
@@ -0,0 +1,27 @@
+"""add composite indexes for chat session/message cursor pagination"""
+
+from alembic import op
+
+
+revision = "0010_add_chat_keyset_indexes"
+down_revision = "0009_add_chat_session_summary"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_chat_sessions_user_pinned_created",
+        "chat_sessions",
+        ["user_id", "is_pinned", "created_at", "id"],
+    )
+    op.create_index(
+        "ix_chat_messages_session_created",
+        "chat_messages",
+        ["session_id", "created_at", "id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_chat_messages_session_created", table_name="chat_messages")
+    op.drop_index("ix_chat_sessions_user_pinned_created", table_name="chat_sessions")
@@ -0,0 +1,102 @@
+"""add full-text search over chat messages and session titles
+
+SQLite: FTS5 external-content tables (trigram tokenizer, works for CJK) kept in sync by triggers.
+MySQL: FULLTEXT indexes with the ngram parser.
+"""
+
+from alembic import op
+
+
+revision = "0011_add_chat_fulltext_search"
+down_revision = "0010_add_chat_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chat_messages_fts USING fts5(
+        content, content='chat_messages', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ai AFTER INSERT ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_ad AFTER DELETE ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_messages_fts_au AFTER UPDATE OF content ON chat_messages BEGIN
+        INSERT INTO chat_messages_fts(chat_messages_fts, rowid, content)
+            VALUES ('delete', old.id, old.content);
+        INSERT INTO chat_messages_fts(rowid, content) VALUES (new.id, new.content);
+    END
+    """,
+    "INSERT INTO chat_messages_fts(chat_messages_fts) VALUES ('rebuild')",
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS chat_sessions_fts USING fts5(
+        title, content='chat_sessions', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_sessions_fts_ai AFTER INSERT ON chat_sessions BEGIN
+        INSERT INTO chat_sessions_fts(rowid, title) VALUES (new.id, coalesce(new.title, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_sessions_fts_ad AFTER DELETE ON chat_sessions BEGIN
+        INSERT INTO chat_sessions_fts(chat_sessions_fts, rowid, title)
+            VALUES ('delete', old.id, coalesce(old.title, ''));
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS chat_sessions_fts_au AFTER UPDATE OF title ON chat_sessions BEGIN
+        INSERT INTO chat_sessions_fts(chat_sessions_fts, rowid, title)
+            VALUES ('delete', old.id, coalesce(old.title, ''));
+        INSERT INTO chat_sessions_fts(rowid, title) VALUES (new.id, coalesce(new.title, ''));
+    END
+    """,
+    "INSERT INTO chat_sessions_fts(chat_sessions_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER IF EXISTS chat_sessions_fts_au",
+    "DROP TRIGGER IF EXISTS chat_sessions_fts_ad",
+    "DROP TRIGGER IF EXISTS chat_sessions_fts_ai",
+    "DROP TABLE IF EXISTS chat_sessions_fts",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_au",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_ad",
+    "DROP TRIGGER IF EXISTS chat_messages_fts_ai",
+    "DROP TABLE IF EXISTS chat_messages_fts",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == "mysql":
+        op.execute(
+            "CREATE FULLTEXT INDEX ft_chat_messages_content ON chat_messages (content)"
+            " WITH PARSER ngram"
+        )
+        op.execute(
+            "CREATE FULLTEXT INDEX ft_chat_sessions_title ON chat_sessions (title)"
+            " WITH PARSER ngram"
+        )
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == "mysql":
+        op.drop_index("ft_chat_sessions_title", table_name="chat_sessions")
+        op.drop_index("ft_chat_messages_content", table_name="chat_messages")
@@ -0,0 +1,73 @@
+"""replace users.allowed_spaces with space_mask bitmask and user_spaces table"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0013_user_space_permissions"
+down_revision = "0012_add_refresh_tokens"
+branch_labels = None
+depends_on = None
+
+# 与 app.modules.auth.spaces.SPACE_BITS 保持一致（迁移不依赖应用代码）
+SPACE_BITS = {"couple": 1, "family": 2, "friends": 4, "ai": 8}
+
+
+def _mask(value):
+    mask = 0
+    for name in (value or "").split(","):
+        mask |= SPACE_BITS.get(name.strip().lower(), 0)
+    return mask
+
+
+def upgrade():
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(
+            sa.Column("space_mask", sa.Integer(), nullable=False, server_default="1")
+        )
+
+    op.create_table(
+        "user_spaces",
+        sa.Column(
+            "user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+        ),
+        sa.Column("space", sa.String(length=20), primary_key=True),
+    )
+    op.create_index("ix_user_spaces_space_user", "user_spaces", ["space", "user_id"])
+
+    conn = op.get_bind()
+    users = sa.table("users", sa.column("id", sa.Integer), sa.column("space_mask", sa.Integer))
+    user_spaces = sa.table(
+        "user_spaces", sa.column("user_id", sa.Integer), sa.column("space", sa.String)
+    )
+    rows = conn.execute(sa.text("SELECT id, allowed_spaces FROM users")).fetchall()
+    links = []
+    for user_id, allowed in rows:
+        mask = _mask(allowed)
+        conn.execute(users.update().where(users.c.id == user_id).values(space_mask=mask))
+        links.extend(
+            {"user_id": user_id, "space": name} for name, bit in SPACE_BITS.items() if mask & bit
+        )
+    if links:
+        op.bulk_insert(user_spaces, links)
+
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.drop_column("allowed_spaces")
+
+
+def downgrade():
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.add_column(sa.Column("allowed_spaces", sa.Text(), nullable=True))
+
+    conn = op.get_bind()
+    users = sa.table("users", sa.column("id", sa.Integer), sa.column("allowed_spaces", sa.Text))
+    for user_id, mask in conn.execute(sa.text("SELECT id, space_mask FROM users")).fetchall():
+        value = ",".join(name for name, bit in SPACE_BITS.items() if (mask or 0) & bit)
+        conn.execute(users.update().where(users.c.id == user_id).values(allowed_spaces=value))
+
+    with op.batch_alter_table("users") as batch_op:
+        batch_op.alter_column("allowed_spaces", existing_type=sa.Text(), nullable=False)
+        batch_op.drop_column("space_mask")
+
+    op.drop_index("ix_user_spaces_space_user", table_name="user_spaces")
+    op.drop_table("user_spaces")
@@ -0,0 +1,27 @@
+"""add (couple_id, created_at, id) indexes for the merged couple feed"""
+
+from alembic import op
+
+
+revision = "0014_add_couple_feed_indexes"
+down_revision = "0013_user_space_permissions"
+branch_labels = None
+depends_on = None
+
+COUPLE_TABLES = ["couple_notes", "couple_messages", "couple_countdowns", "couple_wishes"]
+
+
+def upgrade():
+    for table in COUPLE_TABLES:
+        op.create_index(f"ix_{table}_couple_created", table, ["couple_id", "created_at", "id"])
+    op.create_index("ix_photos_couple_created", "photos", ["couple_id", "created_at", "id"])
+    op.create_index(
+        "ix_photos_owner_space_created", "photos", ["owner_id", "space_type", "created_at", "id"]
+    )
+
+
+def downgrade():
+    op.drop_index("ix_photos_owner_space_created", table_name="photos")
+    op.drop_index("ix_photos_couple_created", table_name="photos")
+    for table in reversed(COUPLE_TABLES):
+        op.drop_index(f"ix_{table}_couple_created", table_name=table)
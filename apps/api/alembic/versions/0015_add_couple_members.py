@@ -0,0 +1,41 @@
+"""add couple_members table and backfill owners"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0015_add_couple_members"
+down_revision = "0014_add_couple_feed_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "couple_members",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "couple_id",
+            sa.Integer(),
+            sa.ForeignKey("couples.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column(
+            "user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+        ),
+        sa.Column("role", sa.String(length=20), nullable=False, server_default="partner"),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("couple_id", "user_id", name="uq_couple_members_couple_user"),
+    )
+    op.create_index("ix_couple_members_id", "couple_members", ["id"])
+    op.create_index("ix_couple_members_user_id", "couple_members", ["user_id"])
+    op.execute(
+        "INSERT INTO couple_members (couple_id, user_id, role, created_at) "
+        "SELECT id, owner_id, 'owner', created_at FROM couples"
+    )
+
+
+def downgrade():
+    op.drop_index("ix_couple_members_user_id", table_name="couple_members")
+    op.drop_index("ix_couple_members_id", table_name="couple_members")
+    op.drop_table("couple_members")
@@ -0,0 +1,31 @@
+"""add couple_versions table for collection ETags"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0016_add_couple_versions"
+down_revision = "0015_add_couple_members"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "couple_versions",
+        sa.Column(
+            "couple_id",
+            sa.Integer(),
+            sa.ForeignKey("couples.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("notes_version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("messages_version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("countdowns_version", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("wishes_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.execute("INSERT INTO couple_versions (couple_id) SELECT id FROM couples")
+
+
+def downgrade():
+    op.drop_table("couple_versions")
@@ -0,0 +1,45 @@
+"""add couple_invitations table for single-use invite codes"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0017_add_couple_invitations"
+down_revision = "0016_add_couple_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "couple_invitations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "couple_id",
+            sa.Integer(),
+            sa.ForeignKey("couples.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("code_hash", sa.String(length=64), nullable=False, unique=True),
+        sa.Column(
+            "created_by",
+            sa.Integer(),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column(
+            "used_by", sa.Integer(), sa.ForeignKey("users.id", ondelete="SET NULL"), nullable=True
+        ),
+        sa.Column("used_at", sa.DateTime(), nullable=True),
+        sa.Column("revoked_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_couple_invitations_id", "couple_invitations", ["id"])
+    op.create_index("ix_couple_invitations_couple_id", "couple_invitations", ["couple_id"])
+
+
+def downgrade():
+    op.drop_index("ix_couple_invitations_couple_id", table_name="couple_invitations")
+    op.drop_index("ix_couple_invitations_id", table_name="couple_invitations")
+    op.drop_table("couple_invitations")
@@ -2,7 +2,9 @@ from datetime import datetime, timezone
 
 from fastapi import APIRouter, Depends
 
+from app.core import metrics
 from app.core.config import Settings, get_settings
+from app.core.upstream import upstream_status
 
 router = APIRouter()
 
@@ -18,3 +20,8 @@ def health_check(settings: Settings = Depends(get_settings)) -> dict:
             "time": now,
         },
     }
+
+
+@router.get("/health/metrics", summary="Process metrics")
+def read_metrics() -> dict:
+    return {"status": "ok", "data": {"upstream": upstream_status(), "counters": metrics.snapshot()}}
@@ -0,0 +1,141 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+from app.core.logging import logger
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries also expire after ``ttl`` seconds."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class MemoryCacheBackend:
+    """Async facade over :class:`TTLCache`, interchangeable with :class:`RedisCacheBackend`."""
+
+    def __init__(self, namespace: str, maxsize: int, ttl: float):
+        self.namespace = namespace
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str) -> Any:
+        return self._cache.get(key)
+
+    async def set(self, key: str, value: Any) -> None:
+        self._cache.set(key, value)
+
+    async def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+
+class RedisCacheBackend:
+    """JSON values in Redis with a per-key TTL; LRU eviction is left to Redis' maxmemory policy."""
+
+    def __init__(self, namespace: str, url: str, ttl: float):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:  # pragma: no cover - depends on optional extra
+            raise RuntimeError(
+                "Redis cache backend requires the 'redis' package (pip install .[redis])"
+            ) from exc
+        self.namespace = namespace
+        self.ttl = int(ttl)
+        self._client = redis_asyncio.from_url(url)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    async def get(self, key: str) -> Any:
+        try:
+            raw = await self._client.get(self._key(key))
+        except Exception as exc:
+            # 缓存不可用时按未命中处理，不影响主流程
+            logger.warning("Redis cache get failed namespace={} error={!r}", self.namespace, exc)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any) -> None:
+        try:
+            await self._client.set(
+                self._key(key), json.dumps(value, ensure_ascii=False), ex=self.ttl
+            )
+        except Exception as exc:
+            logger.warning("Redis cache set failed namespace={} error={!r}", self.namespace, exc)
+
+    async def delete(self, key: str) -> None:
+        try:
+            await self._client.delete(self._key(key))
+        except Exception as exc:
+            logger.warning("Redis cache delete failed namespace={} error={!r}", self.namespace, exc)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+CacheBackend = MemoryCacheBackend | RedisCacheBackend
+
+_backends: list[CacheBackend] = []
+
+
+def create_cache_backend(
+    kind: str, namespace: str, maxsize: int, ttl: float, redis_url: str | None = None
+):
+    """Create a cache backend by name: ``memory``, ``redis`` or ``none`` (returns ``None``)."""
+    kind = kind.lower()
+    if kind == "none":
+        return None
+    if kind == "redis":
+        backend = RedisCacheBackend(namespace=namespace, url=redis_url, ttl=ttl)
+    elif kind == "memory":
+        backend = MemoryCacheBackend(namespace=namespace, maxsize=maxsize, ttl=ttl)
+    else:
+        raise ValueError(f"Unknown cache backend '{kind}'")
+    _backends.append(backend)
+    return backend
+
+
+async def close_cache_backends() -> None:
+    for backend in _backends:
+        await backend.close()
@@ -1,4 +1,4 @@
-from typing import Generator
+from typing import AsyncGenerator, Generator
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -7,9 +7,12 @@ from sqlalchemy.orm import Session
 
 from app.core.config import get_settings
 from app.core.security import decode_token
-from app.db.session import get_db
+from app.db.session import get_async_db, get_db
 from app.modules.auth import service as auth_service
+from app.modules.auth.principal import Principal, principal_cache
 from app.modules.auth.schemas import TokenPayload
+from app.modules.auth.spaces import SPACE_BITS
+from app.modules.auth.tokens import revocation_list
 
 settings = get_settings()
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
@@ -19,7 +22,24 @@ def get_db_session() -> Generator:
     yield from get_db()
 
 
-def get_current_user(db: Session = Depends(get_db_session), token: str = Depends(reusable_oauth2)):
+async def get_async_db_session() -> AsyncGenerator:
+    async for db in get_async_db():
+        yield db
+
+
+def get_current_user(
+    db: Session = Depends(get_db_session), token: str = Depends(reusable_oauth2)
+) -> Principal:
+    # token 已验签且未过期时直接复用快照，跳过 JWT 解码与 users 查询
+    cached = principal_cache.get(token)
+    if cached is not None:
+        principal, jti = cached
+        if revocation_list.is_revoked(jti):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked"
+            )
+        return principal
+
     try:
         payload = decode_token(token)
         token_data = TokenPayload(**payload)
@@ -28,19 +48,48 @@ def get_current_user(db: Session = Depends(get_db_session), token: str = Depends
 
     if not token_data.sub:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token payload")
+    if revocation_list.is_revoked(token_data.jti):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked"
+        )
     user = auth_service.get_user_by_id(db, user_id=int(token_data.sub))
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
+    principal = Principal.from_user(user)
+    principal_cache.set(token, principal, jti=token_data.jti, expires_at=token_data.exp)
+    return principal
 
 
-def get_current_active_user(current_user=Depends(get_current_user)):
+def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     if not current_user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return current_user
 
 
-def get_current_admin(current_user=Depends(get_current_active_user)):
+def get_current_admin(current_user: Principal = Depends(get_current_active_user)) -> Principal:
     if not current_user.is_admin:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required")
     return current_user
+
+
+def ensure_space(current_user: Principal, space: str) -> None:
+    if space not in SPACE_BITS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown space '{space}'"
+        )
+    if not current_user.has_space(space):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail=f"No access to space '{space}'"
+        )
+
+
+def require_space(space: str):
+    """Dependency factory: the active user must have ``space`` in their permission bitmask."""
+    if space not in SPACE_BITS:
+        raise ValueError(f"Unknown space '{space}'")
+
+    def dependency(current_user: Principal = Depends(get_current_active_user)) -> Principal:
+        ensure_space(current_user, space)
+        return current_user
+
+    return dependency
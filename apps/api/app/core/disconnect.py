@@ -0,0 +1,35 @@
+import asyncio
+from typing import Awaitable, TypeVar
+
+from fastapi import Request
+
+from app.core.config import get_settings
+
+T = TypeVar("T")
+
+
+class ClientDisconnected(Exception):
+    """The HTTP client went away before the handler finished."""
+
+
+async def run_until_disconnect(
+    request: Request, awaitable: Awaitable[T], poll_interval: float | None = None
+) -> T:
+    """Await ``awaitable`` in its own task, cancelling it if the client disconnects meanwhile."""
+    interval = poll_interval or get_settings().disconnect_poll_interval
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=interval)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                raise ClientDisconnected()
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
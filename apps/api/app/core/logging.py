@@ -1,10 +1,38 @@
+import json
+import random
 import sys
 
 from loguru import logger
 
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
+    "<level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
+    "<level>{message}</level>"
+)
 
-def setup_logging(level: str = "INFO") -> None:
-    """Configure loguru logger for console output."""
+
+def _json_format(record) -> str:
+    """Render one compact JSON line; bound/keyword fields from ``extra`` become top-level keys."""
+    payload = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    payload.update(
+        {key: value for key, value in record["extra"].items() if not key.startswith("_")}
+    )
+    if record["exception"] is not None:
+        payload["exception"] = repr(record["exception"].value)
+    record["extra"]["_json"] = json.dumps(payload, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
+
+def setup_logging(level: str = "INFO", json_logs: bool = False) -> None:
+    """Configure loguru logger for console output, as plain text or one JSON object per line."""
     logger.remove()
     logger.add(
         sys.stdout,
@@ -13,13 +41,44 @@ def setup_logging(level: str = "INFO") -> None:
         diagnose=False,
         enqueue=True,
         colorize=False,
-        format=(
-            "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | "
-            "<level>{level: <8}</level> | "
-            "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
-            "<level>{message}</level>"
-        ),
+        format=_json_format if json_logs else TEXT_FORMAT,
+    )
+
+
+def truncate(value: str, limit: int) -> str:
+    if len(value) <= limit:
+        return value
+    return f"{value[:limit]}…(+{len(value) - limit} chars)"
+
+
+def _elapsed_ms(resp) -> float | None:
+    try:
+        return round(resp.elapsed.total_seconds() * 1000, 1)
+    except RuntimeError:  # 流式响应尚未关闭时没有 elapsed
+        return None
+
+
+def log_upstream(provider: str, operation: str, resp) -> None:
+    """Log an upstream ``httpx.Response`` with a size-bounded body; successful calls are sampled.
+
+    Status, elapsed time and body are part of the message (the text format drops extras),
+    and are only computed when a handler accepts the level.
+    """
+    from app.core.config import get_settings
+
+    settings = get_settings()
+    success = 200 <= resp.status_code < 300
+    if success and random.random() >= settings.log_upstream_success_sample_rate:
+        return
+    logger.opt(depth=1, lazy=True).log(
+        "INFO" if success else "WARNING",
+        "Upstream {provider} {operation} status={status_code} elapsed_ms={elapsed_ms} body={body}",
+        provider=lambda: provider,
+        operation=lambda: operation,
+        status_code=lambda: resp.status_code,
+        elapsed_ms=lambda: _elapsed_ms(resp),
+        body=lambda: truncate(resp.text, settings.log_upstream_body_max_chars),
     )
 
 
-__all__ = ["logger", "setup_logging"]
+__all__ = ["logger", "setup_logging", "log_upstream", "truncate"]
@@ -0,0 +1,28 @@
+import threading
+from collections import Counter
+
+_counters: Counter[str] = Counter()
+_lock = threading.Lock()
+
+
+def incr(name: str, value: int = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def get(name: str) -> int:
+    with _lock:
+        return _counters[name]
+
+
+def snapshot() -> dict[str, int]:
+    with _lock:
+        return dict(sorted(_counters.items()))
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+
+
+__all__ = ["incr", "get", "snapshot", "reset"]
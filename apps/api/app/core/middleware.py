@@ -0,0 +1,42 @@
+from time import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logging import logger
+
+
+class RequestLogMiddleware:
+    """Access log as pure ASGI middleware.
+
+    ``BaseHTTPMiddleware`` (``@app.middleware("http")``) wraps ``receive``, so handlers
+    behind it never see ``http.disconnect`` and ``run_until_disconnect`` cannot fire;
+    here ``receive`` is passed through untouched.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # 流式响应（SSE）的耗时按整个响应体计算
+            logger.info(
+                "{method} {path} -> {status_code} ({duration_ms:.1f} ms)",
+                method=scope["method"],
+                path=scope["path"],
+                status_code=status_code,
+                duration_ms=(time() - start) * 1000,
+            )
@@ -0,0 +1,117 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, Generic, Sequence, TypeVar
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql import Select
+
+T = TypeVar("T")
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return {"__dt__": value.isoformat()}
+    if isinstance(value, date):
+        return {"__d__": value.isoformat()}
+    raise TypeError(f"Cannot encode {type(value)!r} in cursor")
+
+
+def _json_hook(obj: dict):
+    if "__dt__" in obj:
+        return datetime.fromisoformat(obj["__dt__"])
+    if "__d__" in obj:
+        return date.fromisoformat(obj["__d__"])
+    return obj
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(
+            base64.urlsafe_b64decode(padded.encode("ascii")), object_hook=_json_hook
+        )
+    except (ValueError, UnicodeError):
+        values = None
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+    return values
+
+
+class KeysetPaginator:
+    """Keyset (seek) pagination over a total ordering such as ``(created_at DESC, id DESC)``.
+
+    ``order`` lists ``(column, descending)`` pairs and must end with a unique column. ``after``
+    continues in list order, ``before`` walks back; with neither, the first page is returned, or
+    the last one when ``from_end`` is set (e.g. newest messages of a chronological list).
+    """
+
+    def __init__(
+        self,
+        order: Sequence[tuple[InstrumentedAttribute, bool]],
+        limit: int,
+        before: str | None = None,
+        after: str | None = None,
+        from_end: bool = False,
+    ):
+        if before and after:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail="Use either before or after"
+            )
+        self.order = list(order)
+        self.limit = limit
+        self.before = decode_cursor(before, len(self.order)) if before else None
+        self.after = decode_cursor(after, len(self.order)) if after else None
+        self.backward = self.before is not None or (from_end and self.after is None)
+
+    def _seek(self, values: list[Any], forward: bool):
+        """Rows strictly after (``forward``) or before ``values`` in list order, nested OR/AND."""
+        clause = None
+        for (column, descending), value in reversed(list(zip(self.order, values))):
+            ahead = column < value if descending == forward else column > value
+            clause = ahead if clause is None else or_(ahead, and_(column == value, clause))
+        return clause
+
+    def apply(self, stmt: Select) -> Select:
+        if self.after is not None:
+            stmt = stmt.where(self._seek(self.after, forward=True))
+        if self.before is not None:
+            stmt = stmt.where(self._seek(self.before, forward=False))
+        ordering = [
+            column.desc() if descending != self.backward else column.asc()
+            for column, descending in self.order
+        ]
+        return stmt.order_by(*ordering).limit(self.limit + 1)
+
+    def cursor_for(self, row: Any) -> str:
+        return encode_cursor([getattr(row, column.key) for column, _ in self.order])
+
+    def page(self, rows: Sequence[Any]) -> dict:
+        rows = list(rows)
+        has_more = len(rows) > self.limit
+        rows = rows[: self.limit]
+        if self.backward:
+            rows.reverse()
+        if not rows:
+            return {"items": [], "next_cursor": None, "prev_cursor": None}
+        if self.backward:
+            prev_cursor = self.cursor_for(rows[0]) if has_more else None
+            next_cursor = self.cursor_for(rows[-1]) if self.before is not None else None
+        else:
+            next_cursor = self.cursor_for(rows[-1]) if has_more else None
+            prev_cursor = self.cursor_for(rows[0]) if self.after is not None else None
+        return {"items": rows, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
@@ -0,0 +1,194 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from app.core.logging import logger
+
+# 订阅者队列溢出时投递的消息：客户端应丢弃本地状态并重新拉取
+RESYNC = {"type": "resync"}
+
+
+class Subscription:
+    """One subscriber's bounded inbox; a slow reader gets one ``RESYNC`` instead of a backlog."""
+
+    def __init__(self, channel: str, maxsize: int):
+        self.channel = channel
+        self._queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=maxsize)
+
+    def put(self, message: dict) -> None:
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(RESYNC)
+
+    async def get(self, timeout: float | None = None) -> dict | None:
+        """Next message, or ``None`` when nothing arrived within ``timeout`` seconds."""
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class MemoryBroker:
+    """In-process pub/sub: fan-out to local subscribers only (single worker deployments).
+
+    ``publish`` is a plain method that may be called from any thread, including the
+    threadpool running sync endpoints; delivery is always scheduled on the event loop.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[Subscription]] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+
+    async def close(self) -> None:
+        self._subscribers.clear()
+        self._loop = None
+
+    def subscriber_count(self, channel: str) -> int:
+        return len(self._subscribers.get(channel, ()))
+
+    def publish(self, channel: str, message: dict) -> None:
+        # 没有事件循环就不可能有订阅者，直接丢弃
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self.deliver, channel, message)
+
+    def deliver(self, channel: str, message: dict) -> None:
+        for subscription in list(self._subscribers.get(channel, ())):
+            subscription.put(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        if self._loop is None:
+            self._loop = asyncio.get_running_loop()
+        subscription = Subscription(channel, self.queue_size)
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        try:
+            yield subscription
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[channel]
+
+
+class RedisBroker:
+    """Redis pub/sub for multi-worker deployments.
+
+    Each process holds one Redis subscription per channel that has local listeners and
+    fans messages out through a :class:`MemoryBroker`; publishing only goes to Redis, so
+    every process (including the publisher's) receives each message exactly once.
+    """
+
+    def __init__(self, url: str, namespace: str, queue_size: int = 100):
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError as exc:  # pragma: no cover - depends on optional extra
+            raise RuntimeError(
+                "Redis pub/sub backend requires the 'redis' package (pip install .[redis])"
+            ) from exc
+        self.namespace = namespace
+        self._client = redis_asyncio.from_url(url)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._local = MemoryBroker(queue_size=queue_size)
+        self._reader: asyncio.Task | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _key(self, channel: str) -> str:
+        return f"{self.namespace}:{channel}"
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        await self._local.start()
+        if self._reader is None:
+            self._reader = asyncio.create_task(self._read(), name=f"pubsub-reader-{self.namespace}")
+
+    async def close(self) -> None:
+        if self._reader is not None:
+            self._reader.cancel()
+            await asyncio.gather(self._reader, return_exceptions=True)
+            self._reader = None
+        await self._pubsub.aclose()
+        await self._client.aclose()
+        await self._local.close()
+        self._loop = None
+
+    def publish(self, channel: str, message: dict) -> None:
+        if self._loop is None or self._loop.is_closed():
+            logger.warning("Redis pub/sub not started, dropping message channel={}", channel)
+            return
+        asyncio.run_coroutine_threadsafe(self._publish(channel, message), self._loop)
+
+    async def _publish(self, channel: str, message: dict) -> None:
+        try:
+            await self._client.publish(self._key(channel), json.dumps(message, ensure_ascii=False))
+        except Exception as exc:
+            # 推送失败只影响实时性，客户端仍可通过列表接口（ETag）补齐
+            logger.warning("Redis publish failed namespace={} error={!r}", self.namespace, exc)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[Subscription]:
+        if self._reader is None:
+            await self.start()
+        async with self._local.subscribe(channel) as subscription:
+            if self._local.subscriber_count(channel) == 1:
+                await self._pubsub.subscribe(self._key(channel))
+            try:
+                yield subscription
+            finally:
+                if self._local.subscriber_count(channel) == 1:
+                    await self._safe_unsubscribe(channel)
+
+    async def _safe_unsubscribe(self, channel: str) -> None:
+        try:
+            await self._pubsub.unsubscribe(self._key(channel))
+        except Exception as exc:
+            logger.warning("Redis unsubscribe failed namespace={} error={!r}", self.namespace, exc)
+
+    async def _read(self) -> None:
+        prefix = f"{self.namespace}:"
+        while True:
+            if not self._pubsub.subscribed:
+                await asyncio.sleep(0.5)
+                continue
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning(
+                    "Redis pub/sub read failed namespace={} error={!r}", self.namespace, exc
+                )
+                await asyncio.sleep(1.0)
+                continue
+            if not message or message.get("type") != "message":
+                continue
+            channel = message["channel"]
+            channel = channel.decode() if isinstance(channel, bytes) else channel
+            try:
+                data: Any = json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+            self._local.deliver(channel.removeprefix(prefix), data)
+
+
+Broker = MemoryBroker | RedisBroker
+
+
+def create_broker(
+    kind: str, namespace: str, queue_size: int = 100, redis_url: str | None = None
+) -> Broker:
+    """Create a pub/sub broker by name: ``memory`` or ``redis``."""
+    kind = kind.lower()
+    if kind == "redis":
+        return RedisBroker(url=redis_url, namespace=namespace, queue_size=queue_size)
+    if kind == "memory":
+        return MemoryBroker(queue_size=queue_size)
+    raise ValueError(f"Unknown pub/sub backend '{kind}'")
@@ -0,0 +1,41 @@
+import math
+import threading
+import time
+
+from app.core.cache import TTLCache
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets held in an LRU; idle buckets expire once they would be full again."""
+
+    def __init__(self, capacity: int, refill_per_second: float, maxsize: int = 10000):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._buckets = TTLCache(maxsize=maxsize, ttl=capacity / refill_per_second)
+        self._lock = threading.Lock()
+
+    def _refilled(self, key: str, now: float) -> float:
+        tokens, updated_at = self._buckets.get(key, (float(self.capacity), now))
+        return min(self.capacity, tokens + (now - updated_at) * self.refill_per_second)
+
+    def allow(self, key: str, cost: float = 1.0) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            tokens = self._refilled(key, now)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets.set(key, (tokens, now))
+        return allowed
+
+    def retry_after(self, key: str, cost: float = 1.0) -> int:
+        """Seconds until ``cost`` tokens are available again (for the ``Retry-After`` header)."""
+        with self._lock:
+            tokens = self._refilled(key, time.monotonic())
+        return max(math.ceil((cost - tokens) / self.refill_per_second), 0)
+
+    def reset(self, key: str | None = None) -> None:
+        if key is None:
+            self._buckets.clear()
+        else:
+            self._buckets.delete(key)
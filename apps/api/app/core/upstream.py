@@ -0,0 +1,226 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator, Awaitable, Callable
+
+import httpx
+from fastapi import HTTPException, status
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.core.logging import logger
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitBreaker:
+    """Closed -> open after ``failure_threshold`` consecutive failures; after ``reset_timeout``
+    one probe call is let through (half-open) and its outcome closes or re-opens the circuit."""
+
+    def __init__(self, name: str, failure_threshold: int, reset_timeout: float):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe_in_flight = False
+
+    def _transition(self, state: str) -> None:
+        if state == self.state:
+            return
+        logger.warning("Upstream circuit {}: {} -> {}", self.name, self.state, state)
+        metrics.incr(f"upstream.{self.name}.circuit.{state}")
+        self.state = state
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self._transition("half_open")
+        # half-open: only a single probe at a time
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self._probe_in_flight = False
+        self.failures = 0
+        self._transition("closed")
+
+    def release_probe(self) -> None:
+        """Give up a probe without a verdict (e.g. the caller was cancelled) so another can run."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition("open")
+
+
+class UpstreamGuard:
+    """Per-provider concurrency limit, jittered exponential retry and circuit breaker."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        max_retries: int,
+        backoff_base: float,
+        backoff_max: float,
+        failure_threshold: int,
+        reset_timeout: float,
+    ):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+
+    def _ensure_allowed(self) -> None:
+        if not self.breaker.allow():
+            metrics.incr(f"upstream.{self.name}.rejected")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail={"error": "upstream_unavailable", "provider": self.name},
+            )
+
+    def _backoff(self, attempt: int, resp: httpx.Response | None) -> float:
+        retry_after = resp.headers.get("Retry-After") if resp is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.backoff_max)
+        # full jitter
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    async def request(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """Run ``send`` under the guard, retrying transport errors and retryable statuses.
+
+        Returns the last response once retries are exhausted so callers keep their own
+        error mapping; raises 503 while the circuit is open and 502 if the provider is unreachable.
+        """
+        attempt = 0
+        while True:
+            self._ensure_allowed()
+            resp: httpx.Response | None = None
+            error: httpx.TransportError | None = None
+            async with self._semaphore:
+                self.in_flight += 1
+                try:
+                    resp = await send()
+                except httpx.TransportError as exc:
+                    error = exc
+                except Exception:
+                    self.breaker.record_failure()
+                    raise
+                except BaseException:
+                    # 取消（如客户端断开）不算上游失败，但必须释放半开探测名额
+                    self.breaker.release_probe()
+                    raise
+                finally:
+                    self.in_flight -= 1
+
+            if resp is not None and resp.status_code not in RETRYABLE_STATUSES:
+                self.breaker.record_success()
+                return resp
+            self.breaker.record_failure()
+
+            if attempt >= self.max_retries or self.breaker.state == "open":
+                if resp is not None:
+                    return resp
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail={
+                        "error": "upstream_unreachable",
+                        "provider": self.name,
+                        "reason": repr(error),
+                    },
+                )
+            delay = self._backoff(attempt, resp)
+            attempt += 1
+            metrics.incr(f"upstream.{self.name}.retries")
+            logger.info(
+                "Upstream {} retry attempt={} status={} delay={:.2f}s",
+                self.name,
+                attempt,
+                resp.status_code if resp is not None else repr(error),
+                delay,
+            )
+            await asyncio.sleep(delay)
+
+    @asynccontextmanager
+    async def stream(
+        self, open_stream: Callable[[], AsyncContextManager[httpx.Response]]
+    ) -> AsyncIterator[httpx.Response]:
+        """Guard a streaming call: no retries, since part of the body may already be relayed."""
+        self._ensure_allowed()
+        async with self._semaphore:
+            self.in_flight += 1
+            decided = False
+            try:
+                async with open_stream() as resp:
+                    if resp.status_code in RETRYABLE_STATUSES:
+                        self.breaker.record_failure()
+                    else:
+                        self.breaker.record_success()
+                    decided = True
+                    yield resp
+            except httpx.TransportError as exc:
+                self.breaker.record_failure()
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail={
+                        "error": "upstream_unreachable",
+                        "provider": self.name,
+                        "reason": repr(exc),
+                    },
+                )
+            except Exception:
+                if not decided:
+                    self.breaker.record_failure()
+                raise
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            finally:
+                self.in_flight -= 1
+
+    def status(self) -> dict:
+        return {
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+        }
+
+
+_guards: dict[str, UpstreamGuard] = {}
+
+
+def get_upstream_guard(provider: str) -> UpstreamGuard:
+    guard = _guards.get(provider)
+    if guard is None:
+        settings = get_settings()
+        guard = UpstreamGuard(
+            provider,
+            max_concurrency=settings.upstream_max_concurrency,
+            max_retries=settings.upstream_max_retries,
+            backoff_base=settings.upstream_backoff_base,
+            backoff_max=settings.upstream_backoff_max,
+            failure_threshold=settings.upstream_breaker_failure_threshold,
+            reset_timeout=settings.upstream_breaker_reset_seconds,
+        )
+        _guards[provider] = guard
+    return guard
+
+
+def upstream_status() -> dict[str, dict]:
+    return {name: guard.status() for name, guard in _guards.items()}
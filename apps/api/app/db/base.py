@@ -9,6 +9,12 @@ def import_models() -> None:
     Keep imports inside to avoid circular dependencies at runtime.
     """
     from app.modules.spaces.models import SimpleKV, ChatSession, ChatMessage  # noqa: F401
-    from app.modules.auth.models import User, ApiKey  # noqa: F401
-    from app.modules.couples.models import Couple, CoupleNote  # noqa: F401
+    from app.modules.auth.models import User, UserSpace, ApiKey, RefreshToken, RevokedToken  # noqa: F401
+    from app.modules.couples.models import (  # noqa: F401
+        Couple,
+        CoupleInvitation,
+        CoupleMember,
+        CoupleNote,
+        CoupleVersion,
+    )
     from app.modules.media.models import Photo  # noqa: F401
@@ -1,16 +1,43 @@
-from time import time
+from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.api.v1.router import api_router
+from app.core.cache import close_cache_backends
 from app.core.config import get_settings
-from app.core.logging import setup_logging, logger
+from app.core.http_client import close_http_client, init_http_client
+from app.core.logging import setup_logging
+from app.core.middleware import RequestLogMiddleware
+from app.db.session import async_engine
+from app.modules.auth.tokens import revocation_list
+from app.modules.couples.events import broker as couple_events
+from app.modules.spaces.jobs import image_jobs
+from app.modules.spaces.mirror import image_mirror
 
 settings = get_settings()
-setup_logging(settings.log_level)
+setup_logging(settings.log_level, json_logs=settings.log_json)
 
-app = FastAPI(title=settings.project_name, version=settings.version)
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    await init_http_client()
+    await revocation_list.start()
+    await couple_events.start()
+    await image_jobs.start()
+    if settings.image_mirror_enabled:
+        await image_mirror.start()
+    yield
+    await image_jobs.stop()
+    await image_mirror.stop()
+    await couple_events.close()
+    await revocation_list.stop()
+    await close_http_client()
+    await close_cache_backends()
+    await async_engine.dispose()
+
+
+app = FastAPI(title=settings.project_name, version=settings.version, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -20,18 +47,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.include_router(api_router, prefix=settings.api_v1_prefix)
-
+app.add_middleware(RequestLogMiddleware)
 
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    start = time()
-    response = await call_next(request)
-    duration_ms = (time() - start) * 1000
-    logger.info(
-        f"{request.method} {request.url.path} -> {response.status_code} ({duration_ms:.1f} ms)"
-    )
-    return response
+app.include_router(api_router, prefix=settings.api_v1_prefix)
 
 
 @app.get("/", include_in_schema=False)
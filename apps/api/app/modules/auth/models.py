@@ -1,8 +1,24 @@
 from datetime import datetime
 
-from sqlalchemy import Boolean, Column, DateTime, Integer, String, UniqueConstraint, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
 
 from app.db.base import Base
+from app.modules.auth.spaces import (
+    DEFAULT_SPACES_MASK,
+    format_spaces,
+    parse_spaces,
+    spaces_from_mask,
+)
 
 
 class User(Base):
@@ -14,9 +30,43 @@ class User(Base):
     is_active = Column(Boolean, default=True, nullable=False)
     is_admin = Column(Boolean, default=False, nullable=False)
     role = Column(String(50), default="user", nullable=False)
-    allowed_spaces = Column(Text, default="couple", nullable=False)
+    space_mask = Column(
+        Integer,
+        default=DEFAULT_SPACES_MASK,
+        server_default=str(DEFAULT_SPACES_MASK),
+        nullable=False,
+    )
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    space_rows = relationship("UserSpace", cascade="all, delete-orphan", passive_deletes=True)
+
+    @property
+    def allowed_spaces(self) -> str:
+        """Legacy comma-separated view of ``space_mask`` kept for API compatibility."""
+        return format_spaces(self.space_mask or 0)
+
+    @allowed_spaces.setter
+    def allowed_spaces(self, value: str) -> None:
+        self.set_spaces(parse_spaces(value))
+
+    def set_spaces(self, mask: int) -> None:
+        """Update the bitmask and the normalized ``user_spaces`` rows together."""
+        self.space_mask = mask
+        wanted = set(spaces_from_mask(mask))
+        self.space_rows = [row for row in self.space_rows if row.space in wanted] + [
+            UserSpace(space=space)
+            for space in sorted(wanted - {row.space for row in self.space_rows})
+        ]
+
+
+class UserSpace(Base):
+    __tablename__ = "user_spaces"
+    # (space, user_id) 索引用于“某空间下的所有用户”查询
+    __table_args__ = (Index("ix_user_spaces_space_user", "space", "user_id"),)
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    space = Column(String(20), primary_key=True)
+
 
 class ApiKey(Base):
     __tablename__ = "api_keys"
@@ -26,3 +76,26 @@ class ApiKey(Base):
     provider = Column(String(50), nullable=False)
     key = Column(String(512), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    token_hash = Column(String(64), unique=True, nullable=False)  # sha256(token)，不存明文
+    family_id = Column(String(32), nullable=False, index=True)  # 同一次登录轮换出的 token 共享
+    access_jti = Column(String(32), nullable=True)  # 与之一同签发的 access token
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(32), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)  # 过期后可清理
+    created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,93 @@
+import threading
+import time
+from dataclasses import dataclass
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.modules.auth.models import User
+from app.modules.auth.spaces import SPACE_BITS, format_spaces
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Immutable snapshot of the authenticated user, safe to share across requests."""
+
+    id: int
+    email: str
+    is_active: bool
+    is_admin: bool
+    role: str | None
+    space_mask: int
+
+    @property
+    def allowed_spaces(self) -> str:
+        return format_spaces(self.space_mask)
+
+    def has_space(self, space: str) -> bool:
+        return bool(self.space_mask & SPACE_BITS.get(space, 0))
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            is_active=user.is_active,
+            is_admin=user.is_admin,
+            role=user.role,
+            space_mask=user.space_mask or 0,
+        )
+
+
+class PrincipalCache:
+    """Token -> (:class:`Principal`, jti) cache with a user-id index for explicit invalidation.
+
+    Entries never outlive the token's ``exp``; the TTL bounds staleness across workers,
+    since invalidation only reaches the process that handled the update.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._tokens_by_user: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> tuple[Principal, str | None] | None:
+        """Return ``(principal, jti)`` for a previously verified token."""
+        return self._cache.get(token)
+
+    def set(
+        self,
+        token: str,
+        principal: Principal,
+        jti: str | None = None,
+        expires_at: float | None = None,
+    ) -> None:
+        ttl = self.ttl
+        if expires_at is not None:
+            ttl = min(ttl, expires_at - time.time())
+        if ttl <= 0:
+            return
+        self._cache.set(token, (principal, jti), ttl=ttl)
+        with self._lock:
+            tokens = self._tokens_by_user.setdefault(principal.id, set())
+            tokens.add(token)
+            if len(tokens) > 16:
+                # 被 LRU/TTL 淘汰的 token 不会通知索引，这里顺带清理
+                tokens.intersection_update(t for t in tokens if self._cache.get(t) is not None)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            tokens = self._tokens_by_user.pop(user_id, set())
+        for token in tokens:
+            self._cache.delete(token)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tokens_by_user.clear()
+        self._cache.clear()
+
+
+_settings = get_settings()
+principal_cache = PrincipalCache(
+    maxsize=_settings.principal_cache_max_entries, ttl=_settings.principal_cache_ttl_seconds
+)
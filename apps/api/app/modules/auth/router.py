@@ -1,42 +1,99 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core import deps
-from app.core.security import create_access_token
+from app.core.config import get_settings
+from app.core.ratelimit import TokenBucketLimiter
+from app.core.security import decode_token, get_password_hash_async
 from app.core.logging import logger
-from app.modules.auth import schemas, service
+from app.modules.auth import schemas, service, tokens
 
 router = APIRouter()
+settings = get_settings()
+
+# 按 IP 与邮箱分别限流（登录与注册共用），撞库时不至于把 bcrypt 线程池打满
+login_ip_limiter = TokenBucketLimiter(settings.login_ip_burst, settings.login_ip_per_minute / 60)
+login_email_limiter = TokenBucketLimiter(
+    settings.login_email_burst, settings.login_email_per_minute / 60
+)
+
+
+def _throttle_auth(request: Request, email: str) -> None:
+    client_ip = request.client.host if request.client else "unknown"
+    keys = ((login_ip_limiter, client_ip), (login_email_limiter, email.strip().lower()))
+    for limiter, key in keys:
+        if not limiter.allow(key):
+            logger.warning("Auth throttled path={} key={}", request.url.path, key)
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many attempts",
+                headers={"Retry-After": str(max(limiter.retry_after(key), 1))},
+            )
 
 
 @router.post("/register", response_model=schemas.UserRead, summary="Register user (requires invite)")
-def register_user(user_in: schemas.UserCreate, db: Session = Depends(deps.get_db_session)):
-    logger.info(f"Register attempt email={user_in.email}")
-    user = service.create_user(db, user_in)
-    logger.info(f"Register success user_id={user.id}")
+async def register_user(
+    request: Request,
+    user_in: schemas.UserCreate,
+    db: AsyncSession = Depends(deps.get_async_db_session),
+):
+    logger.info("Register attempt email={}", user_in.email)
+    _throttle_auth(request, user_in.email)
+    # 先做廉价的邮箱/邀请码校验，最后才计算 bcrypt
+    await db.run_sync(service.validate_registration, user_in)
+    hashed_password = await get_password_hash_async(user_in.password)
+    user = await db.run_sync(service.create_user, user_in, hashed_password)
+    logger.info("Register success user_id={}", user.id)
     return user
 
 
 @router.post("/login", response_model=schemas.LoginResponse, summary="Login to get JWT")
-def login(
-    form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(deps.get_db_session)
+async def login(
+    request: Request,
+    form_data: OAuth2PasswordRequestForm = Depends(),
+    db: AsyncSession = Depends(deps.get_async_db_session),
 ):
-    logger.info(f"Login attempt email={form_data.username}")
-    user = service.authenticate(db, email=form_data.username, password=form_data.password)
+    logger.info("Login attempt email={}", form_data.username)
+    _throttle_auth(request, form_data.username)
+    user = await service.authenticate_async(
+        db, email=form_data.username, password=form_data.password
+    )
     if not user:
         logger.warning("Login failed: bad credentials")
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Incorrect credentials")
 
-    access_token = create_access_token(subject=user.id)
-    logger.info(f"Login success user_id={user.id}")
-    return schemas.LoginResponse(token=schemas.Token(access_token=access_token), user=user)
+    token = await db.run_sync(tokens.issue_tokens, user.id)
+    logger.info("Login success user_id={}", user.id)
+    return schemas.LoginResponse(token=token, user=user)
+
+
+@router.post(
+    "/refresh",
+    response_model=schemas.Token,
+    summary="Rotate refresh token for a new access token",
+)
+def refresh(payload: schemas.RefreshRequest, db: Session = Depends(deps.get_db_session)):
+    return tokens.rotate_refresh_token(db, payload.refresh_token)
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT, summary="Revoke current tokens")
+def logout(
+    payload: schemas.LogoutRequest | None = None,
+    token: str = Depends(deps.reusable_oauth2),
+    current_user=Depends(deps.get_current_user),
+    db: Session = Depends(deps.get_db_session),
+):
+    token_data = schemas.TokenPayload(**decode_token(token))
+    tokens.logout(db, token_data, refresh_token=payload.refresh_token if payload else None)
+    logger.info("Logout user_id={}", current_user.id)
 
 
 @router.get("/me", response_model=schemas.UserRead, summary="Get current user")
 def read_me(current_user=Depends(deps.get_current_active_user)):
-    logger.debug(f"Fetch current user user_id={current_user.id}")
+    logger.debug("Fetch current user user_id={}", current_user.id)
     return current_user
 
 
@@ -50,7 +107,7 @@ def set_provider_key(
     db: Session = Depends(deps.get_db_session),
     _: schemas.UserRead = Depends(deps.get_current_admin),
 ):
-    logger.info(f"Set API key provider={payload.provider}")
+    logger.info("Set API key provider={}", payload.provider)
     api_key = service.set_api_key(db, provider=payload.provider, key=payload.key)
     return schemas.ApiKeyRead(provider=api_key.provider, key=api_key.key)
 
@@ -65,16 +122,35 @@ def get_provider_key(
     db: Session = Depends(deps.get_db_session),
     _: schemas.UserRead = Depends(deps.get_current_admin),
 ):
-    logger.debug(f"Get API key provider={provider}")
+    logger.debug("Get API key provider={}", provider)
     api_key = service.get_api_key(db, provider=provider)
     if not api_key:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="API key not found")
     return schemas.ApiKeyRead(provider=api_key.provider, key=api_key.key)
 
 
-@router.get("/users", response_model=list[schemas.UserRead], summary="List users (admin)")
-def list_users(db: Session = Depends(deps.get_db_session), _: schemas.UserRead = Depends(deps.get_current_admin)):
-    return service.list_users(db)
+@router.get("/users", response_model=schemas.UserPage, summary="List users (admin)")
+def list_users(
+    limit: int = Query(50, ge=1, le=200),
+    before: str | None = Query(None, description="Cursor: page before this item"),
+    after: str | None = Query(None, description="Cursor: page after this item"),
+    role: str | None = None,
+    is_active: bool | None = None,
+    space: str | None = Query(None, description="Only users with access to this space"),
+    email: str | None = Query(None, min_length=1, max_length=255, description="Email prefix"),
+    db: Session = Depends(deps.get_db_session),
+    _: schemas.UserRead = Depends(deps.get_current_admin),
+):
+    return service.list_users(
+        db,
+        limit=limit,
+        before=before,
+        after=after,
+        role=role,
+        is_active=is_active,
+        space=space,
+        email_prefix=email,
+    )
 
 
 class UserUpdate(BaseModel):
@@ -1,6 +1,8 @@
 from pydantic import BaseModel, EmailStr
 from pydantic import ConfigDict
 
+from app.core.pagination import CursorPage
+
 
 class UserBase(BaseModel):
     email: EmailStr
@@ -22,13 +24,31 @@ class UserRead(UserBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserPage(CursorPage[UserRead]):
+    total: int
+    total_is_estimate: bool = False  # True 时 total 为估算值或下限
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None
+    expires_in: int | None = None  # access token 有效期（秒）
+
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+
+class LogoutRequest(BaseModel):
+    refresh_token: str | None = None
 
 
 class TokenPayload(BaseModel):
     sub: str | None = None
+    exp: int | None = None
+    iat: int | None = None
+    jti: str | None = None
 
 
 class LoginResponse(BaseModel):
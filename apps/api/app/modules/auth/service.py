@@ -1,9 +1,23 @@
+from datetime import datetime
+
 from fastapi import HTTPException, status
+from sqlalchemy import and_, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.core.security import get_password_hash, verify_password
+from app.core.cache import TTLCache
+from app.core.pagination import KeysetPaginator
+from app.core.config import get_settings
+from app.core.security import get_password_hash, verify_password, verify_password_async
 from app.modules.auth import schemas
-from app.modules.auth.models import ApiKey, User
+from app.modules.auth.models import ApiKey, User, UserSpace
+from app.modules.auth.principal import principal_cache
+from app.modules.auth.spaces import ALL_SPACES_MASK, DEFAULT_SPACES_MASK, SPACE_BITS, parse_spaces
+
+
+# provider -> key（None 表示数据库中未配置），set_api_key 写入时失效；TTL 兜底多 worker 部署
+_api_key_cache = TTLCache(maxsize=32, ttl=get_settings().api_key_cache_ttl_seconds)
+_MISSING = object()
 
 
 def _validate_invite(invite_code: str, settings) -> bool:
@@ -19,7 +33,11 @@ def get_user_by_id(db: Session, user_id: int):
     return db.query(User).filter(User.id == user_id).first()
 
 
-def create_user(db: Session, user_in: schemas.UserCreate) -> User:
+def validate_registration(db: Session, user_in: schemas.UserCreate) -> bool:
+    """Reject taken emails and bad invites; returns whether this is the first (admin) user.
+
+    Cheap checks only, so callers can run it before paying for the password hash.
+    """
     if get_user_by_email(db, user_in.email):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
@@ -27,16 +45,22 @@ def create_user(db: Session, user_in: schemas.UserCreate) -> User:
     settings = get_settings()
     if not is_first_user and not _validate_invite(user_in.invite_code, settings):
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Invalid or expired invite code")
+    return is_first_user
 
+
+def create_user(
+    db: Session, user_in: schemas.UserCreate, hashed_password: str | None = None
+) -> User:
+    # 哈希期间可能有并发注册，写入前再校验一次
+    is_first_user = validate_registration(db, user_in)
     role = "admin" if is_first_user else "user"
-    allowed_spaces = "couple,family,friends,ai" if role == "admin" else "couple"
     db_user = User(
         email=user_in.email,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=hashed_password or get_password_hash(user_in.password),
         is_admin=user_in.is_admin or is_first_user,
         role=role,
-        allowed_spaces=allowed_spaces,
     )
+    db_user.set_spaces(ALL_SPACES_MASK if role == "admin" else DEFAULT_SPACES_MASK)
     db.add(db_user)
     db.commit()
     db.refresh(db_user)
@@ -52,6 +76,16 @@ def authenticate(db: Session, email: str, password: str):
     return user
 
 
+async def authenticate_async(db: AsyncSession, email: str, password: str):
+    """Like :func:`authenticate`, but bcrypt runs on the bounded password-hash pool."""
+    user = await db.run_sync(get_user_by_email, email)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
+
 def set_api_key(db: Session, provider: str, key: str) -> ApiKey:
     api_key = db.query(ApiKey).filter(ApiKey.provider == provider).first()
     if api_key:
@@ -61,6 +95,7 @@ def set_api_key(db: Session, provider: str, key: str) -> ApiKey:
         db.add(api_key)
     db.commit()
     db.refresh(api_key)
+    invalidate_api_key_cache(provider)
     return api_key
 
 
@@ -68,8 +103,88 @@ def get_api_key(db: Session, provider: str) -> ApiKey | None:
     return db.query(ApiKey).filter(ApiKey.provider == provider).first()
 
 
-def list_users(db: Session):
-    return db.query(User).order_by(User.created_at.desc()).all()
+def get_api_key_value(db: Session, provider: str) -> str | None:
+    """Cached provider key lookup; only the first call (or one per TTL) hits the database."""
+    cached = _api_key_cache.get(provider, _MISSING)
+    if cached is not _MISSING:
+        return cached
+    api_key = get_api_key(db, provider)
+    value = api_key.key if api_key else None
+    _api_key_cache.set(provider, value)
+    return value
+
+
+def invalidate_api_key_cache(provider: str | None = None) -> None:
+    if provider is None:
+        _api_key_cache.clear()
+    else:
+        _api_key_cache.delete(provider)
+
+
+# 过滤后的精确计数最多扫描这么多行，超过则返回估算值/下限，避免大表 count(*)
+USER_COUNT_CAP = 10000
+USER_ORDER = [(User.id, True)]
+USER_EMAIL_ORDER = [(User.email, False)]
+
+
+def _estimated_row_count(db: Session, table: str) -> int | None:
+    """Planner statistics instead of a full scan; ``None`` when the dialect has none."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "mysql":
+        sql = (
+            "SELECT TABLE_ROWS FROM information_schema.TABLES"
+            " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :t"
+        )
+    elif dialect == "postgresql":
+        sql = "SELECT reltuples::bigint FROM pg_class WHERE relname = :t"
+    else:
+        return None
+    value = db.execute(text(sql), {"t": table}).scalar()
+    return int(value) if value is not None and value >= 0 else None
+
+
+def _count_users(db: Session, stmt, filtered: bool) -> tuple[int, bool]:
+    ids = stmt.with_only_columns(User.id).limit(USER_COUNT_CAP + 1).subquery()
+    capped = select(func.count()).select_from(ids)
+    count = db.execute(capped).scalar_one()
+    if count <= USER_COUNT_CAP:
+        return count, False
+    estimate = None if filtered else _estimated_row_count(db, User.__tablename__)
+    return max(estimate or 0, USER_COUNT_CAP), True
+
+
+def list_users(
+    db: Session,
+    limit: int,
+    before: str | None = None,
+    after: str | None = None,
+    role: str | None = None,
+    is_active: bool | None = None,
+    space: str | None = None,
+    email_prefix: str | None = None,
+) -> dict:
+    """Admin listing, newest first; an email prefix search walks the unique email index instead."""
+    stmt = select(User)
+    if role:
+        stmt = stmt.where(User.role == role)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active == is_active)
+    if space:
+        if space not in SPACE_BITS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=f"Unknown space '{space}'"
+            )
+        stmt = stmt.join(UserSpace, and_(UserSpace.user_id == User.id, UserSpace.space == space))
+    if email_prefix:
+        escaped = email_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(User.email.like(f"{escaped}%", escape="\\"))
+
+    filtered = any([role, is_active is not None, space, email_prefix])
+    total, is_estimate = _count_users(db, stmt, filtered)
+    order = USER_EMAIL_ORDER if email_prefix else USER_ORDER
+    paginator = KeysetPaginator(order, limit=limit, before=before, after=after)
+    page = paginator.page(db.scalars(paginator.apply(stmt)).all())
+    return {**page, "total": total, "total_is_estimate": is_estimate}
 
 
 def update_user(
@@ -85,7 +200,11 @@ def update_user(
         user.role = role
         user.is_admin = role == "admin" or role == "manager"
     if allowed_spaces is not None:
-        user.allowed_spaces = allowed_spaces
+        try:
+            user.set_spaces(parse_spaces(allowed_spaces))
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate_user(user.id)
     return user
@@ -0,0 +1,30 @@
+from typing import Iterable
+
+# 每个空间占一位，User.space_mask 按位存储访问权限；user_spaces 表保存同一份数据供按空间查询
+SPACE_BITS = {"couple": 1, "family": 2, "friends": 4, "ai": 8}
+ALL_SPACES_MASK = sum(SPACE_BITS.values())
+DEFAULT_SPACES_MASK = SPACE_BITS["couple"]
+
+
+def parse_spaces(value: str | Iterable[str] | None) -> int:
+    """Comma-separated string (legacy ``allowed_spaces``) or iterable of names -> bitmask."""
+    if value is None:
+        return 0
+    names = value.split(",") if isinstance(value, str) else value
+    mask = 0
+    for name in names:
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in SPACE_BITS:
+            raise ValueError(f"Unknown space '{name}'")
+        mask |= SPACE_BITS[name]
+    return mask
+
+
+def spaces_from_mask(mask: int) -> list[str]:
+    return [name for name, bit in SPACE_BITS.items() if mask & bit]
+
+
+def format_spaces(mask: int) -> str:
+    return ",".join(spaces_from_mask(mask))
@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.logging import logger
+from app.core.security import create_access_token
+from app.db.session import AsyncSessionLocal
+from app.modules.auth import schemas
+from app.modules.auth.models import RefreshToken, RevokedToken, User
+
+settings = get_settings()
+
+
+def _hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _invalid_refresh_token() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+
+
+class RevocationList:
+    """In-memory set of revoked access-token ids, re-synced from ``revoked_tokens`` periodically.
+
+    Revocations made by this process apply immediately; other workers pick them up within
+    ``token_revocation_sync_seconds``. The per-request check is a set lookup, never a query.
+    """
+
+    def __init__(self, sync_interval: float):
+        self.sync_interval = sync_interval
+        self._jtis: set[str] = set()
+        self._added_during_sync: set[str] | None = None
+        self._task: asyncio.Task | None = None
+
+    def is_revoked(self, jti: str | None) -> bool:
+        return jti is not None and jti in self._jtis
+
+    def add(self, jti: str) -> None:
+        self._jtis.add(jti)
+        if self._added_during_sync is not None:
+            self._added_during_sync.add(jti)
+
+    async def sync(self) -> None:
+        self._added_during_sync = added = set()
+        try:
+            async with AsyncSessionLocal() as db:
+                now = datetime.utcnow()
+                await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+                await db.commit()
+                jtis = set(
+                    await db.scalars(select(RevokedToken.jti).where(RevokedToken.expires_at > now))
+                )
+            # 同步期间本进程新增的吊销可能不在查询快照里，一并保留
+            self._jtis = jtis | added
+        finally:
+            self._added_during_sync = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        try:
+            await self.sync()
+        except Exception as exc:  # noqa: BLE001 - 启动时数据库不可用不阻塞应用
+            logger.warning("Revocation list initial sync failed error={!r}", exc)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.sync_interval)
+            try:
+                await self.sync()
+            except Exception as exc:  # noqa: BLE001
+                logger.warning("Revocation list sync failed error={!r}", exc)
+
+
+revocation_list = RevocationList(settings.token_revocation_sync_seconds)
+
+
+def issue_tokens(db: Session, user_id: int, family_id: str | None = None) -> schemas.Token:
+    """Sign an access token and store a new (hashed) refresh token in the same family."""
+    jti = uuid.uuid4().hex
+    access_token = create_access_token(subject=user_id, jti=jti)
+    refresh_token = secrets.token_urlsafe(32)
+    db.add(
+        RefreshToken(
+            user_id=user_id,
+            token_hash=_hash_token(refresh_token),
+            family_id=family_id or uuid.uuid4().hex,
+            access_jti=jti,
+            expires_at=datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days),
+        )
+    )
+    db.commit()
+    return schemas.Token(
+        access_token=access_token,
+        refresh_token=refresh_token,
+        expires_in=settings.access_token_expire_minutes * 60,
+    )
+
+
+def revoke_access_token(db: Session, jti: str, expires_at: datetime) -> None:
+    if db.get(RevokedToken, jti) is None:
+        db.add(RevokedToken(jti=jti, expires_at=expires_at))
+        db.commit()
+    revocation_list.add(jti)
+
+
+def revoke_family(db: Session, family_id: str) -> None:
+    """Revoke every refresh token of a login and the access tokens that may still be live."""
+    now = datetime.utcnow()
+    access_lifetime = timedelta(minutes=settings.access_token_expire_minutes)
+    rows = db.query(RefreshToken).filter(RefreshToken.family_id == family_id).all()
+    for row in rows:
+        if row.revoked_at is None:
+            row.revoked_at = now
+        if row.access_jti and row.created_at and row.created_at + access_lifetime > now:
+            if db.get(RevokedToken, row.access_jti) is None:
+                db.add(
+                    RevokedToken(jti=row.access_jti, expires_at=row.created_at + access_lifetime)
+                )
+    db.commit()
+    for row in rows:
+        if row.access_jti:
+            revocation_list.add(row.access_jti)
+
+
+def rotate_refresh_token(db: Session, refresh_token: str) -> schemas.Token:
+    row = (
+        db.query(RefreshToken).filter(RefreshToken.token_hash == _hash_token(refresh_token)).first()
+    )
+    if not row or row.expires_at <= datetime.utcnow():
+        raise _invalid_refresh_token()
+
+    # 条件更新保证同一个 refresh token 只能轮换一次；并发或重放的一方视为泄露
+    rotated = (
+        db.query(RefreshToken)
+        .filter(RefreshToken.id == row.id, RefreshToken.revoked_at.is_(None))
+        .update({RefreshToken.revoked_at: datetime.utcnow()}, synchronize_session=False)
+    )
+    if not rotated:
+        db.rollback()
+        logger.warning(
+            "Refresh token reuse detected user_id={} family={}", row.user_id, row.family_id
+        )
+        revoke_family(db, row.family_id)
+        raise _invalid_refresh_token()
+
+    user = db.get(User, row.user_id)
+    if not user or not user.is_active:
+        db.commit()
+        raise _invalid_refresh_token()
+    return issue_tokens(db, user.id, family_id=row.family_id)
+
+
+def logout(
+    db: Session, access_payload: schemas.TokenPayload, refresh_token: str | None = None
+) -> None:
+    if access_payload.jti and access_payload.exp:
+        revoke_access_token(db, access_payload.jti, datetime.utcfromtimestamp(access_payload.exp))
+    if refresh_token:
+        row = (
+            db.query(RefreshToken)
+            .filter(RefreshToken.token_hash == _hash_token(refresh_token))
+            .first()
+        )
+        if row and row.user_id == int(access_payload.sub or 0):
+            revoke_family(db, row.family_id)
@@ -0,0 +1,66 @@
+import json
+from typing import AsyncIterator
+
+from app.core.config import get_settings
+from app.core.pubsub import create_broker
+from app.modules.couples import schemas
+from app.modules.couples.membership import invalidate_membership
+
+settings = get_settings()
+
+broker = create_broker(
+    settings.couple_events_backend,
+    namespace="couple-events",
+    queue_size=settings.couple_events_queue_size,
+    redis_url=settings.redis_url,
+)
+
+READ_SCHEMAS = {
+    "notes": schemas.NoteRead,
+    "messages": schemas.MessageRead,
+    "countdowns": schemas.CountdownRead,
+    "wishes": schemas.WishRead,
+}
+
+
+def _channel(couple_id: int) -> str:
+    return f"couple:{couple_id}"
+
+
+def publish_change(couple_id: int, collection: str, action: str, item_id: int, item=None) -> None:
+    """Push a delta to everyone watching the couple; ``item`` (an ORM row) is omitted on delete."""
+    message = {"type": "change", "collection": collection, "action": action, "id": item_id}
+    if item is not None:
+        message["item"] = READ_SCHEMAS[collection].model_validate(item).model_dump(mode="json")
+    broker.publish(_channel(couple_id), message)
+
+
+def publish_member_removed(couple_id: int, user_id: int) -> None:
+    """Tell every worker to end the removed member's open streams."""
+    broker.publish(_channel(couple_id), {"type": "member", "action": "removed", "user_id": user_id})
+
+
+def _to_sse(message: dict) -> str:
+    event = message.get("type", "change")
+    data = {key: value for key, value in message.items() if key != "type"}
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def event_stream(couple_id: int, user_id: int) -> AsyncIterator[str]:
+    """SSE frames for one member; ends with a ``revoked`` event if that member is removed.
+
+    Comment lines keep idle proxies from closing the stream.
+    """
+    async with broker.subscribe(_channel(couple_id)) as subscription:
+        yield "retry: 3000\nevent: ready\ndata: {}\n\n"
+        while True:
+            message = await subscription.get(timeout=settings.couple_events_keepalive_seconds)
+            if message is None:
+                yield ": keepalive\n\n"
+                continue
+            if message.get("type") == "member" and message.get("user_id") == user_id:
+                # 其他 worker 上的成员关系缓存也要失效，否则该用户还能在那里通过鉴权
+                invalidate_membership(user_id, couple_id)
+                yield "event: revoked\ndata: {}\n\n"
+                return
+            yield _to_sse(message)
@@ -0,0 +1,99 @@
+import heapq
+from dataclasses import dataclass
+from typing import Any
+
+from pydantic import BaseModel
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import decode_cursor, encode_cursor
+from app.modules.couples import schemas
+from app.modules.couples.models import (
+    Couple,
+    CoupleCountdown,
+    CoupleMessage,
+    CoupleNote,
+    CoupleWish,
+)
+from app.modules.media.models import Photo
+from app.modules.media.schemas import PhotoRead
+
+
+def couple_photos(couple: Couple):
+    """Photos belonging to the couple space, whichever member is asking."""
+    # 新接口按上传者 + 空间类型存照片，旧接口按 couple_id 存
+    return or_(
+        and_(Photo.owner_id == couple.owner_id, Photo.space_type == "couple"),
+        Photo.couple_id == couple.id,
+    )
+
+
+@dataclass(frozen=True)
+class FeedSource:
+    kind: str
+    rank: int  # 同一 created_at 下的跨表排序键，保证全序
+    model: Any
+    read_schema: type[BaseModel]
+
+    def where(self, couple: Couple):
+        if self.kind == "photo":
+            return couple_photos(couple)
+        return self.model.couple_id == couple.id
+
+
+FEED_SOURCES = [
+    FeedSource("note", 5, CoupleNote, schemas.NoteRead),
+    FeedSource("message", 4, CoupleMessage, schemas.MessageRead),
+    FeedSource("wish", 3, CoupleWish, schemas.WishRead),
+    FeedSource("countdown", 2, CoupleCountdown, schemas.CountdownRead),
+    FeedSource("photo", 1, Photo, PhotoRead),
+]
+
+
+def _after(source: FeedSource, cursor: list | None):
+    """Rows of ``source`` strictly after the cursor in (created_at, rank, id) DESC order."""
+    if cursor is None:
+        return None
+    created_at, rank, item_id = cursor
+    model = source.model
+    if source.rank < rank:
+        return model.created_at <= created_at
+    if source.rank > rank:
+        return model.created_at < created_at
+    return or_(
+        model.created_at < created_at, and_(model.created_at == created_at, model.id < item_id)
+    )
+
+
+async def get_feed(db: AsyncSession, couple: Couple, limit: int, cursor: str | None = None) -> dict:
+    """Reverse-chronological activity across all collections of a couple space.
+
+    Each table is read with its own index scan (at most ``limit + 1`` rows past the cursor)
+    and the sorted runs are k-way merged, so a page never loads whole collections.
+    """
+    position = decode_cursor(cursor, 3) if cursor else None
+    runs = []
+    for source in FEED_SOURCES:
+        stmt = select(source.model).where(source.where(couple))
+        after = _after(source, position)
+        if after is not None:
+            stmt = stmt.where(after)
+        stmt = stmt.order_by(source.model.created_at.desc(), source.model.id.desc()).limit(
+            limit + 1
+        )
+        rows = (await db.scalars(stmt)).all()
+        runs.append([((row.created_at, source.rank, row.id), source, row) for row in rows])
+
+    merged = list(heapq.merge(*runs, key=lambda entry: entry[0], reverse=True))
+    page = merged[:limit]
+    items = [
+        {
+            "kind": source.kind,
+            "id": row.id,
+            "created_at": row.created_at,
+            "data": source.read_schema.model_validate(row).model_dump(mode="json"),
+        }
+        for _, source, row in page
+    ]
+    next_cursor = encode_cursor(list(page[-1][0])) if len(merged) > limit else None
+    return {"items": items, "next_cursor": next_cursor}
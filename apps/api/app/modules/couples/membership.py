@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+
+from fastapi import Depends, HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import deps
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.modules.couples.models import Couple, CoupleMember
+
+settings = get_settings()
+
+# (user_id, couple_id) -> role；只缓存命中的成员关系，移除成员时显式失效
+_membership_cache = TTLCache(maxsize=4096, ttl=settings.couple_membership_cache_ttl_seconds)
+
+
+@dataclass(frozen=True)
+class CoupleAccess:
+    couple_id: int
+    user_id: int
+    role: str  # owner | partner
+
+    @property
+    def is_owner(self) -> bool:
+        return self.role == "owner"
+
+
+def get_member_role(db: Session, user_id: int, couple_id: int) -> str | None:
+    """Point lookup on the (couple_id, user_id) unique index, cached per process."""
+    key = (user_id, couple_id)
+    role = _membership_cache.get(key)
+    if role is not None:
+        return role
+    role = (
+        db.query(CoupleMember.role)
+        .filter(CoupleMember.couple_id == couple_id, CoupleMember.user_id == user_id)
+        .scalar()
+    )
+    if role is not None:
+        _membership_cache.set(key, role)
+    return role
+
+
+def invalidate_membership(user_id: int, couple_id: int) -> None:
+    _membership_cache.delete((user_id, couple_id))
+
+
+def _forbidden() -> HTTPException:
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your couple")
+
+
+def require_couple_member(
+    couple_id: int,
+    db: Session = Depends(deps.get_db_session),
+    current_user=Depends(deps.get_current_active_user),
+) -> CoupleAccess:
+    """Route dependency for ``/{couple_id}/...`` paths; FastAPI reuses it within a request."""
+    role = get_member_role(db, current_user.id, couple_id)
+    if role is None:
+        raise _forbidden()
+    return CoupleAccess(couple_id=couple_id, user_id=current_user.id, role=role)
+
+
+def require_couple_owner(access: CoupleAccess = Depends(require_couple_member)) -> CoupleAccess:
+    if not access.is_owner:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Only the owner can do this"
+        )
+    return access
+
+
+async def authorize_couple(db: AsyncSession, user_id: int, couple_id: int) -> Couple:
+    """Async-route variant of :func:`require_couple_member` that also loads the couple."""
+    role = await db.run_sync(get_member_role, user_id, couple_id)
+    couple = await db.get(Couple, couple_id) if role is not None else None
+    if couple is None:
+        raise _forbidden()
+    return couple
@@ -1,6 +1,17 @@
 from datetime import date, datetime
 
-from sqlalchemy import Boolean, Column, Date, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Date,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -28,6 +39,54 @@ class Couple(Base):
     messages = relationship("CoupleMessage", back_populates="couple", cascade="all, delete-orphan")
     countdowns = relationship("CoupleCountdown", back_populates="couple", cascade="all, delete-orphan")
     wishes = relationship("CoupleWish", back_populates="couple", cascade="all, delete-orphan")
+    members = relationship("CoupleMember", back_populates="couple", cascade="all, delete-orphan")
+    versions = relationship("CoupleVersion", uselist=False, cascade="all, delete-orphan")
+
+
+class CoupleMember(Base):
+    """情侣空间成员：owner 为创建者，partner 通过邀请码加入"""
+    __tablename__ = "couple_members"
+    __table_args__ = (
+        UniqueConstraint("couple_id", "user_id", name="uq_couple_members_couple_user"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    couple_id = Column(Integer, ForeignKey("couples.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(
+        Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    role = Column(String(20), nullable=False, default="partner")  # owner | partner
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    couple = relationship("Couple", back_populates="members")
+
+
+class CoupleInvitation(Base):
+    """邀请码：只存哈希，一次性使用；移除成员时未使用的邀请一并作废"""
+    __tablename__ = "couple_invitations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    couple_id = Column(
+        Integer, ForeignKey("couples.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    code_hash = Column(String(64), unique=True, nullable=False)  # sha256(code)
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+    used_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    used_at = Column(DateTime, nullable=True)
+    revoked_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class CoupleVersion(Base):
+    """各集合的版本号：增删改时递增，列表接口据此生成 ETag"""
+    __tablename__ = "couple_versions"
+
+    couple_id = Column(Integer, ForeignKey("couples.id", ondelete="CASCADE"), primary_key=True)
+    notes_version = Column(Integer, nullable=False, default=0)
+    messages_version = Column(Integer, nullable=False, default=0)
+    countdowns_version = Column(Integer, nullable=False, default=0)
+    wishes_version = Column(Integer, nullable=False, default=0)
 
 
 class CoupleNote(Base):
@@ -41,6 +100,8 @@ class CoupleNote(Base):
 
     couple = relationship("Couple", back_populates="notes")
 
+    __table_args__ = (Index("ix_couple_notes_couple_created", "couple_id", "created_at", "id"),)
+
 
 class CoupleMessage(Base):
     """留言板"""
@@ -54,6 +115,8 @@ class CoupleMessage(Base):
 
     couple = relationship("Couple", back_populates="messages")
 
+    __table_args__ = (Index("ix_couple_messages_couple_created", "couple_id", "created_at", "id"),)
+
 
 class CoupleCountdown(Base):
     """纪念日/倒计时"""
@@ -69,6 +132,10 @@ class CoupleCountdown(Base):
 
     couple = relationship("Couple", back_populates="countdowns")
 
+    __table_args__ = (
+        Index("ix_couple_countdowns_couple_created", "couple_id", "created_at", "id"),
+    )
+
 
 class CoupleWish(Base):
     """愿望清单/待办"""
@@ -83,3 +150,5 @@ class CoupleWish(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     couple = relationship("Couple", back_populates="wishes")
+
+    __table_args__ = (Index("ix_couple_wishes_couple_created", "couple_id", "created_at", "id"),)
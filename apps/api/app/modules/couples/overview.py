@@ -0,0 +1,71 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.modules.couples.feed import couple_photos
+from app.modules.couples.membership import authorize_couple
+from app.modules.couples.models import (
+    Couple,
+    CoupleCountdown,
+    CoupleMessage,
+    CoupleNote,
+    CoupleWish,
+)
+from app.modules.media.models import Photo
+
+settings = get_settings()
+
+# 所有首页请求共享的并行查询连接配额，避免并发请求把连接池耗尽
+_connection_slots = asyncio.Semaphore(settings.couple_overview_max_connections)
+
+
+def _collection_queries(couple: Couple, limit: int) -> dict:
+    """Newest ``limit`` rows of each collection, ordered like the individual list endpoints."""
+    couple_id = couple.id
+    return {
+        "notes": select(CoupleNote)
+        .where(CoupleNote.couple_id == couple_id)
+        .order_by(CoupleNote.created_at.desc(), CoupleNote.id.desc())
+        .limit(limit),
+        "messages": select(CoupleMessage)
+        .where(CoupleMessage.couple_id == couple_id)
+        .order_by(CoupleMessage.created_at.desc(), CoupleMessage.id.desc())
+        .limit(limit),
+        "countdowns": select(CoupleCountdown)
+        .where(CoupleCountdown.couple_id == couple_id)
+        .order_by(CoupleCountdown.is_pinned.desc(), CoupleCountdown.target_date)
+        .limit(limit),
+        "wishes": select(CoupleWish)
+        .where(CoupleWish.couple_id == couple_id)
+        .order_by(CoupleWish.is_pinned.desc(), CoupleWish.created_at.desc())
+        .limit(limit),
+        # 与动态时间线一致：整个情侣空间的照片，伙伴看到的和创建者相同
+        "photos": select(Photo)
+        .where(couple_photos(couple))
+        .order_by(Photo.created_at.desc(), Photo.id.desc())
+        .limit(limit),
+    }
+
+
+async def _fetch_all(stmt) -> list:
+    # 每个集合单独一个连接并行执行，连接数受进程级配额限制
+    async with _connection_slots:
+        async with AsyncSessionLocal() as db:
+            return list((await db.scalars(stmt)).all())
+
+
+async def get_overview(db: AsyncSession, user_id: int, couple_id: int, limit: int) -> dict:
+    """Authorize once, then load every collection of the couple space for the first paint."""
+    couple = await authorize_couple(db, user_id, couple_id)
+
+    queries = _collection_queries(couple, limit)
+    if settings.couple_overview_concurrent:
+        # 先把请求自身的连接还给连接池，等待配额时不占着连接
+        await db.commit()
+        results = await asyncio.gather(*(_fetch_all(stmt) for stmt in queries.values()))
+    else:
+        results = [list((await db.scalars(stmt)).all()) for stmt in queries.values()]
+    return {"couple": couple, "limit": limit, **dict(zip(queries, results))}
@@ -1,18 +1,18 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.core import deps
-from app.modules.couples import schemas, service
+from app.modules.couples import events, feed, overview, schemas, service, versions
+from app.modules.couples.membership import (
+    CoupleAccess,
+    authorize_couple,
+    require_couple_member,
+    require_couple_owner,
+)
 
-router = APIRouter()
-
-
-def _check_couple_owner(db: Session, couple_id: int, user_id: int):
-    """验证用户是否拥有该 couple"""
-    couple = service.get_my_couple(db, owner_id=user_id)
-    if not couple or couple.id != couple_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your couple")
-    return couple
+router = APIRouter(dependencies=[Depends(deps.require_space("couple"))])
 
 
 # ========== Couple ==========
@@ -22,7 +22,7 @@ def create_or_get_couple(
     db: Session = Depends(deps.get_db_session),
     current_user=Depends(deps.get_current_active_user),
 ):
-    return service.create_couple(db, owner_id=current_user.id, payload=payload)
+    return service.create_couple(db, user_id=current_user.id, payload=payload)
 
 
 @router.get("/me", response_model=schemas.CoupleRead | None, summary="获取我的情侣档案")
@@ -30,7 +30,95 @@ def get_my_couple(
     db: Session = Depends(deps.get_db_session),
     current_user=Depends(deps.get_current_active_user),
 ):
-    return service.get_my_couple(db, owner_id=current_user.id)
+    return service.get_my_couple(db, user_id=current_user.id)
+
+
+@router.post("/join", response_model=schemas.CoupleRead, summary="凭邀请码加入情侣空间")
+def join_couple(
+    payload: schemas.CoupleJoin,
+    db: Session = Depends(deps.get_db_session),
+    current_user=Depends(deps.get_current_active_user),
+):
+    return service.join_couple(db, user_id=current_user.id, invite_code=payload.invite_code)
+
+
+@router.post(
+    "/{couple_id}/invite", response_model=schemas.CoupleInvite, summary="生成邀请码（仅创建者）"
+)
+def create_invite(
+    db: Session = Depends(deps.get_db_session),
+    access: CoupleAccess = Depends(require_couple_owner),
+):
+    return service.create_invite(db, couple_id=access.couple_id, user_id=access.user_id)
+
+
+@router.get(
+    "/{couple_id}/members", response_model=list[schemas.CoupleMemberRead], summary="成员列表"
+)
+def list_members(
+    couple_id: int,
+    db: Session = Depends(deps.get_db_session),
+    _: CoupleAccess = Depends(require_couple_member),
+):
+    return service.list_members(db, couple_id=couple_id)
+
+
+@router.delete(
+    "/{couple_id}/members/{user_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="移除成员/退出空间",
+)
+def remove_member(
+    user_id: int,
+    db: Session = Depends(deps.get_db_session),
+    access: CoupleAccess = Depends(require_couple_member),
+):
+    # 创建者可以移除伙伴，成员可以自己退出
+    if not access.is_owner and user_id != access.user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Only the owner can do this"
+        )
+    service.remove_member(db, couple_id=access.couple_id, user_id=user_id)
+
+
+@router.get(
+    "/{couple_id}/overview", response_model=schemas.CoupleOverview, summary="情侣空间首页聚合数据"
+)
+async def get_overview(
+    couple_id: int,
+    limit: int = Query(20, ge=1, le=100, description="每个集合返回的最新条数"),
+    db: AsyncSession = Depends(deps.get_async_db_session),
+    current_user=Depends(deps.get_current_active_user),
+):
+    return await overview.get_overview(
+        db, user_id=current_user.id, couple_id=couple_id, limit=limit
+    )
+
+
+@router.get("/{couple_id}/feed", response_model=schemas.FeedPage, summary="情侣空间动态时间线")
+async def get_feed(
+    couple_id: int,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None, description="上一页返回的 next_cursor"),
+    db: AsyncSession = Depends(deps.get_async_db_session),
+    current_user=Depends(deps.get_current_active_user),
+):
+    couple = await authorize_couple(db, user_id=current_user.id, couple_id=couple_id)
+    return await feed.get_feed(db, couple, limit=limit, cursor=cursor)
+
+
+@router.get("/{couple_id}/events", summary="情侣空间实时变更（SSE）")
+async def watch_events(
+    db: Session = Depends(deps.get_db_session),
+    access: CoupleAccess = Depends(require_couple_member),
+):
+    # 鉴权完成后立即归还数据库连接，长连接期间不占用连接池
+    db.close()
+    return StreamingResponse(
+        events.event_stream(access.couple_id, access.user_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 # ========== Note ==========
@@ -39,20 +127,27 @@ def add_note(
     couple_id: int,
     payload: schemas.NoteCreate,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     return service.add_note(db, couple_id=couple_id, payload=payload)
 
 
 @router.get("/{couple_id}/notes", response_model=list[schemas.NoteRead], summary="获取记录列表")
 def list_notes(
     couple_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
-    return service.list_notes(db, couple_id=couple_id)
+    return versions.conditional_list(
+        request,
+        response,
+        db,
+        couple_id,
+        "notes",
+        lambda: service.list_notes(db, couple_id=couple_id),
+    )
 
 
 @router.patch("/{couple_id}/notes/{note_id}", response_model=schemas.NoteRead, summary="更新记录")
@@ -61,9 +156,8 @@ def update_note(
     note_id: int,
     payload: schemas.NoteCreate,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     return service.update_note(db, couple_id=couple_id, note_id=note_id, payload=payload)
 
 
@@ -72,9 +166,8 @@ def delete_note(
     couple_id: int,
     note_id: int,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     service.delete_note(db, couple_id=couple_id, note_id=note_id)
 
 
@@ -84,20 +177,27 @@ def add_message(
     couple_id: int,
     payload: schemas.MessageCreate,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     return service.add_message(db, couple_id=couple_id, payload=payload)
 
 
 @router.get("/{couple_id}/messages", response_model=list[schemas.MessageRead], summary="获取留言列表")
 def list_messages(
     couple_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
-    return service.list_messages(db, couple_id=couple_id)
+    return versions.conditional_list(
+        request,
+        response,
+        db,
+        couple_id,
+        "messages",
+        lambda: service.list_messages(db, couple_id=couple_id),
+    )
 
 
 @router.delete("/{couple_id}/messages/{message_id}", status_code=status.HTTP_204_NO_CONTENT, summary="删除留言")
@@ -105,9 +205,8 @@ def delete_message(
     couple_id: int,
     message_id: int,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     service.delete_message(db, couple_id=couple_id, message_id=message_id)
 
 
@@ -117,20 +216,27 @@ def add_countdown(
     couple_id: int,
     payload: schemas.CountdownCreate,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     return service.add_countdown(db, couple_id=couple_id, payload=payload)
 
 
 @router.get("/{couple_id}/countdowns", response_model=list[schemas.CountdownRead], summary="获取倒计时列表")
 def list_countdowns(
     couple_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
-    return service.list_countdowns(db, couple_id=couple_id)
+    return versions.conditional_list(
+        request,
+        response,
+        db,
+        couple_id,
+        "countdowns",
+        lambda: service.list_countdowns(db, couple_id=couple_id),
+    )
 
 
 @router.patch("/{couple_id}/countdowns/{countdown_id}", response_model=schemas.CountdownRead, summary="更新倒计时")
@@ -139,9 +245,8 @@ def update_countdown(
     countdown_id: int,
     payload: schemas.CountdownUpdate,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     return service.update_countdown(db, couple_id=couple_id, countdown_id=countdown_id, payload=payload)
 
 
@@ -150,9 +255,8 @@ def delete_countdown(
     couple_id: int,
     countdown_id: int,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     service.delete_countdown(db, couple_id=couple_id, countdown_id=countdown_id)
 
 
@@ -162,20 +266,27 @@ def add_wish(
     couple_id: int,
     payload: schemas.WishCreate,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     return service.add_wish(db, couple_id=couple_id, payload=payload)
 
 
 @router.get("/{couple_id}/wishes", response_model=list[schemas.WishRead], summary="获取愿望列表")
 def list_wishes(
     couple_id: int,
+    request: Request,
+    response: Response,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
-    return service.list_wishes(db, couple_id=couple_id)
+    return versions.conditional_list(
+        request,
+        response,
+        db,
+        couple_id,
+        "wishes",
+        lambda: service.list_wishes(db, couple_id=couple_id),
+    )
 
 
 @router.patch("/{couple_id}/wishes/{wish_id}", response_model=schemas.WishRead, summary="更新愿望")
@@ -184,9 +295,8 @@ def update_wish(
     wish_id: int,
     payload: schemas.WishUpdate,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     return service.update_wish(db, couple_id=couple_id, wish_id=wish_id, payload=payload)
 
 
@@ -195,7 +305,6 @@ def delete_wish(
     couple_id: int,
     wish_id: int,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    _check_couple_owner(db, couple_id, current_user.id)
     service.delete_wish(db, couple_id=couple_id, wish_id=wish_id)
@@ -2,6 +2,8 @@ from datetime import date, datetime
 
 from pydantic import BaseModel, ConfigDict
 
+from app.modules.media.schemas import PhotoRead
+
 
 # ========== Couple ==========
 class CoupleCreate(BaseModel):
@@ -34,6 +36,23 @@ class CoupleRead(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CoupleInvite(BaseModel):
+    invite_code: str
+    expires_at: datetime
+
+
+class CoupleJoin(BaseModel):
+    invite_code: str
+
+
+class CoupleMemberRead(BaseModel):
+    user_id: int
+    role: str
+    created_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 # ========== Note ==========
 class NoteCreate(BaseModel):
     title: str
@@ -111,3 +130,27 @@ class WishRead(BaseModel):
     created_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+# ========== Overview (首页聚合) ==========
+class CoupleOverview(BaseModel):
+    couple: CoupleRead
+    limit: int
+    notes: list[NoteRead]
+    messages: list[MessageRead]
+    countdowns: list[CountdownRead]
+    wishes: list[WishRead]
+    photos: list[PhotoRead]
+
+
+# ========== Feed (动态时间线) ==========
+class FeedItem(BaseModel):
+    kind: str  # note | message | wish | countdown | photo
+    id: int
+    created_at: datetime
+    data: dict
+
+
+class FeedPage(BaseModel):
+    items: list[FeedItem]
+    next_cursor: str | None = None
@@ -1,18 +1,49 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+
 from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from app.modules.couples import schemas
-from app.modules.couples.models import Couple, CoupleNote, CoupleMessage, CoupleCountdown, CoupleWish
+from app.core.config import get_settings
+from app.modules.couples import events, schemas
+from app.modules.couples.membership import invalidate_membership
+from app.modules.couples.models import (
+    Couple,
+    CoupleCountdown,
+    CoupleInvitation,
+    CoupleMember,
+    CoupleMessage,
+    CoupleNote,
+    CoupleVersion,
+    CoupleWish,
+)
+from app.modules.couples.versions import bump_version, invalidate_version
+
+settings = get_settings()
 
 
 # ========== Couple ==========
-def get_my_couple(db: Session, owner_id: int) -> Couple | None:
-    return db.query(Couple).filter(Couple.owner_id == owner_id).first()
+def get_my_couple(db: Session, user_id: int) -> Couple | None:
+    """The couple space the user owns or has joined (owners first)."""
+    return (
+        db.query(Couple)
+        .join(CoupleMember, CoupleMember.couple_id == Couple.id)
+        .filter(CoupleMember.user_id == user_id)
+        .order_by((CoupleMember.role == "owner").desc(), Couple.id)
+        .first()
+    )
 
 
-def create_couple(db: Session, owner_id: int, payload: schemas.CoupleCreate) -> Couple:
-    existing = get_my_couple(db, owner_id)
+def create_couple(db: Session, user_id: int, payload: schemas.CoupleCreate) -> Couple:
+    existing = get_my_couple(db, user_id)
     if existing:
+        # 伙伴只能查看，档案仅创建者可修改
+        if existing.owner_id != user_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN, detail="Only the owner can do this"
+            )
         existing.name = payload.name
         existing.start_date = payload.start_date
         existing.partner_a_name = payload.partner_a_name
@@ -44,20 +75,139 @@ def create_couple(db: Session, owner_id: int, payload: schemas.CoupleCreate) ->
         partner_b_birthday=payload.partner_b_birthday,
         partner_a_location=payload.partner_a_location,
         partner_b_location=payload.partner_b_location,
-        owner_id=owner_id,
+        owner_id=user_id,
     )
+    couple.members.append(CoupleMember(user_id=user_id, role="owner"))
+    couple.versions = CoupleVersion()
     db.add(couple)
     db.commit()
     db.refresh(couple)
     return couple
 
 
+# ========== Member (成员/邀请) ==========
+def _hash_code(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+
+def _invalid_invite() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid or expired invite code"
+    )
+
+
+def create_invite(db: Session, couple_id: int, user_id: int) -> schemas.CoupleInvite:
+    """Random single-use invite code; only its hash is stored."""
+    code = secrets.token_urlsafe(24)
+    expires_at = datetime.utcnow() + timedelta(hours=settings.couple_invite_expire_hours)
+    db.add(
+        CoupleInvitation(
+            couple_id=couple_id,
+            code_hash=_hash_code(code),
+            created_by=user_id,
+            expires_at=expires_at,
+        )
+    )
+    db.commit()
+    return schemas.CoupleInvite(invite_code=code, expires_at=expires_at)
+
+
+def join_couple(db: Session, user_id: int, invite_code: str) -> Couple:
+    invite = (
+        db.query(CoupleInvitation)
+        .filter(CoupleInvitation.code_hash == _hash_code(invite_code))
+        .first()
+    )
+    now = datetime.utcnow()
+    if not invite or invite.used_at or invite.revoked_at or invite.expires_at <= now:
+        raise _invalid_invite()
+
+    couple = db.get(Couple, invite.couple_id)
+    if not couple:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Couple not found")
+    current = get_my_couple(db, user_id)
+    if current is not None:
+        if current.id == couple.id:
+            return couple
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT, detail="Already in a couple space"
+        )
+    member_count = db.query(CoupleMember).filter(CoupleMember.couple_id == couple.id).count()
+    if member_count >= settings.couple_max_members:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Couple space is full")
+
+    # 条件更新抢占邀请码：并发使用同一个码时只有一个请求成功
+    claimed = (
+        db.query(CoupleInvitation)
+        .filter(
+            CoupleInvitation.id == invite.id,
+            CoupleInvitation.used_at.is_(None),
+            CoupleInvitation.revoked_at.is_(None),
+        )
+        .update(
+            {CoupleInvitation.used_at: now, CoupleInvitation.used_by: user_id},
+            synchronize_session=False,
+        )
+    )
+    if claimed != 1:
+        db.rollback()
+        raise _invalid_invite()
+    db.add(CoupleMember(couple_id=couple.id, user_id=user_id, role="partner"))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+    db.refresh(couple)
+    return couple
+
+
+def list_members(db: Session, couple_id: int):
+    return (
+        db.query(CoupleMember)
+        .filter(CoupleMember.couple_id == couple_id)
+        .order_by((CoupleMember.role == "owner").desc(), CoupleMember.id)
+        .all()
+    )
+
+
+def remove_member(db: Session, couple_id: int, user_id: int) -> None:
+    member = (
+        db.query(CoupleMember)
+        .filter(CoupleMember.couple_id == couple_id, CoupleMember.user_id == user_id)
+        .first()
+    )
+    if not member:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Member not found")
+    if member.role == "owner":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="The owner cannot leave the space"
+        )
+    db.delete(member)
+    # 作废尚未使用的邀请码，被移除的成员不能拿旧码重新加入
+    db.query(CoupleInvitation).filter(
+        CoupleInvitation.couple_id == couple_id,
+        CoupleInvitation.used_at.is_(None),
+        CoupleInvitation.revoked_at.is_(None),
+    ).update({CoupleInvitation.revoked_at: datetime.utcnow()}, synchronize_session=False)
+    db.commit()
+    invalidate_membership(user_id, couple_id)
+    events.publish_member_removed(couple_id, user_id)
+
+
+def _commit_change(db: Session, couple_id: int, collection: str) -> None:
+    """Commit a collection write together with its version bump (see ``versions``)."""
+    bump_version(db, couple_id, collection)
+    db.commit()
+    invalidate_version(couple_id, collection)
+
+
 # ========== Note ==========
 def add_note(db: Session, couple_id: int, payload: schemas.NoteCreate) -> CoupleNote:
     note = CoupleNote(couple_id=couple_id, title=payload.title, content_md=payload.content_md)
     db.add(note)
-    db.commit()
+    _commit_change(db, couple_id, "notes")
     db.refresh(note)
+    events.publish_change(couple_id, "notes", "created", note.id, note)
     return note
 
 
@@ -71,8 +221,9 @@ def update_note(db: Session, couple_id: int, note_id: int, payload: schemas.Note
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
     note.title = payload.title
     note.content_md = payload.content_md
-    db.commit()
+    _commit_change(db, couple_id, "notes")
     db.refresh(note)
+    events.publish_change(couple_id, "notes", "updated", note.id, note)
     return note
 
 
@@ -81,15 +232,17 @@ def delete_note(db: Session, couple_id: int, note_id: int) -> None:
     if not note:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Note not found")
     db.delete(note)
-    db.commit()
+    _commit_change(db, couple_id, "notes")
+    events.publish_change(couple_id, "notes", "deleted", note_id)
 
 
 # ========== Message (留言板) ==========
 def add_message(db: Session, couple_id: int, payload: schemas.MessageCreate) -> CoupleMessage:
     msg = CoupleMessage(couple_id=couple_id, author=payload.author, content=payload.content)
     db.add(msg)
-    db.commit()
+    _commit_change(db, couple_id, "messages")
     db.refresh(msg)
+    events.publish_change(couple_id, "messages", "created", msg.id, msg)
     return msg
 
 
@@ -102,15 +255,17 @@ def delete_message(db: Session, couple_id: int, message_id: int) -> None:
     if not msg:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Message not found")
     db.delete(msg)
-    db.commit()
+    _commit_change(db, couple_id, "messages")
+    events.publish_change(couple_id, "messages", "deleted", message_id)
 
 
 # ========== Countdown (倒计时) ==========
 def add_countdown(db: Session, couple_id: int, payload: schemas.CountdownCreate) -> CoupleCountdown:
     cd = CoupleCountdown(couple_id=couple_id, title=payload.title, target_date=payload.target_date, is_yearly=payload.is_yearly)
     db.add(cd)
-    db.commit()
+    _commit_change(db, couple_id, "countdowns")
     db.refresh(cd)
+    events.publish_change(couple_id, "countdowns", "created", cd.id, cd)
     return cd
 
 
@@ -130,8 +285,9 @@ def update_countdown(db: Session, couple_id: int, countdown_id: int, payload: sc
         cd.is_yearly = payload.is_yearly
     if payload.is_pinned is not None:
         cd.is_pinned = payload.is_pinned
-    db.commit()
+    _commit_change(db, couple_id, "countdowns")
     db.refresh(cd)
+    events.publish_change(couple_id, "countdowns", "updated", cd.id, cd)
     return cd
 
 
@@ -140,15 +296,17 @@ def delete_countdown(db: Session, couple_id: int, countdown_id: int) -> None:
     if not cd:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Countdown not found")
     db.delete(cd)
-    db.commit()
+    _commit_change(db, couple_id, "countdowns")
+    events.publish_change(couple_id, "countdowns", "deleted", countdown_id)
 
 
 # ========== Wish (愿望清单) ==========
 def add_wish(db: Session, couple_id: int, payload: schemas.WishCreate) -> CoupleWish:
     wish = CoupleWish(couple_id=couple_id, title=payload.title, progress=payload.progress)
     db.add(wish)
-    db.commit()
+    _commit_change(db, couple_id, "wishes")
     db.refresh(wish)
+    events.publish_change(couple_id, "wishes", "created", wish.id, wish)
     return wish
 
 
@@ -168,8 +326,9 @@ def update_wish(db: Session, couple_id: int, wish_id: int, payload: schemas.Wish
         wish.completed = payload.completed
     if payload.is_pinned is not None:
         wish.is_pinned = payload.is_pinned
-    db.commit()
+    _commit_change(db, couple_id, "wishes")
     db.refresh(wish)
+    events.publish_change(couple_id, "wishes", "updated", wish.id, wish)
     return wish
 
 
@@ -178,4 +337,5 @@ def delete_wish(db: Session, couple_id: int, wish_id: int) -> None:
     if not wish:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Wish not found")
     db.delete(wish)
-    db.commit()
+    _commit_change(db, couple_id, "wishes")
+    events.publish_change(couple_id, "wishes", "deleted", wish_id)
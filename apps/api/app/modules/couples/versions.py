@@ -0,0 +1,89 @@
+from fastapi import Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.modules.couples.models import CoupleVersion
+
+settings = get_settings()
+
+COLLECTIONS = ("notes", "messages", "countdowns", "wishes")
+
+# (couple_id, collection) -> version；本进程写入后立即失效，其他进程靠 TTL 收敛。
+# 只用于无条件请求的 ETag：缓存值至多比实际旧，只会让客户端多拉一次，不会产生错误的 304
+_version_cache = TTLCache(maxsize=4096, ttl=settings.couple_version_cache_ttl_seconds)
+
+
+def _column(collection: str):
+    if collection not in COLLECTIONS:
+        raise ValueError(f"Unknown couple collection '{collection}'")
+    return getattr(CoupleVersion, f"{collection}_version")
+
+
+def get_version(db: Session, couple_id: int, collection: str, fresh: bool = False) -> int:
+    """Current version of one collection: a primary-key lookup, or free when cached.
+
+    ``fresh`` skips the cache, for decisions that must not use a stale value.
+    """
+    key = (couple_id, collection)
+    if not fresh:
+        version = _version_cache.get(key)
+        if version is not None:
+            return version
+    version = (
+        db.execute(select(_column(collection)).where(CoupleVersion.couple_id == couple_id)).scalar()
+        or 0
+    )
+    _version_cache.set(key, version)
+    return version
+
+
+def bump_version(db: Session, couple_id: int, collection: str) -> None:
+    """Increment inside the caller's transaction, so the new version commits with the change."""
+    column = _column(collection)
+    result = db.execute(
+        update(CoupleVersion)
+        .where(CoupleVersion.couple_id == couple_id)
+        .values({column: column + 1})
+    )
+    if result.rowcount == 0:
+        db.add(CoupleVersion(couple_id=couple_id, **{column.key: 1}))
+
+
+def invalidate_version(couple_id: int, collection: str) -> None:
+    _version_cache.delete((couple_id, collection))
+
+
+def make_etag(couple_id: int, collection: str, version: int) -> str:
+    return f'W/"{collection}-{couple_id}-{version}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match 使用弱比较：忽略 W/ 前缀
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+def conditional_list(
+    request: Request, response: Response, db: Session, couple_id: int, collection: str, loader
+):
+    """List a collection with an ETag; a matching ``If-None-Match`` gets 304 without loading it.
+
+    Conditional requests read the version from the database, since the per-process cache
+    can lag writes made by other workers for up to its TTL. The version is read before
+    the rows, so a concurrent write can only make the ETag older than the body, which
+    costs the client one extra fetch but never a stale 304.
+    """
+    conditional = bool(request.headers.get("if-none-match"))
+    etag = make_etag(
+        couple_id, collection, get_version(db, couple_id, collection, fresh=conditional)
+    )
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if conditional and etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return loader()
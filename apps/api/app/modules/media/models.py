@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 from app.db.base import Base
@@ -22,3 +22,8 @@ class Photo(Base):
     # 保留旧的 couple_id 兼容
     couple_id = Column(Integer, ForeignKey("couples.id"), nullable=True, index=True)
     couple = relationship("Couple", back_populates="photos")
+
+    __table_args__ = (
+        Index("ix_photos_couple_created", "couple_id", "created_at", "id"),
+        Index("ix_photos_owner_space_created", "owner_id", "space_type", "created_at", "id"),
+    )
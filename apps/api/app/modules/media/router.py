@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 
 from app.core import deps
-from app.modules.couples import service as couple_service
+from app.modules.couples.membership import CoupleAccess, require_couple_member
 from app.modules.media import schemas, service
+from app.modules.media.store import media_store
 
 router = APIRouter()
 
@@ -17,6 +19,7 @@ def create_photo(
     current_user=Depends(deps.get_current_active_user),
 ):
     """上传照片到指定空间"""
+    deps.ensure_space(current_user, payload.space_type)
     return service.add_photo(db, owner_id=current_user.id, payload=payload)
 
 
@@ -27,6 +30,7 @@ def get_photos(
     current_user=Depends(deps.get_current_active_user),
 ):
     """获取指定空间的照片列表"""
+    deps.ensure_space(current_user, space_type)
     return service.list_photos(db, owner_id=current_user.id, space_type=space_type)
 
 
@@ -43,28 +47,43 @@ def remove_photo(
     return {"message": "Photo deleted"}
 
 
+# ========== 本地镜像文件（内容寻址，永不变化） ==========
+
+@router.get("/files/{name:path}", summary="本地镜像图片", include_in_schema=False)
+def get_stored_file(name: str):
+    """按 sha256 命名的文件内容不可变，可被浏览器/CDN 长期缓存；文件名不可猜测，无需登录"""
+    path = media_store.path_for(name)
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="File not found")
+    return FileResponse(path, headers={"Cache-Control": "public, max-age=31536000, immutable"})
+
+
 # ========== 旧接口：兼容 couple_id 方式 ==========
 
-@router.post("/{couple_id}/photos", response_model=schemas.PhotoRead, summary="Add photo by URL (legacy)")
+@router.post(
+    "/{couple_id}/photos",
+    response_model=schemas.PhotoRead,
+    summary="Add photo by URL (legacy)",
+    dependencies=[Depends(deps.require_space("couple"))],
+)
 def add_photo_legacy(
     couple_id: int,
     payload: schemas.PhotoCreate,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    couple = couple_service.get_my_couple(db, owner_id=current_user.id)
-    if not couple or couple.id != couple_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your couple")
     return service.add_photo_legacy(db, couple_id=couple_id, payload=payload)
 
 
-@router.get("/{couple_id}/photos", response_model=list[schemas.PhotoRead], summary="List photos (legacy)")
+@router.get(
+    "/{couple_id}/photos",
+    response_model=list[schemas.PhotoRead],
+    summary="List photos (legacy)",
+    dependencies=[Depends(deps.require_space("couple"))],
+)
 def list_photos_legacy(
     couple_id: int,
     db: Session = Depends(deps.get_db_session),
-    current_user=Depends(deps.get_current_active_user),
+    _: CoupleAccess = Depends(require_couple_member),
 ):
-    couple = couple_service.get_my_couple(db, owner_id=current_user.id)
-    if not couple or couple.id != couple_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not your couple")
     return service.list_photos_legacy(db, couple_id=couple_id)
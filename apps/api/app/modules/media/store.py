@@ -0,0 +1,57 @@
+import asyncio
+import hashlib
+import os
+import re
+from pathlib import Path
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+CONTENT_TYPE_EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+# <sha256 前两位>/<接下来两位>/<sha256><ext>
+STORED_NAME_RE = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.(png|jpg|webp|gif)$")
+
+
+class ContentStore:
+    """Content-addressed file store: identical bytes always map to the same immutable path."""
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def name_for(self, digest: str, ext: str) -> str:
+        return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+    def path_for(self, name: str) -> Path | None:
+        if not STORED_NAME_RE.match(name):
+            return None
+        return self.root / name
+
+    def _write(self, name: str, data: bytes) -> None:
+        path = self.root / name
+        if path.exists():
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f"{path.suffix}.tmp{os.getpid()}")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    async def put(self, data: bytes, ext: str) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        name = self.name_for(digest, ext)
+        await asyncio.to_thread(self._write, name, data)
+        return name
+
+
+def public_url(name: str) -> str:
+    return (
+        f"{settings.media_public_base_url.rstrip('/')}{settings.api_v1_prefix}/media/files/{name}"
+    )
+
+
+media_store = ContentStore(settings.media_store_dir)
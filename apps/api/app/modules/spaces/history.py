@@ -0,0 +1,135 @@
+import re
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.modules.spaces.models import ChatMessage, ChatSession
+
+settings = get_settings()
+
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af\uff00-\uffef]")
+# 每条消息的角色/分隔符开销
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_SNIPPET_CHARS = 120
+# 补摘要时每页读取的行数
+BACKLOG_PAGE_SIZE = 200
+_ROLE_LABELS = {"user": "用户", "assistant": "助手"}
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算 token 数：中日韩字符约 1 字 1 token，其余约 4 字符 1 token。"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def _message_tokens(row: ChatMessage) -> int:
+    return estimate_tokens(row.content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def _fold_into_summary(summary: str | None, rows: list[ChatMessage], budget: int) -> str:
+    lines = summary.splitlines() if summary else []
+    for row in rows:
+        snippet = " ".join(row.content.split())[:SUMMARY_SNIPPET_CHARS]
+        lines.append(f"{_ROLE_LABELS.get(row.role, row.role)}: {snippet}")
+    # 摘要自身也受预算约束，超出时丢弃最早的行
+    while len(lines) > 1 and estimate_tokens("\n".join(lines)) > budget:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+async def _fold_backlog(db: AsyncSession, session: ChatSession, before_id: int) -> int | None:
+    """Fold unsummarized rows older than ``before_id`` into the summary, oldest first, page by page.
+
+    Returns the id of the last row folded, or ``None`` when there was nothing to fold.
+    """
+    last_id = session.summary_upto_id or 0
+    folded_any = False
+    while True:
+        page = (
+            await db.scalars(
+                select(ChatMessage)
+                .where(
+                    ChatMessage.session_id == session.id,
+                    ChatMessage.id > last_id,
+                    ChatMessage.id < before_id,
+                )
+                .order_by(ChatMessage.id)
+                .limit(BACKLOG_PAGE_SIZE)
+            )
+        ).all()
+        if not page:
+            break
+        session.summary = _fold_into_summary(
+            session.summary,
+            [row for row in page if row.message_type == "text"],
+            settings.chat_summary_token_budget,
+        )
+        last_id = page[-1].id
+        folded_any = True
+        if len(page) < BACKLOG_PAGE_SIZE:
+            break
+    return last_id if folded_any else None
+
+
+async def build_chat_history(db: AsyncSession, session: ChatSession) -> list[dict]:
+    """Build the Qwen message list for the next turn of ``session``.
+
+    Only rows newer than ``session.summary_upto_id`` are read, newest first, and at most
+    ``chat_history_max_messages + 2`` of them (one turn adds a user and an assistant row).
+    Rows that no longer fit the token budget are folded into ``session.summary``; when the
+    read hit its limit, older unsummarized rows (e.g. a long session seen for the first
+    time) are paged in and folded first. The caller commits the updated session together
+    with the new user message.
+    """
+    budget = settings.chat_history_token_budget
+    window_size = settings.chat_history_max_messages
+    read_limit = window_size + 2
+    rows = (
+        await db.scalars(
+            select(ChatMessage)
+            .where(
+                ChatMessage.session_id == session.id,
+                ChatMessage.id > (session.summary_upto_id or 0),
+            )
+            .order_by(ChatMessage.id.desc())
+            .limit(read_limit)
+        )
+    ).all()
+
+    used = estimate_tokens(session.summary or "")
+    window: list[ChatMessage] = []
+    folded: list[ChatMessage] = []
+    for row in rows:
+        if row.message_type != "text":
+            if folded:
+                folded.append(row)
+            continue
+        cost = _message_tokens(row)
+        if folded or len(window) >= window_size or used + cost > budget:
+            folded.append(row)
+            continue
+        window.append(row)
+        used += cost
+
+    upto_id = None
+    if len(rows) == read_limit:
+        upto_id = await _fold_backlog(db, session, before_id=rows[-1].id)
+    if folded:
+        session.summary = _fold_into_summary(
+            session.summary,
+            [row for row in reversed(folded) if row.message_type == "text"],
+            settings.chat_summary_token_budget,
+        )
+        upto_id = folded[0].id
+    if upto_id is not None:
+        session.summary_upto_id = upto_id
+
+    history = [{"role": row.role, "content": row.content} for row in reversed(window)]
+    if session.summary:
+        history.insert(
+            0, {"role": "system", "content": f"以下是此前对话的摘要：\n{session.summary}"}
+        )
+    return history
@@ -0,0 +1,162 @@
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+
+from app.core.config import get_settings
+from app.core.logging import logger
+from app.db.session import AsyncSessionLocal
+from app.modules.spaces import schemas, service
+
+settings = get_settings()
+
+TERMINAL_STATUSES = {"succeeded", "failed"}
+
+
+@dataclass
+class ImageJob:
+    id: str
+    user_id: int
+    payload: schemas.ImageRequest
+    status: str = "queued"  # queued | running | succeeded | failed
+    progress: int = 0
+    images: list[str] | None = None
+    session_id: int | None = None
+    error: dict | str | None = None
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    finished_at: datetime | None = None
+    changed: asyncio.Event = field(default_factory=asyncio.Event, repr=False)
+
+    def update(self, **changes) -> None:
+        for key, value in changes.items():
+            setattr(self, key, value)
+        # 唤醒当前所有等待者，再换一个新的 Event 供下一轮等待
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+    def to_read(self) -> schemas.ImageJobRead:
+        return schemas.ImageJobRead(
+            job_id=self.id,
+            status=self.status,
+            progress=self.progress,
+            images=self.images,
+            session_id=self.session_id,
+            error=self.error,
+            created_at=self.created_at,
+            finished_at=self.finished_at,
+        )
+
+
+class ImageJobManager:
+    """In-process image generation queue drained by a bounded pool of worker tasks.
+
+    Jobs live in this process only; with several uvicorn workers a client must poll the
+    worker that accepted the job (sticky sessions), as with any in-memory state.
+    """
+
+    def __init__(self, concurrency: int, max_queue: int, result_ttl: float):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.result_ttl = result_ttl
+        self._jobs: dict[str, ImageJob] = {}
+        self._queue: asyncio.Queue[ImageJob] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"image-job-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+        # 排队中/执行中的任务不会再有结果，标记失败以结束正在 watch 的 SSE
+        now = datetime.utcnow()
+        for job in self._jobs.values():
+            if job.status not in TERMINAL_STATUSES:
+                job.update(status="failed", error="server_shutdown", finished_at=now)
+
+    async def submit(self, user_id: int, payload: schemas.ImageRequest) -> ImageJob:
+        await self.start()
+        self._prune()
+        job = ImageJob(id=uuid.uuid4().hex, user_id=user_id, payload=payload)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Image job queue is full"
+            )
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str, user_id: int) -> ImageJob:
+        job = self._jobs.get(job_id)
+        if not job or job.user_id != user_id:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        return job
+
+    async def watch(self, job: ImageJob) -> AsyncIterator[ImageJob]:
+        """Yield the job now and after every change until it reaches a terminal status."""
+        while True:
+            changed = job.changed
+            yield job
+            if job.status in TERMINAL_STATUSES:
+                return
+            await changed.wait()
+
+    def _prune(self) -> None:
+        now = datetime.utcnow()
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.finished_at and (now - job.finished_at).total_seconds() > self.result_ttl
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ImageJob) -> None:
+        job.update(status="running", progress=10)
+        try:
+            async with AsyncSessionLocal() as db:
+                urls, session_id = await service.image_and_store(
+                    db, user_id=job.user_id, payload=job.payload
+                )
+        except HTTPException as exc:
+            logger.warning("Image job failed job_id={} status={}", job.id, exc.status_code)
+            job.update(status="failed", error=exc.detail, finished_at=datetime.utcnow())
+        except Exception as exc:
+            logger.exception("Image job crashed job_id={}", job.id)
+            job.update(status="failed", error=repr(exc), finished_at=datetime.utcnow())
+        else:
+            job.update(
+                status="succeeded",
+                progress=100,
+                images=urls,
+                session_id=session_id,
+                finished_at=datetime.utcnow(),
+            )
+
+
+image_jobs = ImageJobManager(
+    concurrency=settings.image_job_concurrency,
+    max_queue=settings.image_job_queue_size,
+    result_ttl=settings.image_job_result_ttl_seconds,
+)
@@ -0,0 +1,161 @@
+import asyncio
+import random
+from dataclasses import dataclass
+from pathlib import PurePosixPath
+from urllib.parse import urlparse
+
+import httpx
+
+from app.core import metrics
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.http_client import get_http_client
+from app.core.logging import logger
+from app.db.session import AsyncSessionLocal
+from app.modules.media.store import CONTENT_TYPE_EXTENSIONS, media_store, public_url
+from app.modules.spaces.models import ChatMessage
+
+settings = get_settings()
+
+
+class MirrorError(Exception):
+    pass
+
+
+@dataclass
+class MirrorTask:
+    message_id: int
+    urls: list[str]
+
+
+class ImageMirror:
+    """Background pipeline copying provider image URLs into the local content store.
+
+    After all images of a message are processed the ``ChatMessage`` is rewritten to the local
+    URLs; images that still fail after retries keep their provider URL.
+    """
+
+    def __init__(self, concurrency: int, max_queue: int, max_retries: int, max_bytes: int):
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self.max_bytes = max_bytes
+        # 同一上游链接（缓存命中、合并请求）只下载一次
+        self._mirrored = TTLCache(maxsize=2048, ttl=settings.image_cache_ttl_seconds)
+        self._queue: asyncio.Queue[MirrorTask] | None = None
+        self._workers: list[asyncio.Task] = []
+
+    async def start(self) -> None:
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"image-mirror-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queue = None
+
+    def enqueue(self, message_id: int, urls: list[str]) -> None:
+        if self._queue is None:
+            return
+        try:
+            self._queue.put_nowait(MirrorTask(message_id=message_id, urls=list(urls)))
+        except asyncio.QueueFull:
+            metrics.incr("media.mirror.dropped")
+            logger.warning(
+                "Image mirror queue full, keeping provider URLs message_id={}", message_id
+            )
+
+    async def _worker(self) -> None:
+        while True:
+            task = await self._queue.get()
+            try:
+                await self._mirror_message(task)
+            except Exception:
+                logger.exception("Image mirror failed message_id={}", task.message_id)
+            finally:
+                self._queue.task_done()
+
+    async def _mirror_message(self, task: MirrorTask) -> None:
+        local_urls = []
+        for url in task.urls:
+            try:
+                local_urls.append(await self._mirror_url(url))
+            except MirrorError as exc:
+                metrics.incr("media.mirror.failed")
+                logger.warning("Image mirror gave up url={} error={}", url[:120], exc)
+                local_urls.append(url)
+        if local_urls == task.urls:
+            return
+        async with AsyncSessionLocal() as db:
+            message = await db.get(ChatMessage, task.message_id)
+            if message is None:
+                return
+            message.content = "\n".join(local_urls)
+            await db.commit()
+
+    async def _mirror_url(self, url: str) -> str:
+        if url.startswith(public_url("")):
+            return url
+        cached = self._mirrored.get(url)
+        if cached:
+            return cached
+        data, ext = await self._download(url)
+        local = public_url(await media_store.put(data, ext))
+        self._mirrored.set(url, local)
+        metrics.incr("media.mirror.stored")
+        return local
+
+    async def _download(self, url: str) -> tuple[bytes, str]:
+        last_error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(random.uniform(0, min(8.0, 0.5 * 2**attempt)))
+            try:
+                async with get_http_client().stream("GET", url, timeout=30) as resp:
+                    if resp.status_code != 200:
+                        last_error = f"status={resp.status_code}"
+                        if resp.status_code < 500 and resp.status_code != 429:
+                            break
+                        continue
+                    data = await self._read_capped(resp)
+                    return data, self._extension(url, resp.headers.get("Content-Type", ""))
+            except httpx.TransportError as exc:
+                last_error = repr(exc)
+        raise MirrorError(last_error or "download failed")
+
+    async def _read_capped(self, resp: httpx.Response) -> bytes:
+        # 先看 Content-Length，再边读边计数，超限立即中断，不把整张大图读进内存
+        length = resp.headers.get("Content-Length", "")
+        if length.isdigit() and int(length) > self.max_bytes:
+            raise MirrorError(f"image larger than {self.max_bytes} bytes")
+        chunks, received = [], 0
+        async for chunk in resp.aiter_bytes():
+            received += len(chunk)
+            if received > self.max_bytes:
+                raise MirrorError(f"image larger than {self.max_bytes} bytes")
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    @staticmethod
+    def _extension(url: str, content_type: str) -> str:
+        ext = CONTENT_TYPE_EXTENSIONS.get(content_type.split(";")[0].strip().lower())
+        if ext:
+            return ext
+        suffix = PurePosixPath(urlparse(url).path).suffix.lower()
+        suffix = ".jpg" if suffix == ".jpeg" else suffix
+        return suffix if suffix in CONTENT_TYPE_EXTENSIONS.values() else ".png"
+
+
+image_mirror = ImageMirror(
+    concurrency=settings.image_mirror_concurrency,
+    max_queue=settings.image_mirror_queue_size,
+    max_retries=settings.image_mirror_max_retries,
+    max_bytes=settings.image_mirror_max_bytes,
+)
@@ -15,7 +15,7 @@ class SimpleKV(Base):
 
 from datetime import datetime
 
-from sqlalchemy import Column, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 
 
@@ -28,10 +28,17 @@ class ChatSession(Base):
     mode = Column(String(20), default="chat", nullable=False)  # chat | image
     model = Column(String(100), nullable=True)
     is_pinned = Column(Integer, default=0, nullable=False)  # 1 pinned, 0 normal
+    summary = Column(Text, nullable=True)  # 滚动摘要：已移出上下文窗口的旧消息
+    summary_upto_id = Column(Integer, default=0, nullable=False)  # 已并入摘要的最大消息 id
     created_at = Column(DateTime, default=datetime.utcnow)
 
     messages = relationship("ChatMessage", back_populates="session", cascade="all, delete-orphan")
 
+    # 会话列表游标分页：(is_pinned, created_at, id)
+    __table_args__ = (
+        Index("ix_chat_sessions_user_pinned_created", "user_id", "is_pinned", "created_at", "id"),
+    )
+
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -40,7 +47,10 @@ class ChatMessage(Base):
     session_id = Column(Integer, ForeignKey("chat_sessions.id"), nullable=False, index=True)
     role = Column(String(20), nullable=False)  # user | assistant
     content = Column(Text, nullable=False)
-    message_type = Column(String(20), default="text", nullable=False)  # text | image
+    message_type = Column(String(20), default="text", nullable=False)  # text | image | cancelled
     created_at = Column(DateTime, default=datetime.utcnow)
 
     session = relationship("ChatSession", back_populates="messages")
+
+    # 消息列表游标分页：(created_at, id)
+    __table_args__ = (Index("ix_chat_messages_session_created", "session_id", "created_at", "id"),)
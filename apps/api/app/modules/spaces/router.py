@@ -1,47 +1,147 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import deps
+from app.core.disconnect import ClientDisconnected, run_until_disconnect
 from app.modules.spaces import schemas, service
+from app.modules.spaces.jobs import image_jobs
+from app.modules.spaces.search import search_history
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(deps.require_space("ai"))])
+
+# nginx 约定的 "Client Closed Request"，客户端已断开，仅用于日志
+CLIENT_CLOSED_REQUEST = 499
 
 
 @router.post("/ai/chat", response_model=schemas.ChatResponse, summary="Qwen chat")
 async def chat(
+    request: Request,
     payload: schemas.ChatRequest,
-    db: Session = Depends(deps.get_db_session),
+    db: AsyncSession = Depends(deps.get_async_db_session),
     current_user=Depends(deps.get_current_active_user),
 ):
-    reply, session_id = await service.chat_and_store(db, user_id=current_user.id, payload=payload)
+    try:
+        reply, session_id = await run_until_disconnect(
+            request, service.chat_and_store(db, user_id=current_user.id, payload=payload)
+        )
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     return schemas.ChatResponse(reply=reply, session_id=session_id)
 
 
+@router.post("/ai/chat/stream", summary="Qwen chat (SSE stream)")
+async def chat_stream(
+    payload: schemas.ChatRequest,
+    db: AsyncSession = Depends(deps.get_async_db_session),
+    current_user=Depends(deps.get_current_active_user),
+):
+    events = service.chat_stream_and_store(db, user_id=current_user.id, payload=payload)
+    # 预取首个事件：会话校验、API Key、上游状态码错误仍以普通 HTTP 错误返回
+    first = await events.__anext__()
+
+    async def event_stream():
+        try:
+            yield first.to_sse()
+            async for event in events:
+                yield event.to_sse()
+        finally:
+            await events.aclose()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/ai/image", response_model=schemas.ImageResponse, summary="Qwen image generation")
 async def image(
+    request: Request,
     payload: schemas.ImageRequest,
-    db: Session = Depends(deps.get_db_session),
+    db: AsyncSession = Depends(deps.get_async_db_session),
     current_user=Depends(deps.get_current_active_user),
 ):
-    urls, session_id = await service.image_and_store(db, user_id=current_user.id, payload=payload)
+    try:
+        urls, session_id = await run_until_disconnect(
+            request, service.image_and_store(db, user_id=current_user.id, payload=payload)
+        )
+    except ClientDisconnected:
+        return Response(status_code=CLIENT_CLOSED_REQUEST)
     return schemas.ImageResponse(images=urls, session_id=session_id)
 
 
-@router.get("/sessions", response_model=list[schemas.ChatSessionRead], summary="List chat sessions")
+@router.post(
+    "/ai/image/jobs",
+    response_model=schemas.ImageJobRead,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Queue Qwen image generation",
+)
+async def create_image_job(
+    payload: schemas.ImageRequest,
+    current_user=Depends(deps.get_current_active_user),
+):
+    job = await image_jobs.submit(user_id=current_user.id, payload=payload)
+    return job.to_read()
+
+
+@router.get(
+    "/ai/jobs/{job_id}", response_model=schemas.ImageJobRead, summary="Get image job status"
+)
+async def get_image_job(job_id: str, current_user=Depends(deps.get_current_active_user)):
+    return image_jobs.get(job_id, user_id=current_user.id).to_read()
+
+
+@router.get("/ai/jobs/{job_id}/events", summary="Image job status (SSE stream)")
+async def watch_image_job(job_id: str, current_user=Depends(deps.get_current_active_user)):
+    job = image_jobs.get(job_id, user_id=current_user.id)
+
+    async def event_stream():
+        async for snapshot in image_jobs.watch(job):
+            yield f"event: status\ndata: {snapshot.to_read().model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/sessions", response_model=schemas.ChatSessionPage, summary="List chat sessions")
 async def list_chat_sessions(
-    db: Session = Depends(deps.get_db_session),
+    limit: int = Query(50, ge=1, le=200),
+    before: str | None = Query(None, description="Cursor: page before this item"),
+    after: str | None = Query(None, description="Cursor: page after this item"),
+    db: AsyncSession = Depends(deps.get_async_db_session),
     current_user=Depends(deps.get_current_active_user),
 ):
-    return service.list_sessions(db, user_id=current_user.id)
+    return await service.list_sessions(
+        db, user_id=current_user.id, limit=limit, before=before, after=after
+    )
+
+
+@router.get(
+    "/search",
+    response_model=schemas.SearchResponse,
+    summary="Full-text search over chat history",
+)
+async def search_chat_history(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(deps.get_async_db_session),
+    current_user=Depends(deps.get_current_active_user),
+):
+    return await search_history(db, user_id=current_user.id, query=q, limit=limit, offset=offset)
 
 
 @router.post("/sessions", response_model=schemas.ChatSessionRead, summary="Create chat session")
 async def create_chat_session(
     payload: schemas.ChatSessionCreate,
-    db: Session = Depends(deps.get_db_session),
+    db: AsyncSession = Depends(deps.get_async_db_session),
     current_user=Depends(deps.get_current_active_user),
 ):
-    session = service._ensure_session(
+    session = await service._ensure_session(
         db,
         user_id=current_user.id,
         session_id=None,
@@ -54,32 +154,39 @@ async def create_chat_session(
 
 @router.get(
     "/sessions/{session_id}/messages",
-    response_model=list[schemas.ChatMessageRead],
+    response_model=schemas.ChatMessagePage,
     summary="List messages in a session",
 )
 async def list_chat_messages(
     session_id: int,
-    db: Session = Depends(deps.get_db_session),
+    limit: int = Query(50, ge=1, le=200),
+    before: str | None = Query(None, description="Cursor: older messages before this one"),
+    after: str | None = Query(None, description="Cursor: newer messages after this one"),
+    db: AsyncSession = Depends(deps.get_async_db_session),
     current_user=Depends(deps.get_current_active_user),
 ):
-    return service.list_messages(db, user_id=current_user.id, session_id=session_id)
+    return await service.list_messages(
+        db, user_id=current_user.id, session_id=session_id, limit=limit, before=before, after=after
+    )
 
 
 @router.post("/sessions/{session_id}/pin", response_model=schemas.ChatSessionRead, summary="Pin/Unpin session")
 async def pin_chat_session(
     session_id: int,
     is_pinned: bool,
-    db: Session = Depends(deps.get_db_session),
+    db: AsyncSession = Depends(deps.get_async_db_session),
     current_user=Depends(deps.get_current_active_user),
 ):
-    return service.set_session_pin(db, user_id=current_user.id, session_id=session_id, is_pinned=is_pinned)
+    return await service.set_session_pin(
+        db, user_id=current_user.id, session_id=session_id, is_pinned=is_pinned
+    )
 
 
 @router.delete("/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT, summary="Delete session")
 async def delete_chat_session(
     session_id: int,
-    db: Session = Depends(deps.get_db_session),
+    db: AsyncSession = Depends(deps.get_async_db_session),
     current_user=Depends(deps.get_current_active_user),
 ):
-    service.delete_session(db, user_id=current_user.id, session_id=session_id)
+    await service.delete_session(db, user_id=current_user.id, session_id=session_id)
     return None
@@ -1,9 +1,12 @@
+import json
 from typing import List, Optional
 
 from datetime import datetime
 
 from pydantic import BaseModel, ConfigDict
 
+from app.core.pagination import CursorPage
+
 
 class ChatMessage(BaseModel):
     role: str
@@ -23,6 +26,14 @@ class ChatResponse(BaseModel):
     session_id: Optional[int] = None
 
 
+class ChatStreamEvent(BaseModel):
+    event: str  # session | delta | done | error
+    data: dict
+
+    def to_sse(self) -> str:
+        return f"event: {self.event}\ndata: {json.dumps(self.data, ensure_ascii=False)}\n\n"
+
+
 class ImageRequest(BaseModel):
     prompt: str
     model: Optional[str] = None  # allow override image model
@@ -35,6 +46,17 @@ class ImageResponse(BaseModel):
     session_id: Optional[int] = None
 
 
+class ImageJobRead(BaseModel):
+    job_id: str
+    status: str  # queued | running | succeeded | failed
+    progress: int = 0
+    images: Optional[List[str]] = None
+    session_id: Optional[int] = None
+    error: Optional[dict | str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
 class ChatSessionCreate(BaseModel):
     title: Optional[str] = None
     mode: str = "chat"
@@ -60,3 +82,22 @@ class ChatMessageRead(BaseModel):
     created_at: Optional[datetime]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class SearchHit(BaseModel):
+    kind: str  # message | session
+    session_id: int
+    session_title: Optional[str]
+    message_id: Optional[int] = None
+    role: Optional[str] = None
+    highlight: str  # HTML 转义后的片段，命中词包在 <mark> 中
+    created_at: Optional[datetime]
+
+
+class SearchResponse(BaseModel):
+    items: List[SearchHit]
+    next_offset: Optional[int] = None
+
+
+ChatSessionPage = CursorPage[ChatSessionRead]
+ChatMessagePage = CursorPage[ChatMessageRead]
@@ -0,0 +1,179 @@
+import html
+import re
+
+from fastapi import HTTPException, status
+from sqlalchemy import DateTime, Float, Integer, String, Text, literal, select, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.modules.spaces.models import ChatMessage, ChatSession
+
+# 高亮用私有区字符作标记，先整体 HTML 转义再替换为 <mark>，避免把用户内容当 HTML
+_MARK_OPEN = "\ue000"
+_MARK_CLOSE = "\ue001"
+SNIPPET_CHARS = 80
+# trigram 分词至少需要 3 个字符；MySQL ngram 默认 2 个。更短的词（如两个汉字）退回到 LIKE 扫描
+MIN_QUERY_CHARS = {"sqlite": 3, "mysql": 2}
+
+_RESULT_COLUMNS = {
+    "session_id": Integer,
+    "session_title": String,
+    "message_id": Integer,
+    "role": String,
+    "snippet": Text,
+    "created_at": DateTime,
+    "score": Float,
+}
+
+# 两张 FTS 表的 bm25 不在同一量纲：各自排名后按名次交错合并，同名次消息在前
+_SQLITE_SEARCH = f"""
+SELECT *, ROW_NUMBER() OVER (PARTITION BY kind ORDER BY score) AS source_rank FROM (
+    SELECT 0 AS kind, m.session_id AS session_id, s.title AS session_title, m.id AS message_id,
+           m.role AS role,
+           snippet(chat_messages_fts, 0, '{_MARK_OPEN}', '{_MARK_CLOSE}', '…', 48) AS snippet,
+           m.created_at AS created_at, bm25(chat_messages_fts) AS score
+    FROM chat_messages_fts
+    JOIN chat_messages m ON m.id = chat_messages_fts.rowid
+    JOIN chat_sessions s ON s.id = m.session_id
+    WHERE chat_messages_fts MATCH :match AND s.user_id = :user_id AND m.message_type = 'text'
+    UNION ALL
+    SELECT 1, s.id, s.title, NULL, NULL,
+           highlight(chat_sessions_fts, 0, '{_MARK_OPEN}', '{_MARK_CLOSE}'),
+           s.created_at, bm25(chat_sessions_fts)
+    FROM chat_sessions_fts
+    JOIN chat_sessions s ON s.id = chat_sessions_fts.rowid
+    WHERE chat_sessions_fts MATCH :match AND s.user_id = :user_id
+)
+ORDER BY source_rank, kind, score
+LIMIT :limit OFFSET :offset
+"""
+
+_MYSQL_SEARCH = """
+SELECT *, ROW_NUMBER() OVER (PARTITION BY kind ORDER BY score DESC) AS source_rank FROM (
+    SELECT 0 AS kind, m.session_id AS session_id, s.title AS session_title, m.id AS message_id,
+           m.role AS role, m.content AS snippet, m.created_at AS created_at,
+           MATCH (m.content) AGAINST (:match IN NATURAL LANGUAGE MODE) AS score
+    FROM chat_messages m
+    JOIN chat_sessions s ON s.id = m.session_id
+    WHERE MATCH (m.content) AGAINST (:match IN NATURAL LANGUAGE MODE)
+      AND s.user_id = :user_id AND m.message_type = 'text'
+    UNION ALL
+    SELECT 1, s.id, s.title, NULL, NULL, s.title, s.created_at,
+           MATCH (s.title) AGAINST (:match IN NATURAL LANGUAGE MODE)
+    FROM chat_sessions s
+    WHERE MATCH (s.title) AGAINST (:match IN NATURAL LANGUAGE MODE) AND s.user_id = :user_id
+) hits
+ORDER BY source_rank, kind, score DESC
+LIMIT :limit OFFSET :offset
+"""
+
+
+def _terms(query: str) -> list[str]:
+    return [term for term in query.split() if term]
+
+
+def _fts5_match(terms: list[str]) -> str:
+    # 每个词作为短语加引号，屏蔽 FTS5 查询语法（AND/OR/NEAR/*）
+    return " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+
+
+def _mark_terms(content: str, terms: list[str]) -> str:
+    """Wrap term occurrences in markers and cut a window around the first hit (MySQL path)."""
+    pattern = re.compile("|".join(re.escape(term) for term in terms), re.IGNORECASE)
+    first = pattern.search(content)
+    start = max(0, first.start() - SNIPPET_CHARS // 2) if first else 0
+    window = content[start : start + SNIPPET_CHARS]
+    marked = pattern.sub(lambda m: f"{_MARK_OPEN}{m.group(0)}{_MARK_CLOSE}", window)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if start + SNIPPET_CHARS < len(content) else ""
+    return f"{prefix}{marked}{suffix}"
+
+
+def _scan_statement(user_id: int, terms: list[str]):
+    """Substring scan over the user's text messages and session titles, newest first.
+
+    Used for terms too short for the full-text index; every term must occur. The scan is
+    bounded to the user's own sessions, so it stays cheap for a single account's history.
+    """
+    messages = (
+        select(
+            ChatMessage.session_id.label("session_id"),
+            ChatSession.title.label("session_title"),
+            ChatMessage.id.label("message_id"),
+            ChatMessage.role.label("role"),
+            ChatMessage.content.label("snippet"),
+            ChatMessage.created_at.label("created_at"),
+        )
+        .join(ChatSession, ChatSession.id == ChatMessage.session_id)
+        .where(ChatSession.user_id == user_id, ChatMessage.message_type == "text")
+        .where(*[ChatMessage.content.contains(term, autoescape=True) for term in terms])
+    )
+    sessions = select(
+        ChatSession.id,
+        ChatSession.title,
+        literal(None, Integer),
+        literal(None, String),
+        ChatSession.title,
+        ChatSession.created_at,
+    ).where(
+        ChatSession.user_id == user_id,
+        *[ChatSession.title.contains(term, autoescape=True) for term in terms],
+    )
+    hits = union_all(messages, sessions).subquery()
+    return select(hits).order_by(
+        hits.c.created_at.desc(), hits.c.session_id.desc(), hits.c.message_id.desc()
+    )
+
+
+def _to_html(marked: str) -> str:
+    return html.escape(marked).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+async def search_history(
+    db: AsyncSession, user_id: int, query: str, limit: int, offset: int
+) -> dict:
+    """Ranked full-text search over the user's chat messages and session titles.
+
+    Messages and titles are ranked separately and interleaved; queries with terms below
+    the index's minimum length fall back to a substring scan ordered by recency.
+    """
+    dialect = db.bind.dialect.name
+    if dialect not in MIN_QUERY_CHARS:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=f"Full-text search is not available on {dialect}",
+        )
+    terms = _terms(query)
+    if not terms:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Search query is empty")
+
+    scan = any(len(term) < MIN_QUERY_CHARS[dialect] for term in terms)
+    if scan:
+        stmt = _scan_statement(user_id, terms).limit(limit + 1).offset(offset)
+        rows = (await db.execute(stmt)).mappings().all()
+    else:
+        if dialect == "sqlite":
+            sql, match = _SQLITE_SEARCH, _fts5_match(terms)
+        else:
+            sql, match = _MYSQL_SEARCH, " ".join(terms)
+        stmt = text(sql).columns(**_RESULT_COLUMNS)
+        params = {"match": match, "user_id": user_id, "limit": limit + 1, "offset": offset}
+        rows = (await db.execute(stmt, params)).mappings().all()
+
+    items = []
+    for row in rows[:limit]:
+        marked = row["snippet"] or ""
+        if scan or dialect == "mysql":
+            marked = _mark_terms(marked, terms)
+        items.append(
+            {
+                "session_id": row["session_id"],
+                "session_title": row["session_title"],
+                "message_id": row["message_id"],
+                "role": row["role"],
+                "kind": "message" if row["message_id"] is not None else "session",
+                "highlight": _to_html(marked),
+                "created_at": row["created_at"],
+            }
+        )
+    next_offset = offset + limit if len(rows) > limit else None
+    return {"items": items, "next_offset": next_offset}
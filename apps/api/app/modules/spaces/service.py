@@ -1,46 +1,75 @@
+import asyncio
+import hashlib
+import json
+import unicodedata
+from contextlib import asynccontextmanager
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
 import httpx
 from fastapi import HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import metrics
+from app.core.cache import create_cache_backend
 from app.core.config import get_settings
-from app.core.logging import logger
+from app.core.http_client import get_http_client
+from app.core.logging import log_upstream, logger, truncate
+from app.core.pagination import KeysetPaginator
+from app.core.upstream import get_upstream_guard
 from app.modules.auth import service as auth_service
 from app.modules.spaces import schemas
+from app.modules.spaces.history import build_chat_history
+from app.modules.spaces.mirror import image_mirror
 from app.modules.spaces.models import ChatSession, ChatMessage
 
 settings = get_settings()
 
+T = TypeVar("T")
+
 
-def _get_qwen_api_key(db: Session) -> str:
-    api_key = auth_service.get_api_key(db, provider="qwen")
+async def _get_qwen_api_key(db: AsyncSession) -> str:
+    api_key = await db.run_sync(auth_service.get_api_key_value, provider="qwen")
     if api_key:
-        return api_key.key
+        return api_key
     if settings.qwen_api_key:
         return settings.qwen_api_key
     raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Qwen API key not configured")
 
 
-async def chat_with_qwen(db: Session, payload: schemas.ChatRequest) -> str:
-    api_key = _get_qwen_api_key(db)
-    url = f"{settings.qwen_base_url}/services/aigc/text-generation/generation"
-    messages = payload.history or []
-    messages.append({"role": "user", "content": payload.prompt})
-    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+def _build_chat_body(payload: schemas.ChatRequest, stream: bool = False) -> dict:
+    messages = [*(payload.history or []), {"role": "user", "content": payload.prompt}]
     model = payload.model or settings.qwen_model
     body = {"model": model, "input": {"messages": messages}}
+    if stream:
+        # 增量输出：每个 SSE 事件只包含新生成的片段
+        body["parameters"] = {"incremental_output": True, "result_format": "message"}
+    return body
+
+
+def _extract_chat_text(data: dict) -> str:
+    # dashscope 文本模型可能返回 output.text 或 output.choices[*].message.content
+    if "text" in data.get("output", {}):
+        return data["output"]["text"]
+    return data["output"]["choices"][0]["message"]["content"]
+
+
+async def chat_with_qwen(db: AsyncSession, payload: schemas.ChatRequest) -> str:
+    api_key = await _get_qwen_api_key(db)
+    url = f"{settings.qwen_base_url}/services/aigc/text-generation/generation"
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    body = _build_chat_body(payload)
 
-    async with httpx.AsyncClient(timeout=30) as client:
-        resp = await client.post(url, headers=headers, json=body)
-    logger.info(f"Qwen chat resp status={resp.status_code}")
-    logger.info(f"Qwen chat resp body={resp.text}")
+    resp = await get_upstream_guard("qwen").request(
+        lambda: get_http_client().post(url, headers=headers, json=body, timeout=30)
+    )
+    log_upstream("qwen", "chat", resp)
     if resp.status_code != 200:
         raise HTTPException(status_code=resp.status_code, detail={"error": "qwen_error", "body": resp.text})
     data = resp.json()
     try:
-        # dashscope 文本模型可能返回 output.text 或 output.choices[*].message.content
-        if "text" in data.get("output", {}):
-            return data["output"]["text"]
-        return data["output"]["choices"][0]["message"]["content"]
+        return _extract_chat_text(data)
     except (KeyError, IndexError, TypeError):
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -48,23 +77,131 @@ async def chat_with_qwen(db: Session, payload: schemas.ChatRequest) -> str:
         )
 
 
-async def generate_image(db: Session, payload: schemas.ImageRequest) -> list[str]:
-    api_key = _get_qwen_api_key(db)
+@asynccontextmanager
+async def stream_chat_with_qwen(
+    db: AsyncSession, payload: schemas.ChatRequest
+) -> AsyncIterator[AsyncIterator[str]]:
+    """Open an incremental DashScope completion and yield an iterator of text deltas.
+
+    The upstream status is checked before the iterator is handed out, so errors surface
+    as regular HTTP errors instead of a half-written event stream.
+    """
+    api_key = await _get_qwen_api_key(db)
+    url = f"{settings.qwen_base_url}/services/aigc/text-generation/generation"
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream",
+        "X-DashScope-SSE": "enable",
+    }
+    body = _build_chat_body(payload, stream=True)
+
+    open_stream = partial(
+        get_http_client().stream, "POST", url, headers=headers, json=body, timeout=60
+    )
+    async with get_upstream_guard("qwen").stream(open_stream) as resp:
+        if resp.status_code != 200:
+            text = (await resp.aread()).decode("utf-8", errors="replace")
+            log_upstream("qwen", "chat_stream", resp)
+            raise HTTPException(
+                status_code=resp.status_code, detail={"error": "qwen_error", "body": text}
+            )
+
+        async def deltas() -> AsyncIterator[str]:
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                try:
+                    chunk = _extract_chat_text(json.loads(line[5:]))
+                except (ValueError, KeyError, IndexError, TypeError):
+                    logger.warning("Qwen chat stream skipped chunk={}", truncate(line, 200))
+                    continue
+                if chunk:
+                    yield chunk
+
+        yield deltas()
+
+
+# Qwen image only accepts specific sizes; fallback if input不合法
+ALLOWED_IMAGE_SIZES = {
+    "1664*928",
+    "1472*1140",
+    "1328*1328",
+    "1140*1472",
+    "928*1664",
+}
+DEFAULT_IMAGE_SIZE = "1328*1328"
+
+image_cache = create_cache_backend(
+    settings.image_cache_backend,
+    namespace="image",
+    maxsize=settings.image_cache_max_entries,
+    ttl=settings.image_cache_ttl_seconds,
+    redis_url=settings.redis_url,
+)
+
+
+def _normalize_image_size(size: str | None) -> str:
+    return size if size in ALLOWED_IMAGE_SIZES else DEFAULT_IMAGE_SIZE
+
+
+def _image_cache_key(payload: schemas.ImageRequest) -> str:
+    prompt = " ".join(unicodedata.normalize("NFKC", payload.prompt).split())
+    model = payload.model or settings.qwen_image_model
+    raw = json.dumps([model, _normalize_image_size(payload.size), prompt], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key onto one in-flight task.
+
+    Every caller awaits the shared task through ``asyncio.shield`` so one caller going away
+    does not cancel the others; the task itself is cancelled once its last waiter leaves.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[str, tuple[asyncio.Task, list[int]]] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None or call[0].cancelled():
+            task = asyncio.ensure_future(fn())
+            call = (task, [0])
+            self._calls[key] = call
+            task.add_done_callback(lambda _, call=call: self._forget(key, call))
+        else:
+            metrics.incr(f"singleflight.{self.name}.shared")
+        task, waiters = call
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        finally:
+            waiters[0] -= 1
+            if waiters[0] == 0 and not task.done():
+                # 先摘除再取消：之后到达的调用者会发起新任务，而不是等一个已取消的任务
+                self._forget(key, call)
+                task.cancel()
+
+    def _forget(self, key: str, call: tuple) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+_image_flights = SingleFlight("image")
+
+
+async def generate_image(db: AsyncSession, payload: schemas.ImageRequest) -> list[str]:
+    api_key = await _get_qwen_api_key(db)
+    return await _request_image(api_key, payload)
+
+
+async def _request_image(api_key: str, payload: schemas.ImageRequest) -> list[str]:
     # Sync multimodal generation (recommended in dashscope docs)
     url = f"{settings.qwen_base_url}/services/aigc/multimodal-generation/generation"
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
     model = payload.model or settings.qwen_image_model
-    # Qwen image only accepts specific sizes; fallback if input不合法
-    allowed_sizes = {
-        "1664*928",
-        "1472*1140",
-        "1328*1328",
-        "1140*1472",
-        "928*1664",
-    }
-    size = payload.size or "1328*1328"
-    if size not in allowed_sizes:
-        size = "1328*1328"
+    size = _normalize_image_size(payload.size)
     body = {
         "model": model,
         "input": {
@@ -84,10 +221,10 @@ async def generate_image(db: Session, payload: schemas.ImageRequest) -> list[str
         },
     }
 
-    async with httpx.AsyncClient(timeout=60) as client:
-        resp = await client.post(url, headers=headers, json=body)
-    logger.info(f"Qwen image resp status={resp.status_code}")
-    logger.info(f"Qwen image resp body={resp.text}")
+    resp = await get_upstream_guard("qwen").request(
+        lambda: get_http_client().post(url, headers=headers, json=body, timeout=60)
+    )
+    log_upstream("qwen", "image", resp)
     if resp.status_code != 200:
         raise HTTPException(status_code=resp.status_code, detail={"error": "qwen_error", "body": resp.text})
     data = resp.json()
@@ -109,73 +246,112 @@ async def generate_image(db: Session, payload: schemas.ImageRequest) -> list[str
         )
 
 
-def _ensure_session(db: Session, user_id: int, session_id: int | None, mode: str, model: str | None, title: str | None = None) -> ChatSession:
+async def _generate_and_cache(
+    api_key: str, payload: schemas.ImageRequest, cache_key: str
+) -> list[str]:
+    urls = await _request_image(api_key, payload)
+    if image_cache:
+        await image_cache.set(cache_key, urls)
+    return urls
+
+
+async def _get_own_session(db: AsyncSession, user_id: int, session_id: int) -> ChatSession:
+    session = await db.scalar(
+        select(ChatSession).where(ChatSession.id == session_id, ChatSession.user_id == user_id)
+    )
+    if not session:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    return session
+
+
+async def _ensure_session(
+    db: AsyncSession,
+    user_id: int,
+    session_id: int | None,
+    mode: str,
+    model: str | None,
+    title: str | None = None,
+) -> ChatSession:
     if session_id:
-        session = db.query(ChatSession).filter(ChatSession.id == session_id, ChatSession.user_id == user_id).first()
-        if not session:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-        return session
+        return await _get_own_session(db, user_id, session_id)
     session = ChatSession(user_id=user_id, mode=mode, model=model, title=title)
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return session
 
 
-def list_sessions(db: Session, user_id: int):
-    return (
-        db.query(ChatSession)
-        .filter(ChatSession.user_id == user_id)
-        .order_by(ChatSession.is_pinned.desc(), ChatSession.created_at.desc())
-        .all()
-    )
+SESSION_ORDER = [
+    (ChatSession.is_pinned, True),
+    (ChatSession.created_at, True),
+    (ChatSession.id, True),
+]
+MESSAGE_ORDER = [(ChatMessage.created_at, False), (ChatMessage.id, False)]
 
 
-def list_messages(db: Session, user_id: int, session_id: int):
-    session = (
-        db.query(ChatSession)
-        .filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
-        .first()
-    )
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-    return (
-        db.query(ChatMessage)
-        .filter(ChatMessage.session_id == session.id)
-        .order_by(ChatMessage.created_at.asc())
-        .all()
-    )
+async def list_sessions(
+    db: AsyncSession, user_id: int, limit: int, before: str | None = None, after: str | None = None
+) -> dict:
+    paginator = KeysetPaginator(SESSION_ORDER, limit=limit, before=before, after=after)
+    stmt = select(ChatSession).where(ChatSession.user_id == user_id)
+    result = await db.scalars(paginator.apply(stmt))
+    return paginator.page(result.all())
 
 
-def set_session_pin(db: Session, user_id: int, session_id: int, is_pinned: bool) -> ChatSession:
-    session = (
-        db.query(ChatSession)
-        .filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
-        .first()
+async def list_messages(
+    db: AsyncSession,
+    user_id: int,
+    session_id: int,
+    limit: int,
+    before: str | None = None,
+    after: str | None = None,
+) -> dict:
+    """Chronological messages; without a cursor the newest ``limit`` messages are returned."""
+    session = await _get_own_session(db, user_id, session_id)
+    paginator = KeysetPaginator(
+        MESSAGE_ORDER, limit=limit, before=before, after=after, from_end=True
     )
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
+    stmt = select(ChatMessage).where(ChatMessage.session_id == session.id)
+    result = await db.scalars(paginator.apply(stmt))
+    return paginator.page(result.all())
+
+
+async def set_session_pin(
+    db: AsyncSession, user_id: int, session_id: int, is_pinned: bool
+) -> ChatSession:
+    session = await _get_own_session(db, user_id, session_id)
     session.is_pinned = 1 if is_pinned else 0
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return session
 
 
-def delete_session(db: Session, user_id: int, session_id: int) -> None:
-    session = (
-        db.query(ChatSession)
-        .filter(ChatSession.id == session_id, ChatSession.user_id == user_id)
-        .first()
+async def delete_session(db: AsyncSession, user_id: int, session_id: int) -> None:
+    session = await _get_own_session(db, user_id, session_id)
+    await db.delete(session)
+    await db.commit()
+
+
+async def _record_cancellation(db: AsyncSession, session_id: int, kind: str) -> None:
+    """Store a ``cancelled`` marker instead of the assistant reply when the client went away."""
+    metrics.incr(f"upstream.qwen.cancelled.{kind}")
+    logger.info("Qwen {} cancelled by client disconnect session_id={}", kind, session_id)
+    db.add(
+        ChatMessage(
+            session_id=session_id,
+            role="assistant",
+            content="（请求已取消）",
+            message_type="cancelled",
+        )
     )
-    if not session:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Session not found")
-    db.delete(session)
-    db.commit()
+    await db.commit()
 
 
-async def chat_and_store(db: Session, user_id: int, payload: schemas.ChatRequest) -> tuple[str, int]:
-    session = _ensure_session(
+async def chat_and_store(
+    db: AsyncSession, user_id: int, payload: schemas.ChatRequest
+) -> tuple[str, int]:
+    session = await _ensure_session(
         db,
         user_id=user_id,
         session_id=payload.session_id,
@@ -183,29 +359,74 @@ async def chat_and_store(db: Session, user_id: int, payload: schemas.ChatRequest
         model=payload.model or settings.qwen_model,
         title=payload.prompt[:60],
     )
-    # store user message
+    # history is built before the prompt is stored; chat_with_qwen appends the prompt itself
+    payload.history = await build_chat_history(db, session)
+    # store user message (also persists any summary update)
     user_msg = ChatMessage(session_id=session.id, role="user", content=payload.prompt, message_type="text")
     db.add(user_msg)
-    db.commit()
-
-    # build history from DB
-    history_rows = (
-        db.query(ChatMessage)
-        .filter(ChatMessage.session_id == session.id)
-        .order_by(ChatMessage.created_at.asc())
-        .all()
-    )
-    history = [{"role": row.role, "content": row.content} for row in history_rows if row.message_type == "text"]
-    payload.history = history
-    reply = await chat_with_qwen(db, payload)
+    await db.commit()
+    try:
+        reply = await chat_with_qwen(db, payload)
+    except asyncio.CancelledError:
+        await _record_cancellation(db, session.id, kind="chat")
+        raise
     assistant_msg = ChatMessage(session_id=session.id, role="assistant", content=reply, message_type="text")
     db.add(assistant_msg)
-    db.commit()
+    await db.commit()
     return reply, session.id
 
 
-async def image_and_store(db: Session, user_id: int, payload: schemas.ImageRequest) -> tuple[list[str], int]:
-    session = _ensure_session(
+async def chat_stream_and_store(
+    db: AsyncSession, user_id: int, payload: schemas.ChatRequest
+) -> AsyncIterator[schemas.ChatStreamEvent]:
+    """Relay DashScope deltas as events and persist the assembled reply once the stream ends."""
+    session = await _ensure_session(
+        db,
+        user_id=user_id,
+        session_id=payload.session_id,
+        mode="chat",
+        model=payload.model or settings.qwen_model,
+        title=payload.prompt[:60],
+    )
+    payload.history = await build_chat_history(db, session)
+    user_msg = ChatMessage(session_id=session.id, role="user", content=payload.prompt, message_type="text")
+    db.add(user_msg)
+    await db.commit()
+    async with stream_chat_with_qwen(db, payload) as deltas:
+        yield schemas.ChatStreamEvent(event="session", data={"session_id": session.id})
+        parts: list[str] = []
+        try:
+            async for chunk in deltas:
+                parts.append(chunk)
+                yield schemas.ChatStreamEvent(event="delta", data={"content": chunk})
+        except httpx.HTTPError as exc:
+            logger.warning("Qwen chat stream interrupted session_id={} error={!r}", session.id, exc)
+            # 已输出给用户的部分回复照常保存，刷新后不会丢失
+            if parts:
+                partial_reply = ChatMessage(
+                    session_id=session.id,
+                    role="assistant",
+                    content="".join(parts),
+                    message_type="text",
+                )
+                db.add(partial_reply)
+                await db.commit()
+            yield schemas.ChatStreamEvent(event="error", data={"error": "qwen_stream_interrupted"})
+            return
+
+    reply = "".join(parts)
+    assistant_msg = ChatMessage(session_id=session.id, role="assistant", content=reply, message_type="text")
+    db.add(assistant_msg)
+    await db.commit()
+    yield schemas.ChatStreamEvent(
+        event="done", data={"session_id": session.id, "message_id": assistant_msg.id}
+    )
+
+
+async def image_and_store(
+    db: AsyncSession, user_id: int, payload: schemas.ImageRequest
+) -> tuple[list[str], int]:
+    session = await _ensure_session(
         db,
         user_id=user_id,
         session_id=payload.session_id,
@@ -215,12 +436,26 @@ async def image_and_store(db: Session, user_id: int, payload: schemas.ImageReque
     )
     user_msg = ChatMessage(session_id=session.id, role="user", content=payload.prompt, message_type="text")
     db.add(user_msg)
-    db.commit()
+    await db.commit()
 
-    urls = await generate_image(db, payload)
+    cache_key = _image_cache_key(payload)
+    urls = await image_cache.get(cache_key) if image_cache else None
+    if urls:
+        logger.info("Qwen image cache hit session_id={}", session.id)
+    else:
+        # 相同 (model, size, prompt) 的并发请求共享一次上游调用，各自仍写入自己的消息
+        api_key = await _get_qwen_api_key(db)
+        try:
+            generate = partial(_generate_and_cache, api_key, payload, cache_key)
+            urls = list(await _image_flights.do(cache_key, generate))
+        except asyncio.CancelledError:
+            await _record_cancellation(db, session.id, kind="image")
+            raise
     assistant_msg = ChatMessage(
         session_id=session.id, role="assistant", content="\n".join(urls), message_type="image"
     )
     db.add(assistant_msg)
-    db.commit()
+    await db.commit()
+    # 上游链接有时效：后台下载到本地内容寻址存储，完成后改写这条消息
+    image_mirror.enqueue(assistant_msg.id, urls)
     return urls, session.id
@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool, StaticPool
+
+from app.core import deps
+from app.db import session as db_session
+from app.db.base import Base, import_models
+from app.main import app
+from app.modules.auth.principal import Principal
+from app.modules.auth.spaces import ALL_SPACES_MASK
+
+
+@pytest.fixture()
+def db_engine():
+    """In-memory SQLite with every table on one shared connection, so sessions see the same data."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    import_models()
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture()
+def db(db_engine):
+    session = sessionmaker(bind=db_engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture()
+def sql_statements(db_engine) -> list[str]:
+    """SQL text of every statement executed on ``db_engine`` from now on."""
+    statements: list[str] = []
+    event.listen(db_engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    return statements
+
+
+@pytest.fixture()
+def async_session_factory(tmp_path):
+    """Async sessions on a temp SQLite file with every table.
+
+    ``NullPool`` keeps no connection between ``asyncio.run`` calls, so one test can use the
+    factory from several event loops.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}", poolclass=NullPool)
+
+    async def create_tables():
+        import_models()
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield async_sessionmaker(engine, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture()
+def api_user(async_session_factory, monkeypatch):
+    """Call ``app`` as an active user with every space; ``get_async_db`` uses the test factory."""
+    user = Principal(
+        id=1,
+        email="u@example.com",
+        is_active=True,
+        is_admin=False,
+        role="user",
+        space_mask=ALL_SPACES_MASK,
+    )
+    monkeypatch.setattr(db_session, "AsyncSessionLocal", async_session_factory)
+    app.dependency_overrides[deps.get_current_active_user] = lambda: user
+    yield user
+    app.dependency_overrides.pop(deps.get_current_active_user, None)
@@ -0,0 +1,33 @@
+import pytest
+
+from app.modules.auth import service
+
+
+@pytest.fixture(autouse=True)
+def api_key_cache():
+    service.invalidate_api_key_cache()
+    yield
+    service.invalidate_api_key_cache()
+
+
+def _api_key_selects(statements) -> int:
+    return sum(
+        1 for sql in statements if sql.lstrip().upper().startswith("SELECT") and "api_keys" in sql
+    )
+
+
+def test_api_key_value_is_cached_including_missing_keys(db, sql_statements):
+    assert service.get_api_key_value(db, "qwen") is None
+    assert service.get_api_key_value(db, "qwen") is None
+    assert _api_key_selects(sql_statements) == 1
+
+
+def test_set_api_key_invalidates_cached_value(db):
+    service.set_api_key(db, "qwen", "old-key")
+    assert service.get_api_key_value(db, "qwen") == "old-key"
+    assert service.get_api_key_value(db, "qwen") == "old-key"
+
+    service.set_api_key(db, "qwen", "new-key")
+    assert service.get_api_key_value(db, "qwen") == "new-key"
+    # 其他 provider 的缓存不受影响
+    assert service.get_api_key_value(db, "amap") is None
@@ -0,0 +1,66 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.config import get_settings
+from app.db import session as db_session
+from app.main import app
+from app.modules.auth import service as auth_service
+from app.modules.auth.models import ApiKey
+from app.modules.spaces import service
+from app.modules.spaces.models import ChatSession
+
+
+@pytest.mark.parametrize(
+    ("url", "expected"),
+    [
+        ("sqlite:///./app.db", "sqlite+aiosqlite:///./app.db"),
+        ("mysql+pymysql://u:p@db:3306/app?charset=utf8", "mysql+aiomysql://u:p@db:3306/app?charset=utf8"),
+        ("mysql://u:p@db/app", "mysql+aiomysql://u:p@db/app"),
+        ("postgresql+psycopg2://u:p@db/app", "postgresql+asyncpg://u:p@db/app"),
+    ],
+)
+def test_to_async_url_swaps_in_the_async_driver(url, expected):
+    assert db_session.to_async_url(url).render_as_string(hide_password=False) == expected
+
+
+def test_to_async_url_rejects_unknown_backends():
+    with pytest.raises(ValueError):
+        db_session.to_async_url("oracle://u:p@db/app")
+
+
+@pytest.fixture()
+def api_key_cache():
+    auth_service.invalidate_api_key_cache()
+    yield
+    auth_service.invalidate_api_key_cache()
+
+
+def test_async_route_reads_through_get_async_db(api_user, async_session_factory):
+    async def scenario():
+        async with async_session_factory() as db:
+            db.add(ChatSession(user_id=api_user.id, title="async hello", mode="chat"))
+            db.add(ChatSession(user_id=2, title="someone else", mode="chat"))
+            await db.commit()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get(f"{get_settings().api_v1_prefix}/spaces/sessions")
+
+    resp = asyncio.run(scenario())
+    assert resp.status_code == 200
+    assert [item["title"] for item in resp.json()["items"]] == ["async hello"]
+
+
+def test_sync_service_runs_on_the_async_session(api_user, async_session_factory, api_key_cache):
+    async def scenario():
+        async with async_session_factory() as db:
+            db.add(ApiKey(provider="qwen", key="from-db"))
+            await db.commit()
+        sessions = db_session.get_async_db()
+        try:
+            return await service._get_qwen_api_key(await anext(sessions))
+        finally:
+            await sessions.aclose()
+
+    assert asyncio.run(scenario()) == "from-db"
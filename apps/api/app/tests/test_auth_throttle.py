@@ -0,0 +1,104 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+
+from app.core.ratelimit import TokenBucketLimiter
+from app.core.security import PasswordHasher
+from app.modules.auth import router as auth_router
+from app.modules.auth.schemas import UserCreate
+
+
+def test_token_bucket_limits_bursts_per_key():
+    limiter = TokenBucketLimiter(capacity=2, refill_per_second=1)
+    assert limiter.allow("a")
+    assert limiter.allow("a")
+    assert not limiter.allow("a")
+    assert limiter.retry_after("a") == 1
+    assert limiter.allow("b")  # 其他 key 不受影响
+
+
+def test_token_bucket_refills_over_time():
+    limiter = TokenBucketLimiter(capacity=1, refill_per_second=50)
+    assert limiter.allow("a")
+    assert not limiter.allow("a")
+    time.sleep(0.05)
+    assert limiter.allow("a")
+
+
+def test_password_hasher_rejects_when_queue_full():
+    hasher = PasswordHasher(workers=1, queue_size=1)
+
+    async def scenario():
+        slow = [asyncio.create_task(hasher.run(time.sleep, 0.2)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        with pytest.raises(HTTPException) as exc:
+            await hasher.run(time.sleep, 0)
+        assert exc.value.status_code == 429
+        await asyncio.gather(*slow)
+        assert hasher.pending == 0
+        assert await hasher.run(sum, [1, 2]) == 3
+
+    asyncio.run(scenario())
+
+
+def _register_request() -> Request:
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "path": "/register",
+            "headers": [],
+            "client": ("1.2.3.4", 0),
+        }
+    )
+
+
+@pytest.fixture()
+def register(async_session_factory, monkeypatch):
+    """Run register attempts on a fresh database; returns (results, number of bcrypt hashes)."""
+    hashed = []
+
+    async def fake_hash(password: str) -> str:
+        hashed.append(password)
+        return "hashed"
+
+    monkeypatch.setattr(auth_router, "get_password_hash_async", fake_hash)
+
+    async def attempt_all(attempts: list[UserCreate]) -> list:
+        results = []
+        for user_in in attempts:
+            async with async_session_factory() as db:
+                try:
+                    user = await auth_router.register_user(_register_request(), user_in, db=db)
+                    results.append(user.email)
+                except HTTPException as exc:
+                    results.append(exc.status_code)
+        return results
+
+    def run(attempts: list[UserCreate], burst: int = 10):
+        monkeypatch.setattr(auth_router, "login_ip_limiter", TokenBucketLimiter(burst, 0.001))
+        monkeypatch.setattr(auth_router, "login_email_limiter", TokenBucketLimiter(burst, 0.001))
+        return asyncio.run(attempt_all(attempts)), len(hashed)
+
+    return run
+
+
+def test_register_rejects_before_hashing(register):
+    first = UserCreate(email="a@example.com", password="pw", invite_code="")
+    duplicate = UserCreate(email="a@example.com", password="pw", invite_code="")
+    bad_invite = UserCreate(email="b@example.com", password="pw", invite_code="nope")
+    results, hashes = register([first, duplicate, bad_invite])
+    assert results == ["a@example.com", 400, 403]
+    assert hashes == 1
+
+
+def test_register_is_throttled(register):
+    attempts = [
+        UserCreate(email=f"u{i}@example.com", password="pw", invite_code="nope") for i in range(3)
+    ]
+    results, hashes = register(attempts, burst=2)
+    assert results == ["u0@example.com", 403, 429]
+    assert hashes == 1
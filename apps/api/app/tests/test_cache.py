@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import MemoryCacheBackend, TTLCache, create_cache_backend
+
+
+@pytest.fixture()
+def backends(monkeypatch):
+    """Isolate the module-level registry so backends created here are not closed by other tests."""
+    registry: list = []
+    monkeypatch.setattr(cache_module, "_backends", registry)
+    return registry
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # a becomes most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_memory_backend_roundtrip(backends):
+    backend = create_cache_backend("memory", namespace="test", maxsize=4, ttl=60)
+    assert isinstance(backend, MemoryCacheBackend)
+
+    async def scenario():
+        await backend.set("k", ["u1", "u2"])
+        hit = await backend.get("k")
+        await backend.delete("k")
+        return hit, await backend.get("k")
+
+    assert asyncio.run(scenario()) == (["u1", "u2"], None)
+    assert create_cache_backend("none", namespace="test", maxsize=4, ttl=60) is None
+    assert backends == [backend]
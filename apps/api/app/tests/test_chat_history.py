@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+
+from app.modules.spaces import history
+from app.modules.spaces.models import ChatMessage, ChatSession
+
+
+def test_estimate_tokens_counts_cjk_per_char():
+    assert history.estimate_tokens("") == 0
+    assert history.estimate_tokens("你好世界") == 4
+    assert history.estimate_tokens("abcdefgh") == 2
+
+
+@pytest.fixture()
+def run_build(async_session_factory, monkeypatch):
+    """Seed one session with ``message_count`` alternating rows and build its history once."""
+
+    def run(message_count: int, budget: int, window: int):
+        monkeypatch.setattr(history.settings, "chat_history_token_budget", budget)
+        monkeypatch.setattr(history.settings, "chat_history_max_messages", window)
+        return asyncio.run(_build(async_session_factory, message_count))
+
+    return run
+
+
+async def _build(SessionLocal, message_count: int):
+    async with SessionLocal() as db:
+        session = ChatSession(user_id=1, mode="chat")
+        db.add(session)
+        await db.flush()
+        for i in range(message_count):
+            role = "user" if i % 2 == 0 else "assistant"
+            db.add(
+                ChatMessage(
+                    session_id=session.id, role=role, content=f"message {i:03d} " + "x" * 36
+                )
+            )
+        await db.commit()
+        result = await history.build_chat_history(db, session)
+        await db.commit()
+    return result, session.summary, session.summary_upto_id
+
+
+def test_short_history_is_sent_verbatim(run_build):
+    result, summary, upto = run_build(message_count=4, budget=1000, window=10)
+    assert [m["content"][:11] for m in result] == [f"message {i:03d}" for i in range(4)]
+    assert summary is None
+    assert upto == 0
+
+
+def test_history_over_budget_is_folded_into_summary(run_build):
+    # 每条约 16 token，预算只够最近 3 条
+    result, summary, upto = run_build(message_count=8, budget=50, window=10)
+    assert result[0]["role"] == "system"
+    assert [m["content"][:11] for m in result[1:]] == ["message 005", "message 006", "message 007"]
+    assert "message 004" in summary and "message 000" in summary
+    assert upto == 5
+
+
+def test_long_session_backlog_is_summarized_before_the_cutoff_moves(run_build, monkeypatch):
+    # 旧的长会话首次处理：读取上限之外的更早消息也要进入摘要，且分页读取
+    monkeypatch.setattr(history, "BACKLOG_PAGE_SIZE", 5)
+    result, summary, upto = run_build(message_count=30, budget=1000, window=4)
+    assert [m["content"][:11] for m in result[1:]] == [f"message {i:03d}" for i in range(26, 30)]
+    lines = summary.splitlines()
+    assert len(lines) == 26
+    assert lines[0].startswith("用户: message 000") and lines[-1].startswith("助手: message 025")
+    assert upto == 26
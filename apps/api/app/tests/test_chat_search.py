@@ -0,0 +1,181 @@
+import asyncio
+import importlib.util
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.modules.spaces.models import ChatMessage, ChatSession
+from app.modules.spaces.search import search_history
+
+MIGRATION = (
+    Path(__file__).resolve().parents[2]
+    / "alembic"
+    / "versions"
+    / "0011_add_chat_fulltext_search.py"
+)
+
+
+def _fts_statements() -> list[str]:
+    spec = importlib.util.spec_from_file_location("fts_migration", MIGRATION)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.SQLITE_UPGRADE
+
+
+@pytest.fixture()
+def search_db(async_session_factory):
+    """Run ``scenario(db)`` against SQLite with the FTS tables and triggers from migration 0011."""
+
+    async def create_fts():
+        async with async_session_factory() as db:
+            for statement in _fts_statements():
+                await db.execute(text(statement))
+            await db.commit()
+
+    async def main(scenario):
+        async with async_session_factory() as db:
+            return await scenario(db)
+
+    asyncio.run(create_fts())
+    return lambda scenario: asyncio.run(main(scenario))
+
+
+async def _seed(db, user_id: int, title: str, *contents: str) -> ChatSession:
+    session = ChatSession(user_id=user_id, title=title, mode="chat")
+    db.add(session)
+    await db.flush()
+    for content in contents:
+        db.add(
+            ChatMessage(session_id=session.id, role="user", content=content, message_type="text")
+        )
+    await db.commit()
+    return session
+
+
+def test_results_are_ranked_and_scoped_to_the_user(search_db):
+    async def scenario(db):
+        await _seed(db, 1, "周末计划", "去海边 travel once", "travel travel travel 攻略 travel")
+        await _seed(db, 1, "travel notes")
+        await _seed(db, 2, "别人的", "travel travel travel travel")
+        db.add(
+            ChatMessage(
+                session_id=1, role="assistant", content="travel image", message_type="image"
+            )
+        )
+        await db.commit()
+        return await search_history(db, user_id=1, query="travel", limit=10, offset=0)
+
+    page = search_db(scenario)
+    kinds = [(item["kind"], item["highlight"]) for item in page["items"]]
+    assert len(kinds) == 3  # 其他用户和图片消息不计入
+    # bm25：命中次数多的消息排在只出现一次的前面
+    messages = [h for kind, h in kinds if kind == "message"]
+    assert messages[0].count("<mark>") > messages[1].count("<mark>")
+    assert ("session", "<mark>travel</mark> notes") in kinds
+
+
+def test_highlight_escapes_user_text_around_marks(search_db):
+    async def scenario(db):
+        await _seed(db, 1, "t", '<script>alert("hello")</script> & hello')
+        hits = await search_history(db, user_id=1, query="hello", limit=10, offset=0)
+        # 引号和 FTS5 语法字符按字面匹配，不会报语法错误
+        odd = await search_history(db, user_id=1, query='"hello" NEAR(x', limit=10, offset=0)
+        return hits, odd
+
+    hits, odd = search_db(scenario)
+    highlight = hits["items"][0]["highlight"]
+    assert "<script>" not in highlight
+    assert highlight == (
+        "&lt;script&gt;alert(&quot;<mark>hello</mark>&quot;)&lt;/script&gt;"
+        " &amp; <mark>hello</mark>"
+    )
+    assert odd["items"] == []
+
+
+def test_pagination_walks_every_hit_once(search_db):
+    async def scenario(db):
+        await _seed(db, 1, "s", *[f"kiwi number {i}" for i in range(5)])
+        pages, offset = [], 0
+        while offset is not None:
+            page = await search_history(db, user_id=1, query="kiwi", limit=2, offset=offset)
+            pages.append(page)
+            offset = page["next_offset"]
+        return pages
+
+    pages = search_db(scenario)
+    assert [len(p["items"]) for p in pages] == [2, 2, 1]
+    assert [p["next_offset"] for p in pages] == [2, 4, None]
+    ids = [item["message_id"] for p in pages for item in p["items"]]
+    assert sorted(ids) == [1, 2, 3, 4, 5]
+
+
+def test_triggers_keep_fts_in_sync_on_update_and_delete(search_db):
+    async def scenario(db):
+        session = await _seed(db, 1, "old title", "banana bread", "mango lassi")
+
+        async def hits(query):
+            page = await search_history(db, user_id=1, query=query, limit=10, offset=0)
+            return [(item["kind"], item["message_id"]) for item in page["items"]]
+
+        message = await db.get(ChatMessage, 1)
+        message.content = "apple pie"
+        session.title = "new heading"
+        await db.commit()
+        after_update = (
+            await hits("banana"),
+            await hits("apple"),
+            await hits("old"),
+            await hits("heading"),
+        )
+
+        await db.delete(await db.get(ChatMessage, 2))
+        await db.commit()
+        after_delete = await hits("mango")
+        return after_update, after_delete
+
+    (banana, apple, old, heading), mango = search_db(scenario)
+    assert banana == [] and apple == [("message", 1)]
+    assert old == [] and heading == [("session", None)]
+    assert mango == []
+
+
+def test_titles_and_messages_are_ranked_separately_and_interleaved(search_db):
+    async def scenario(db):
+        await _seed(db, 1, "plain", *[f"mango {'x' * 40 * i}" for i in range(3)])
+        await _seed(db, 1, "mango mango")
+        await _seed(db, 1, "mango and a much longer session title")
+        page = await search_history(db, user_id=1, query="mango", limit=10, offset=0)
+        return [(item["kind"], item["message_id"], item["session_title"]) for item in page["items"]]
+
+    hits = search_db(scenario)
+    # 消息、标题各自按 bm25 排名后交错：消息 #1、标题 #1、消息 #2、标题 #2、消息 #3
+    assert [kind for kind, _, _ in hits] == ["message", "session", "message", "session", "message"]
+    assert [message_id for kind, message_id, _ in hits if kind == "message"] == [1, 2, 3]
+    assert [title for kind, _, title in hits if kind == "session"][0] == "mango mango"
+
+
+def test_short_terms_fall_back_to_a_scoped_scan(search_db):
+    async def scenario(db):
+        await _seed(db, 1, "周末计划", "你好，明天去海边", "再见")
+        await _seed(db, 1, "你好世界")
+        await _seed(db, 2, "别人的", "你好")
+        await _seed(db, 1, "like", "100% 的把握", "100 分")
+        hits = await search_history(db, user_id=1, query="你好", limit=10, offset=0)
+        first = await search_history(db, user_id=1, query="你好", limit=1, offset=0)
+        percent = await search_history(db, user_id=1, query="0%", limit=10, offset=0)
+        with pytest.raises(HTTPException) as exc:
+            await search_history(db, user_id=1, query="   ", limit=10, offset=0)
+        return hits, first, percent, exc.value.status_code
+
+    hits, first, percent, empty = search_db(scenario)
+    # 只在本用户的会话中查找，按时间倒序；两个汉字不再被拒绝
+    assert [(item["kind"], item["highlight"]) for item in hits["items"]] == [
+        ("session", "<mark>你好</mark>世界"),
+        ("message", "<mark>你好</mark>，明天去海边"),
+    ]
+    assert len(first["items"]) == 1 and first["next_offset"] == 1
+    # LIKE 通配符按字面匹配
+    assert [item["highlight"] for item in percent["items"]] == ["10<mark>0%</mark> 的把握"]
+    assert empty == 400
@@ -0,0 +1,86 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.core.config import get_settings
+from app.main import app
+from app.modules.spaces import service
+from app.modules.spaces.models import ChatMessage
+
+URL = f"{get_settings().api_v1_prefix}/spaces/ai/chat/stream"
+
+
+@pytest.fixture()
+def stream_app(api_user, async_session_factory, monkeypatch):
+    """POST to the stream endpoint through ``app``; ``upstream`` scripts the stubbed DashScope."""
+    upstream = {"status": None, "chunks": [], "fail_after": None}
+
+    @asynccontextmanager
+    async def fake_stream_chat_with_qwen(db, payload):
+        if upstream["status"] is not None:
+            raise HTTPException(
+                status_code=upstream["status"], detail={"error": "qwen_error", "body": "quota"}
+            )
+
+        async def deltas():
+            for i, chunk in enumerate(upstream["chunks"]):
+                if i == upstream["fail_after"]:
+                    raise httpx.ReadError("connection reset")
+                yield chunk
+
+        yield deltas()
+
+    async def post() -> tuple[httpx.Response, list[tuple[str, dict]], list[tuple[str, str]]]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            resp = await client.post(URL, json={"prompt": "hi"})
+        events = []
+        if resp.headers.get("content-type", "").startswith("text/event-stream"):
+            for block in resp.text.strip().split("\n\n"):
+                name, data = block.split("\n", 1)
+                events.append(
+                    (name.removeprefix("event: "), json.loads(data.removeprefix("data: ")))
+                )
+        async with async_session_factory() as db:
+            rows = (await db.scalars(select(ChatMessage).order_by(ChatMessage.id))).all()
+        return resp, events, [(m.role, m.content) for m in rows]
+
+    monkeypatch.setattr(service, "stream_chat_with_qwen", fake_stream_chat_with_qwen)
+    return upstream, lambda: asyncio.run(post())
+
+
+def test_stream_relays_deltas_and_stores_the_reply(stream_app):
+    upstream, post = stream_app
+    upstream["chunks"] = ["你", "好", "!"]
+    resp, events, rows = post()
+    assert resp.status_code == 200
+    assert [name for name, _ in events] == ["session", "delta", "delta", "delta", "done"]
+    assert "".join(data["content"] for name, data in events if name == "delta") == "你好!"
+    assert rows == [("user", "hi"), ("assistant", "你好!")]
+    assert events[-1][1] == {"session_id": events[0][1]["session_id"], "message_id": 2}
+
+
+def test_upstream_error_before_first_delta_is_an_http_error(stream_app):
+    upstream, post = stream_app
+    upstream["status"] = 429
+    resp, events, rows = post()
+    assert resp.status_code == 429
+    assert resp.json()["detail"]["error"] == "qwen_error"
+    assert events == []
+    assert rows == [("user", "hi")]
+
+
+def test_failure_mid_stream_emits_error_and_keeps_partial_reply(stream_app):
+    upstream, post = stream_app
+    upstream["chunks"] = ["部分", "回复", "never sent"]
+    upstream["fail_after"] = 2
+    resp, events, rows = post()
+    assert resp.status_code == 200
+    assert [name for name, _ in events] == ["session", "delta", "delta", "error"]
+    assert events[-1][1] == {"error": "qwen_stream_interrupted"}
+    assert rows == [("user", "hi"), ("assistant", "部分回复")]
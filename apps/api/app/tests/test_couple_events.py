@@ -0,0 +1,104 @@
+import asyncio
+import json
+
+from app.core.pubsub import RESYNC, MemoryBroker
+from app.modules.auth.models import User
+from app.modules.couples import events, schemas, service
+
+
+def test_publish_from_worker_thread_reaches_subscribers():
+    async def scenario():
+        broker = MemoryBroker(queue_size=10)
+        await broker.start()
+        async with (
+            broker.subscribe("c:1") as first,
+            broker.subscribe("c:1") as second,
+            broker.subscribe("c:2") as other,
+        ):
+            # 同步接口运行在线程池中，publish 需要线程安全
+            await asyncio.to_thread(broker.publish, "c:1", {"type": "change", "id": 1})
+            got = [
+                await first.get(timeout=1),
+                await second.get(timeout=1),
+                await other.get(timeout=0.05),
+            ]
+        assert broker.subscriber_count("c:1") == 0
+        return got
+
+    assert asyncio.run(scenario()) == [
+        {"type": "change", "id": 1},
+        {"type": "change", "id": 1},
+        None,
+    ]
+
+
+def test_slow_subscriber_gets_a_single_resync():
+    async def scenario():
+        broker = MemoryBroker(queue_size=2)
+        async with broker.subscribe("c:1") as sub:
+            for i in range(5):
+                broker.deliver("c:1", {"id": i})
+            broker.deliver("c:1", {"id": 5})
+            return [await sub.get(timeout=0.05) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [RESYNC, {"id": 5}, None]
+
+
+def test_service_writes_stream_as_sse_deltas(db, monkeypatch):
+    db.add(User(id=1, email="u1@example.com", hashed_password="x"))
+    db.commit()
+    couple = service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="us"))
+
+    async def scenario():
+        broker = MemoryBroker(queue_size=10)
+        monkeypatch.setattr(events, "broker", broker)
+        await broker.start()
+        stream = events.event_stream(couple.id, 1)
+        frames = [await stream.__anext__()]
+        new_message = schemas.MessageCreate(author="a", content="hi")
+        msg = await asyncio.to_thread(service.add_message, db, couple.id, new_message)
+        frames.append(await stream.__anext__())
+        await asyncio.to_thread(service.delete_message, db, couple.id, msg.id)
+        frames.append(await stream.__anext__())
+        await stream.aclose()
+        return frames, msg.id
+
+    (ready, created, deleted), message_id = asyncio.run(scenario())
+
+    assert "event: ready" in ready
+    event, data = created.strip().split("\n")
+    assert event == "event: change"
+    payload = json.loads(data.removeprefix("data: "))
+    assert payload["action"] == "created" and payload["collection"] == "messages"
+    assert payload["item"]["content"] == "hi"
+    assert json.loads(deleted.strip().split("\n")[1].removeprefix("data: ")) == {
+        "collection": "messages",
+        "action": "deleted",
+        "id": message_id,
+    }
+
+
+def test_removed_member_stream_is_closed(monkeypatch):
+    async def scenario():
+        broker = MemoryBroker(queue_size=10)
+        monkeypatch.setattr(events, "broker", broker)
+        await broker.start()
+        owner, partner = events.event_stream(7, 1), events.event_stream(7, 2)
+        await owner.__anext__()
+        await partner.__anext__()
+        events.publish_member_removed(7, 2)
+        revoked = await partner.__anext__()
+        try:
+            await partner.__anext__()
+        except StopAsyncIteration:
+            ended = True
+        else:
+            ended = False
+        notice = await owner.__anext__()
+        await owner.aclose()
+        return revoked, ended, notice
+
+    revoked, ended, notice = asyncio.run(scenario())
+    assert revoked.startswith("event: revoked")
+    assert ended
+    assert notice.startswith("event: member")
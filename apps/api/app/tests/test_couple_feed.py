@@ -0,0 +1,76 @@
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from app.modules.couples import feed
+from app.modules.couples.models import (
+    Couple,
+    CoupleCountdown,
+    CoupleMessage,
+    CoupleNote,
+    CoupleWish,
+)
+from app.modules.media.models import Photo
+
+
+@pytest.fixture()
+def walk_feed(async_session_factory):
+    """Seed two couples once; ``walk(limit)`` returns the pages of couple 1's feed."""
+
+    async def seed():
+        base = datetime(2024, 1, 1)
+        async with async_session_factory() as db:
+            db.add(Couple(id=1, name="us", owner_id=1))
+            db.add(Couple(id=2, name="them", owner_id=2))
+            for i in range(4):
+                at = base + timedelta(hours=i)
+                db.add(CoupleNote(couple_id=1, title=f"n{i}", content_md="", created_at=at))
+                db.add(CoupleMessage(couple_id=1, author="a", content=f"m{i}", created_at=at))
+                db.add(CoupleMessage(couple_id=2, author="b", content="other", created_at=at))
+            # 同一时刻的多条记录，跨表排序依赖 rank + id
+            tie = base + timedelta(hours=10)
+            db.add(CoupleWish(couple_id=1, title="w", created_at=tie))
+            db.add(
+                CoupleCountdown(
+                    couple_id=1, title="c", target_date=date(2025, 1, 1), created_at=tie
+                )
+            )
+            db.add(Photo(owner_id=1, space_type="couple", url="p", created_at=tie))
+            await db.commit()
+
+    async def walk(limit: int):
+        async with async_session_factory() as db:
+            couple = await db.get(Couple, 1)
+            pages, cursor = [], None
+            while True:
+                page = await feed.get_feed(db, couple, limit=limit, cursor=cursor)
+                pages.append(page["items"])
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    return pages
+
+    asyncio.run(seed())
+    return lambda limit: asyncio.run(walk(limit))
+
+
+def test_feed_merges_collections_newest_first(walk_feed):
+    pages = walk_feed(limit=100)
+    assert len(pages) == 1
+    items = pages[0]
+    assert [(i["kind"], i["id"]) for i in items[:3]] == [
+        ("wish", 1),
+        ("countdown", 1),
+        ("photo", 1),
+    ]
+    assert [i["kind"] for i in items[3:5]] == ["note", "message"]
+    assert items[3]["data"]["title"] == "n3"
+    assert len(items) == 11  # 另一个 couple 的留言不出现
+
+
+def test_feed_cursor_pages_cover_everything_once(walk_feed):
+    full = [(i["kind"], i["id"]) for i in walk_feed(limit=100)[0]]
+    for limit in (1, 2, 3, 4):
+        pages = walk_feed(limit=limit)
+        assert all(len(page) <= limit for page in pages)
+        assert [(i["kind"], i["id"]) for page in pages for i in page] == full
@@ -0,0 +1,101 @@
+import pytest
+from fastapi import HTTPException
+
+from app.modules.auth.models import User
+from app.modules.couples import membership, schemas, service
+
+
+@pytest.fixture()
+def db(db):
+    for i in (1, 2, 3, 4):
+        db.add(User(id=i, email=f"u{i}@example.com", hashed_password="x"))
+    db.commit()
+    membership._membership_cache.clear()
+    return db
+
+
+def _access(db, user_id, couple_id):
+    return membership.require_couple_member(
+        couple_id=couple_id, db=db, current_user=User(id=user_id)
+    )
+
+
+def test_invite_and_join_share_the_space(db):
+    couple = service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="us"))
+    assert _access(db, 1, couple.id).is_owner
+    with pytest.raises(HTTPException) as exc:
+        _access(db, 2, couple.id)
+    assert exc.value.status_code == 403
+
+    invite = service.create_invite(db, couple_id=couple.id, user_id=1)
+    assert service.join_couple(db, user_id=2, invite_code=invite.invite_code).id == couple.id
+    assert _access(db, 2, couple.id).role == "partner"
+    assert service.get_my_couple(db, user_id=2).id == couple.id
+    assert [m.role for m in service.list_members(db, couple.id)] == ["owner", "partner"]
+
+    with pytest.raises(HTTPException) as exc:
+        service.join_couple(
+            db, user_id=3, invite_code=service.create_invite(db, couple.id, 1).invite_code
+        )
+    assert exc.value.status_code == 409  # 空间已满
+    with pytest.raises(HTTPException) as exc:
+        service.join_couple(db, user_id=3, invite_code="garbage")
+    assert exc.value.status_code == 400
+
+
+def test_membership_is_cached_and_invalidated_on_removal(db):
+    couple = service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="us"))
+    service.join_couple(
+        db, user_id=2, invite_code=service.create_invite(db, couple.id, 1).invite_code
+    )
+    assert _access(db, 2, couple.id)
+    assert membership._membership_cache.get((2, couple.id)) == "partner"
+
+    service.remove_member(db, couple_id=couple.id, user_id=2)
+    with pytest.raises(HTTPException):
+        _access(db, 2, couple.id)
+    with pytest.raises(HTTPException):
+        service.remove_member(db, couple_id=couple.id, user_id=1)
+
+
+def test_invite_codes_are_single_use(db):
+    couple = service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="us"))
+    code = service.create_invite(db, couple.id, 1).invite_code
+    service.join_couple(db, user_id=2, invite_code=code)
+    service.remove_member(db, couple_id=couple.id, user_id=2)
+
+    for user_id in (2, 3):
+        with pytest.raises(HTTPException) as exc:
+            service.join_couple(db, user_id=user_id, invite_code=code)
+        assert exc.value.status_code == 400
+
+
+def test_removing_a_member_revokes_outstanding_invites(db):
+    couple = service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="us"))
+    service.join_couple(
+        db, user_id=2, invite_code=service.create_invite(db, couple.id, 1).invite_code
+    )
+    # 伙伴被移除前，创建者多生成过一个邀请码（可能已外泄）
+    leaked = service.create_invite(db, couple.id, 1).invite_code
+    service.remove_member(db, couple_id=couple.id, user_id=2)
+
+    with pytest.raises(HTTPException) as exc:
+        service.join_couple(db, user_id=3, invite_code=leaked)
+    assert exc.value.status_code == 400
+    fresh = service.create_invite(db, couple.id, 1).invite_code
+    assert service.join_couple(db, user_id=4, invite_code=fresh).id == couple.id
+
+
+def test_only_the_owner_can_edit_the_profile(db):
+    couple = service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="us"))
+    service.join_couple(
+        db, user_id=2, invite_code=service.create_invite(db, couple.id, 1).invite_code
+    )
+
+    with pytest.raises(HTTPException) as exc:
+        service.create_couple(db, user_id=2, payload=schemas.CoupleCreate(name="hijacked"))
+    assert exc.value.status_code == 403
+    assert (
+        service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="renamed")).name
+        == "renamed"
+    )
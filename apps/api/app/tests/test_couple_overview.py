@@ -0,0 +1,101 @@
+import asyncio
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.modules.couples import overview
+from app.modules.couples.models import (
+    Couple,
+    CoupleCountdown,
+    CoupleMember,
+    CoupleMessage,
+    CoupleNote,
+    CoupleWish,
+)
+from app.modules.media.models import Photo
+
+
+@pytest.mark.parametrize("concurrent", [True, False])
+def test_overview_loads_recent_items_of_each_collection(
+    async_session_factory, monkeypatch, concurrent
+):
+    monkeypatch.setattr(overview.settings, "couple_overview_concurrent", concurrent)
+    monkeypatch.setattr(overview, "AsyncSessionLocal", async_session_factory)
+
+    async def scenario():
+        base = datetime(2024, 1, 1)
+        async with async_session_factory() as db:
+            db.add(Couple(id=1, name="us", owner_id=1))
+            db.add(CoupleMember(couple_id=1, user_id=1, role="owner"))
+            db.add(CoupleMember(couple_id=1, user_id=3, role="partner"))
+            for i in range(5):
+                at = base + timedelta(days=i)
+                db.add(CoupleNote(couple_id=1, title=f"n{i}", content_md="", created_at=at))
+                db.add(CoupleMessage(couple_id=1, author="a", content=f"m{i}", created_at=at))
+                db.add(CoupleWish(couple_id=1, title=f"w{i}", is_pinned=i == 0, created_at=at))
+                db.add(
+                    CoupleCountdown(couple_id=1, title=f"c{i}", target_date=date(2025, 1, 1 + i))
+                )
+                db.add(Photo(owner_id=1, space_type="couple", url=f"p{i}", created_at=at))
+            db.add(Photo(owner_id=1, space_type="family", url="other"))
+            db.add(Photo(owner_id=3, space_type="couple", url="partner-own", created_at=base))
+            await db.commit()
+
+        async with async_session_factory() as db:
+            data = await overview.get_overview(db, user_id=1, couple_id=1, limit=3)
+            partner_view = await overview.get_overview(db, user_id=3, couple_id=1, limit=3)
+            with pytest.raises(HTTPException) as exc:
+                await overview.get_overview(db, user_id=2, couple_id=1, limit=3)
+        return data, partner_view, exc.value
+
+    data, partner_view, error = asyncio.run(scenario())
+    assert error.status_code == 403
+    assert data["couple"].name == "us"
+    assert [n.title for n in data["notes"]] == ["n4", "n3", "n2"]
+    assert [m.content for m in data["messages"]] == ["m4", "m3", "m2"]
+    assert [w.title for w in data["wishes"]] == ["w0", "w4", "w3"]
+    assert [c.title for c in data["countdowns"]] == ["c0", "c1", "c2"]
+    assert [p.url for p in data["photos"]] == ["p4", "p3", "p2"]
+    # 伙伴看到的是情侣空间的照片，而不是只有自己上传的
+    assert [p.url for p in partner_view["photos"]] == ["p4", "p3", "p2"]
+
+
+def test_concurrent_overview_stays_within_the_connection_quota(monkeypatch):
+    monkeypatch.setattr(overview.settings, "couple_overview_concurrent", True)
+    active, peak = 0, 0
+
+    class CountingSession:
+        async def __aenter__(self):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            return self
+
+        async def __aexit__(self, *exc):
+            nonlocal active
+            active -= 1
+
+        async def scalars(self, stmt):
+            await asyncio.sleep(0.01)
+            return SimpleNamespace(all=list)
+
+    class FakeRequestSession:
+        async def commit(self):
+            pass
+
+    async def fake_authorize(db, user_id, couple_id):
+        return Couple(id=couple_id, name="us", owner_id=user_id)
+
+    async def scenario():
+        monkeypatch.setattr(overview, "_connection_slots", asyncio.Semaphore(2))
+        monkeypatch.setattr(overview, "AsyncSessionLocal", CountingSession)
+        monkeypatch.setattr(overview, "authorize_couple", fake_authorize)
+        # 三个并发请求共 15 个查询，同时占用的连接不超过配额
+        await asyncio.gather(
+            *(overview.get_overview(FakeRequestSession(), 1, 1, limit=3) for _ in range(3))
+        )
+
+    asyncio.run(scenario())
+    assert peak == 2
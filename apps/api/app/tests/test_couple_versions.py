@@ -0,0 +1,93 @@
+import pytest
+from fastapi import Response
+from starlette.requests import Request
+
+from app.modules.auth.models import User
+from app.modules.couples import schemas, service, versions
+
+
+@pytest.fixture()
+def db(db):
+    db.add(User(id=1, email="u1@example.com", hashed_password="x"))
+    db.commit()
+    versions._version_cache.clear()
+    return db
+
+
+def _request(etag: str | None = None) -> Request:
+    headers = [(b"if-none-match", etag.encode())] if etag else []
+    return Request({"type": "http", "method": "GET", "headers": headers})
+
+
+def _list_notes(db, couple_id, etag=None):
+    response = Response()
+    body = versions.conditional_list(
+        _request(etag),
+        response,
+        db,
+        couple_id,
+        "notes",
+        lambda: service.list_notes(db, couple_id=couple_id),
+    )
+    return body, response
+
+
+def test_writes_bump_only_their_collection(db):
+    couple = service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="us"))
+    assert versions.get_version(db, couple.id, "notes") == 0
+
+    note = service.add_note(db, couple.id, schemas.NoteCreate(title="a", content_md="x"))
+    service.update_note(db, couple.id, note.id, schemas.NoteCreate(title="b", content_md="y"))
+    service.add_wish(db, couple.id, schemas.WishCreate(title="trip"))
+    assert versions.get_version(db, couple.id, "notes") == 2
+    assert versions.get_version(db, couple.id, "wishes") == 1
+    assert versions.get_version(db, couple.id, "messages") == 0
+
+    service.delete_note(db, couple.id, note.id)
+    assert versions.get_version(db, couple.id, "notes") == 3
+
+
+def test_matching_etag_gets_304_without_reading_the_collection(db, sql_statements):
+    couple = service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="us"))
+    service.add_note(db, couple.id, schemas.NoteCreate(title="a", content_md="x"))
+
+    body, response = _list_notes(db, couple.id)
+    etag = response.headers["etag"]
+    assert [n.title for n in body] == ["a"]
+
+    statements = sql_statements
+    statements.clear()
+    body, _ = _list_notes(db, couple.id, etag=etag)
+    assert isinstance(body, Response) and body.status_code == 304
+    assert body.headers["etag"] == etag
+    # 条件请求只做一次版本号主键查询，不读取集合本身
+    assert len(statements) == 1 and "couple_versions" in statements[0]
+
+    service.add_note(db, couple.id, schemas.NoteCreate(title="b", content_md="y"))
+    body, response = _list_notes(db, couple.id, etag=etag)
+    assert [n.title for n in body] == ["b", "a"]
+    assert response.headers["etag"] != etag
+
+
+def test_write_from_another_worker_is_never_answered_with_304(db):
+    couple = service.create_couple(db, user_id=1, payload=schemas.CoupleCreate(name="us"))
+    service.add_note(db, couple.id, schemas.NoteCreate(title="a", content_md="x"))
+    _, response = _list_notes(db, couple.id)
+    etag = response.headers["etag"]
+
+    # 另一个 worker 写入：数据库版本号前进，但本进程的缓存没有被失效
+    versions.bump_version(db, couple.id, "notes")
+    db.commit()
+    assert versions.get_version(db, couple.id, "notes") == 1  # 本进程缓存仍是旧值
+
+    body, response = _list_notes(db, couple.id, etag=etag)
+    assert not isinstance(body, Response)
+    assert response.headers["etag"] != etag
+
+
+def test_etag_comparison_is_weak_and_accepts_lists():
+    etag = versions.make_etag(1, "notes", 3)
+    assert versions.etag_matches(_request('"other", "notes-1-3"'), etag)
+    assert versions.etag_matches(_request("*"), etag)
+    assert not versions.etag_matches(_request('W/"notes-1-2"'), etag)
+    assert not versions.etag_matches(_request(), etag)
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import select
+
+from app.core import metrics
+from app.core.config import get_settings
+from app.main import app
+from app.modules.spaces import service
+from app.modules.spaces.models import ChatMessage
+
+
+@pytest.fixture()
+def chat_app(api_user, async_session_factory, monkeypatch):
+    """The real ``app`` (full middleware stack) with a stub upstream that blocks until answered."""
+    upstream = {"started": None, "reply": None}
+
+    async def fake_chat_with_qwen(db, payload):
+        upstream["started"].set()
+        if upstream["reply"] is None:
+            await asyncio.sleep(10)
+        return upstream["reply"]
+
+    monkeypatch.setattr(service, "chat_with_qwen", fake_chat_with_qwen)
+    monkeypatch.setattr(get_settings(), "disconnect_poll_interval", 0.01)
+    return upstream, async_session_factory
+
+
+async def _post_chat(upstream, disconnect: bool) -> list[dict]:
+    """Drive ``app`` over raw ASGI; ``disconnect`` makes the client leave once upstream starts."""
+    upstream["started"] = asyncio.Event()
+    body = json.dumps({"prompt": "hi"}).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": f"{get_settings().api_v1_prefix}/spaces/ai/chat",
+        "raw_path": b"",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    messages = [{"type": "http.request", "body": body, "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        if disconnect:
+            await upstream["started"].wait()
+            return {"type": "http.disconnect"}
+        await asyncio.sleep(10)
+
+    async def send(message):
+        sent.append(message)
+
+    await asyncio.wait_for(app(scope, receive, send), 5)
+    return sent
+
+
+def _stored(SessionLocal) -> list[tuple[str, str, str]]:
+    async def load():
+        async with SessionLocal() as db:
+            rows = (await db.scalars(select(ChatMessage).order_by(ChatMessage.id))).all()
+        return [(m.role, m.message_type, m.content) for m in rows]
+
+    return asyncio.run(load())
+
+
+def test_reply_is_returned_while_client_stays(chat_app):
+    upstream, SessionLocal = chat_app
+    upstream["reply"] = "hello"
+    sent = asyncio.run(_post_chat(upstream, disconnect=False))
+    assert sent[0]["status"] == 200
+    assert json.loads(sent[1]["body"])["reply"] == "hello"
+    assert [row[:2] for row in _stored(SessionLocal)] == [("user", "text"), ("assistant", "text")]
+
+
+def test_client_disconnect_cancels_chat_through_the_middleware_stack(chat_app):
+    upstream, SessionLocal = chat_app
+    before = metrics.get("upstream.qwen.cancelled.chat")
+    sent = asyncio.run(_post_chat(upstream, disconnect=True))
+    assert sent[0]["status"] == 499
+    assert [row[:2] for row in _stored(SessionLocal)] == [
+        ("user", "text"),
+        ("assistant", "cancelled"),
+    ]
+    assert metrics.get("upstream.qwen.cancelled.chat") - before == 1
@@ -0,0 +1,153 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.modules.auth.principal import Principal
+from app.modules.spaces import jobs, router
+from app.modules.spaces.jobs import ImageJobManager
+from app.modules.spaces.schemas import ImageRequest
+
+
+@pytest.fixture()
+def fake_generation(monkeypatch):
+    """Replace the upstream call; generations block until ``state["gate"]`` is set."""
+    state = {"gate": asyncio.Event(), "result": (["https://img/1.png"], 42)}
+
+    @asynccontextmanager
+    async def no_db():
+        yield None
+
+    async def image_and_store(db, user_id, payload):
+        await state["gate"].wait()
+        if isinstance(state["result"], Exception):
+            raise state["result"]
+        return state["result"]
+
+    monkeypatch.setattr(jobs, "AsyncSessionLocal", no_db)
+    monkeypatch.setattr(jobs.service, "image_and_store", image_and_store)
+    return state
+
+
+def _payload() -> ImageRequest:
+    return ImageRequest(prompt="a cat")
+
+
+def test_full_queue_is_rejected_with_429(fake_generation):
+    async def scenario():
+        manager = ImageJobManager(concurrency=1, max_queue=1, result_ttl=60)
+        await manager.submit(user_id=1, payload=_payload())
+        await asyncio.sleep(0.01)  # 第一个任务已被 worker 取走
+        await manager.submit(user_id=1, payload=_payload())
+        with pytest.raises(HTTPException) as exc:
+            await manager.submit(user_id=1, payload=_payload())
+        await manager.stop()
+        return exc.value.status_code
+
+    assert asyncio.run(scenario()) == 429
+
+
+def test_job_runs_and_is_only_visible_to_its_owner(fake_generation):
+    async def scenario():
+        manager = ImageJobManager(concurrency=1, max_queue=4, result_ttl=60)
+        job = await manager.submit(user_id=1, payload=_payload())
+        statuses = []
+        watcher = asyncio.ensure_future(_collect(manager.watch(job), statuses))
+        await asyncio.sleep(0.01)
+        fake_generation["gate"].set()
+        await asyncio.wait_for(watcher, 1)
+        with pytest.raises(HTTPException) as exc:
+            manager.get(job.id, user_id=2)
+        await manager.stop()
+        return statuses, manager.get(job.id, user_id=1).to_read(), exc.value.status_code
+
+    statuses, read, not_found = asyncio.run(scenario())
+    assert statuses[0] in ("queued", "running") and statuses[-1] == "succeeded"
+    assert read.images == ["https://img/1.png"] and read.session_id == 42 and read.progress == 100
+    assert not_found == 404
+
+
+def test_failed_generation_is_reported(fake_generation):
+    async def scenario():
+        fake_generation["gate"].set()
+        fake_generation["result"] = HTTPException(status_code=502, detail={"error": "qwen_error"})
+        manager = ImageJobManager(concurrency=1, max_queue=4, result_ttl=60)
+        job = await manager.submit(user_id=1, payload=_payload())
+        await asyncio.wait_for(_collect(manager.watch(job), []), 1)
+        await manager.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "failed" and job.error == {"error": "qwen_error"}
+
+
+def test_watch_sse_streams_status_until_done(fake_generation):
+    async def scenario():
+        manager = ImageJobManager(concurrency=1, max_queue=4, result_ttl=60)
+        router_jobs, router.image_jobs = router.image_jobs, manager
+        try:
+            job = await manager.submit(user_id=1, payload=_payload())
+            user = Principal(
+                id=1,
+                email="u@example.com",
+                is_active=True,
+                is_admin=False,
+                role="user",
+                space_mask=15,
+            )
+            response = await router.watch_image_job(job.id, current_user=user)
+            frames = []
+            reader = asyncio.ensure_future(_collect(response.body_iterator, frames))
+            await asyncio.sleep(0.01)
+            fake_generation["gate"].set()
+            await asyncio.wait_for(reader, 1)
+        finally:
+            router.image_jobs = router_jobs
+            await manager.stop()
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert all(frame.startswith("event: status\ndata: ") for frame in frames)
+    last = json.loads(frames[-1].split("data: ", 1)[1])
+    assert last["status"] == "succeeded"
+
+
+def test_stop_fails_pending_jobs_so_watchers_end(fake_generation):
+    async def scenario():
+        manager = ImageJobManager(concurrency=1, max_queue=4, result_ttl=60)
+        running = await manager.submit(user_id=1, payload=_payload())
+        queued = await manager.submit(user_id=1, payload=_payload())
+        statuses = []
+        watcher = asyncio.ensure_future(_collect(manager.watch(queued), statuses))
+        await asyncio.sleep(0.01)
+        await manager.stop()
+        await asyncio.wait_for(watcher, 1)
+        return running, queued, statuses
+
+    running, queued, statuses = asyncio.run(scenario())
+    assert running.status == queued.status == "failed"
+    assert queued.error == "server_shutdown"
+    assert statuses[-1] == "failed"
+
+
+def test_finished_jobs_are_pruned_after_ttl(fake_generation):
+    async def scenario():
+        manager = ImageJobManager(concurrency=1, max_queue=4, result_ttl=60)
+        old = await manager.submit(user_id=1, payload=_payload())
+        old.update(status="succeeded", finished_at=datetime.utcnow() - timedelta(seconds=120))
+        fresh = await manager.submit(user_id=1, payload=_payload())
+        await manager.stop()
+        return manager, old.id, fresh.id
+
+    manager, old_id, fresh_id = asyncio.run(scenario())
+    with pytest.raises(HTTPException):
+        manager.get(old_id, user_id=1)
+    assert manager.get(fresh_id, user_id=1)
+
+
+async def _collect(iterator, sink: list) -> None:
+    async for item in iterator:
+        sink.append(item.status if hasattr(item, "status") else item)
@@ -0,0 +1,89 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.modules.media.store import ContentStore
+from app.modules.spaces import mirror
+from app.modules.spaces.mirror import ImageMirror, MirrorError
+
+
+@pytest.fixture()
+def fake_upstream(monkeypatch, tmp_path):
+    """Route the shared HTTP client to ``handler`` and store files under ``tmp_path``."""
+    state = {"handler": None, "calls": 0}
+
+    def handle(request):
+        state["calls"] += 1
+        return state["handler"](request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handle))
+    monkeypatch.setattr(mirror, "get_http_client", lambda: client)
+    monkeypatch.setattr(mirror, "media_store", ContentStore(tmp_path))
+    monkeypatch.setattr(mirror.random, "uniform", lambda a, b: 0)
+    return state
+
+
+def _mirror(max_bytes: int = 1024) -> ImageMirror:
+    return ImageMirror(concurrency=1, max_queue=4, max_retries=2, max_bytes=max_bytes)
+
+
+def test_downloads_into_the_content_store_once(fake_upstream, tmp_path):
+    fake_upstream["handler"] = lambda r: httpx.Response(
+        200, content=b"png", headers={"Content-Type": "image/png"}
+    )
+    image_mirror = _mirror()
+
+    local = asyncio.run(image_mirror._mirror_url("https://cdn.example.com/a"))
+    assert local.endswith(".png") and "/media/files/" in local
+    assert asyncio.run(image_mirror._mirror_url("https://cdn.example.com/a")) == local
+    assert fake_upstream["calls"] == 1
+    assert [p.read_bytes() for p in tmp_path.rglob("*.png")] == [b"png"]
+
+
+def test_declared_oversize_is_rejected_before_reading(fake_upstream):
+    fake_upstream["handler"] = lambda r: httpx.Response(200, content=b"x" * 2048)
+    with pytest.raises(MirrorError, match="larger than"):
+        asyncio.run(_mirror()._download("https://cdn.example.com/big"))
+    assert fake_upstream["calls"] == 1  # 超限不重试
+
+
+def test_undeclared_oversize_stops_reading_at_the_cap(fake_upstream):
+    sent = []
+
+    async def chunks():
+        for _ in range(100):
+            sent.append(1)
+            yield b"x" * 512
+
+    # 分块传输，没有 Content-Length
+    fake_upstream["handler"] = lambda r: httpx.Response(200, content=chunks())
+    with pytest.raises(MirrorError, match="larger than"):
+        asyncio.run(_mirror()._download("https://cdn.example.com/stream"))
+    assert len(sent) < 5
+
+
+def test_download_failures(fake_upstream):
+    fake_upstream["handler"] = lambda r: httpx.Response(404)
+    with pytest.raises(MirrorError, match="status=404"):
+        asyncio.run(_mirror()._download("https://cdn.example.com/gone"))
+    assert fake_upstream["calls"] == 1  # 4xx 不重试
+
+    fake_upstream["calls"] = 0
+
+    def unreachable(request):
+        raise httpx.ConnectError("refused")
+
+    fake_upstream["handler"] = unreachable
+    with pytest.raises(MirrorError, match="ConnectError"):
+        asyncio.run(_mirror()._download("https://cdn.example.com/down"))
+    assert fake_upstream["calls"] == 3  # 1 次 + 2 次重试
+
+
+def test_retryable_status_then_success(fake_upstream):
+    statuses = iter([503, 200])
+    fake_upstream["handler"] = lambda r: httpx.Response(
+        next(statuses), content=b"jpg", headers={"Content-Type": "image/jpeg"}
+    )
+    data, ext = asyncio.run(_mirror()._download("https://cdn.example.com/flaky"))
+    assert (data, ext) == (b"jpg", ".jpg")
@@ -0,0 +1,74 @@
+import json
+from datetime import timedelta
+
+import httpx
+
+from loguru import logger
+
+from app.core import logging as app_logging
+from app.core.config import get_settings
+
+
+def _capture(json_logs: bool = True) -> tuple[list[str], int]:
+    lines: list[str] = []
+    handler_id = logger.add(
+        lines.append,
+        level="DEBUG",
+        format=app_logging._json_format if json_logs else app_logging.TEXT_FORMAT,
+    )
+    return lines, handler_id
+
+
+def test_truncate_marks_dropped_length():
+    assert app_logging.truncate("abc", 5) == "abc"
+    assert app_logging.truncate("abcdefgh", 3) == "abc…(+5 chars)"
+
+
+def test_json_format_emits_extra_fields():
+    lines, handler_id = _capture()
+    try:
+        logger.info("{method} {path}", method="GET", path="/health")
+    finally:
+        logger.remove(handler_id)
+    record = json.loads(lines[0])
+    assert record["message"] == "GET /health"
+    assert record["method"] == "GET"
+    assert record["path"] == "/health"
+    assert "_json" not in record
+
+
+def _response(status_code: int, body: str) -> httpx.Response:
+    resp = httpx.Response(status_code, text=body, request=httpx.Request("POST", "https://upstream"))
+    resp.elapsed = timedelta(milliseconds=12.34)
+    return resp
+
+
+def test_log_upstream_truncates_and_samples(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "log_upstream_body_max_chars", 10)
+    monkeypatch.setattr(settings, "log_upstream_success_sample_rate", 0.0)
+    lines, handler_id = _capture()
+    try:
+        app_logging.log_upstream("qwen", "chat", _response(200, "x" * 100))
+        app_logging.log_upstream("qwen", "chat", _response(500, "y" * 100))
+    finally:
+        logger.remove(handler_id)
+    assert len(lines) == 1  # 成功响应被采样丢弃，失败响应总是记录
+    record = json.loads(lines[0])
+    assert record["level"] == "WARNING"
+    assert record["status_code"] == 500
+    assert record["elapsed_ms"] == 12.3
+    assert record["body"] == "y" * 10 + "…(+90 chars)"
+    # 记录调用方位置，而不是 log_upstream 自身
+    assert record["function"] == "test_log_upstream_truncates_and_samples"
+
+
+def test_log_upstream_text_format_includes_body(monkeypatch):
+    monkeypatch.setattr(get_settings(), "log_upstream_body_max_chars", 10)
+    lines, handler_id = _capture(json_logs=False)
+    try:
+        app_logging.log_upstream("qwen", "image", _response(502, '{"code":"Throttling"}'))
+    finally:
+        logger.remove(handler_id)
+    assert 'Upstream qwen image status=502 elapsed_ms=12.3 body={"code":"T…(+11 chars)' in lines[0]
+
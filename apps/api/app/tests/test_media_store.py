@@ -0,0 +1,24 @@
+import asyncio
+
+from app.modules.media.store import ContentStore
+
+
+def test_identical_bytes_share_one_immutable_file(tmp_path):
+    store = ContentStore(tmp_path)
+    first = asyncio.run(store.put(b"same image", ".png"))
+    path = store.path_for(first)
+    mtime = path.stat().st_mtime_ns
+
+    assert asyncio.run(store.put(b"same image", ".png")) == first
+    assert path.stat().st_mtime_ns == mtime  # 已存在则不重写
+    assert asyncio.run(store.put(b"other image", ".png")) != first
+    assert path.read_bytes() == b"same image"
+    assert not list(tmp_path.rglob("*.tmp*"))
+
+
+def test_path_for_only_accepts_stored_names(tmp_path):
+    store = ContentStore(tmp_path)
+    name = asyncio.run(store.put(b"x", ".jpg"))
+    assert store.path_for(name) == tmp_path / name
+    assert store.path_for("../../etc/passwd") is None
+    assert store.path_for(name.replace(".jpg", ".exe")) is None
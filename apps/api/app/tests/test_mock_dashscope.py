@@ -0,0 +1,70 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app.modules.spaces.service import _extract_chat_text
+from bench.mock_dashscope import MockConfig, create_mock_app
+from bench.run import percentile
+
+TEXT_URL = "/api/v1/services/aigc/text-generation/generation"
+IMAGE_URL = "/api/v1/services/aigc/multimodal-generation/generation"
+
+
+def _client(**overrides) -> TestClient:
+    config = MockConfig(chat_latency_ms=0, image_latency_ms=0, latency_sigma=0, seed=1, **overrides)
+    return TestClient(create_mock_app(config))
+
+
+def _chat_body(prompt: str, **parameters) -> dict:
+    return {
+        "model": "qwen-turbo",
+        "input": {"messages": [{"role": "user", "content": prompt}]},
+        "parameters": parameters,
+    }
+
+
+def test_mock_text_generation_matches_service_parser():
+    client = _client(reply_chars=40)
+    plain = client.post(TEXT_URL, json=_chat_body("hello"))
+    message = client.post(TEXT_URL, json=_chat_body("hello", result_format="message"))
+    assert plain.status_code == message.status_code == 200
+    assert _extract_chat_text(plain.json()).startswith("Mock reply to: hello")
+    assert _extract_chat_text(message.json()) == _extract_chat_text(plain.json())
+
+
+def test_mock_streaming_emits_incremental_chunks():
+    client = _client(reply_chars=40, stream_chunks=4)
+    resp = client.post(
+        TEXT_URL,
+        json=_chat_body("hi", incremental_output=True, result_format="message"),
+        headers={"X-DashScope-SSE": "enable"},
+    )
+    chunks = [
+        _extract_chat_text(json.loads(line[5:]))
+        for line in resp.text.splitlines()
+        if line.startswith("data:")
+    ]
+    assert len(chunks) == 4
+    assert len("".join(chunks)) == 40
+
+
+def test_mock_image_generation_and_errors():
+    client = _client()
+    resp = client.post(
+        IMAGE_URL, json={"input": {"messages": []}, "parameters": {"size": "928*1664"}}
+    )
+    content = resp.json()["output"]["choices"][0]["message"]["content"]
+    assert content[0]["image"].endswith(".png")
+    assert resp.json()["usage"]["height"] == 1664
+
+    failing = _client(error_rate=1.0, error_status=429)
+    resp = failing.post(TEXT_URL, json=_chat_body("hello"))
+    assert resp.status_code == 429
+    assert resp.json()["code"].startswith("Throttling")
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 95) == 0.0
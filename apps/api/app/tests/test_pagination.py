@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from app.core.pagination import KeysetPaginator, decode_cursor, encode_cursor
+from app.modules.spaces.models import ChatSession
+
+ORDER = [(ChatSession.is_pinned, True), (ChatSession.created_at, True), (ChatSession.id, True)]
+
+
+@pytest.fixture()
+def db(db):
+    start = datetime(2025, 1, 1)
+    for i in range(7):
+        # 两条置顶；其中 3、4 的 created_at 相同，考验 id 兜底排序
+        created = start + timedelta(minutes=min(i, 3))
+        pinned = 1 if i in (1, 5) else 0
+        db.add(
+            ChatSession(
+                id=i + 1, user_id=1, title=f"s{i + 1}", is_pinned=pinned, created_at=created
+            )
+        )
+    db.commit()
+    return db
+
+
+def _page(db, **kwargs):
+    paginator = KeysetPaginator(ORDER, limit=2, **kwargs)
+    page = paginator.page(db.scalars(paginator.apply(select(ChatSession))).all())
+    return [row.id for row in page["items"]], page
+
+
+def test_cursor_roundtrip_keeps_datetimes():
+    values = [1, datetime(2025, 1, 1, 8, 30, 15, 123), 42]
+    assert decode_cursor(encode_cursor(values), 3) == values
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", 3)
+
+
+def test_walks_forward_and_back_without_gaps(db):
+    expected = [6, 2, 7, 5, 4, 3, 1]
+    seen, cursor = [], None
+    while True:
+        ids, page = _page(db, after=cursor)
+        seen.extend(ids)
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == expected
+
+    ids, page = _page(db, before=page["prev_cursor"])
+    assert ids == [4, 3]
+    assert page["next_cursor"] is not None
+
+
+def test_from_end_returns_last_page(db):
+    paginator = KeysetPaginator(ORDER, limit=3, from_end=True)
+    page = paginator.page(db.scalars(paginator.apply(select(ChatSession))).all())
+    assert [row.id for row in page["items"]] == [4, 3, 1]
+    assert page["prev_cursor"] is not None and page["next_cursor"] is None
@@ -0,0 +1,56 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from app.core import deps
+from app.core.security import create_access_token
+from app.modules.auth.principal import Principal, PrincipalCache, principal_cache
+
+
+def _user(user_id: int = 1, role: str = "user") -> SimpleNamespace:
+    return SimpleNamespace(
+        id=user_id, email="a@example.com", is_active=True, is_admin=False, role=role, space_mask=1
+    )
+
+
+def test_principal_cache_respects_token_expiry_and_invalidation():
+    cache = PrincipalCache(maxsize=8, ttl=60)
+    principal = Principal.from_user(_user())
+    cache.set("expired", principal, expires_at=time.time() - 1)
+    cache.set("t1", principal, expires_at=time.time() + 3600)
+    cache.set("t2", principal)
+    assert cache.get("expired") is None
+    assert cache.get("t1") == (principal, None)
+
+    cache.invalidate_user(principal.id)
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+
+
+def test_get_current_user_hits_database_once_per_token(monkeypatch):
+    principal_cache.clear()
+    calls = []
+
+    def fake_get_user_by_id(db, user_id):
+        calls.append(user_id)
+        return _user(user_id)
+
+    monkeypatch.setattr(deps.auth_service, "get_user_by_id", fake_get_user_by_id)
+    token = create_access_token(subject=7)
+    first = deps.get_current_user(db=None, token=token)
+    second = deps.get_current_user(db=None, token=token)
+    assert first is second
+    assert calls == [7]
+
+    principal_cache.invalidate_user(7)
+    deps.get_current_user(db=None, token=token)
+    assert calls == [7, 7]
+    principal_cache.clear()
+
+
+def test_get_current_user_rejects_bad_token():
+    with pytest.raises(HTTPException) as exc:
+        deps.get_current_user(db=None, token="not-a-jwt")
+    assert exc.value.status_code == 401
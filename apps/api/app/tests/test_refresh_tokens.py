@@ -0,0 +1,48 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.security import decode_token
+from app.modules.auth import schemas, tokens
+from app.modules.auth.models import RefreshToken, User
+
+
+@pytest.fixture()
+def db(db):
+    db.add(User(id=1, email="a@example.com", hashed_password="x"))
+    db.commit()
+    return db
+
+
+def test_refresh_rotates_and_stores_only_hashes(db):
+    issued = tokens.issue_tokens(db, user_id=1)
+    rotated = tokens.rotate_refresh_token(db, issued.refresh_token)
+    assert rotated.refresh_token != issued.refresh_token
+    assert decode_token(rotated.access_token)["sub"] == "1"
+
+    rows = db.query(RefreshToken).order_by(RefreshToken.id).all()
+    assert len(rows) == 2
+    assert rows[0].revoked_at is not None and rows[1].revoked_at is None
+    assert rows[0].family_id == rows[1].family_id
+    assert issued.refresh_token not in {row.token_hash for row in rows}
+
+
+def test_refresh_token_reuse_revokes_family(db):
+    issued = tokens.issue_tokens(db, user_id=1)
+    rotated = tokens.rotate_refresh_token(db, issued.refresh_token)
+    with pytest.raises(HTTPException) as exc:
+        tokens.rotate_refresh_token(db, issued.refresh_token)
+    assert exc.value.status_code == 401
+
+    # 重放后整个家族失效，包括刚轮换出的 token 及其 access token
+    with pytest.raises(HTTPException):
+        tokens.rotate_refresh_token(db, rotated.refresh_token)
+    assert tokens.revocation_list.is_revoked(decode_token(rotated.access_token)["jti"])
+
+
+def test_logout_revokes_access_token(db):
+    issued = tokens.issue_tokens(db, user_id=1)
+    payload = schemas.TokenPayload(**decode_token(issued.access_token))
+    tokens.logout(db, payload, refresh_token=issued.refresh_token)
+    assert tokens.revocation_list.is_revoked(payload.jti)
+    with pytest.raises(HTTPException):
+        tokens.rotate_refresh_token(db, issued.refresh_token)
@@ -0,0 +1,82 @@
+import asyncio
+
+from app.modules.spaces.service import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return ["url"]
+
+    async def scenario():
+        flights = SingleFlight("test")
+        return await asyncio.gather(*[flights.do("same", work) for _ in range(5)])
+
+    assert asyncio.run(scenario()) == [["url"]] * 5
+    assert len(calls) == 1
+
+
+def test_cancelled_waiter_does_not_cancel_others():
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        flights = SingleFlight("test")
+        first = asyncio.ensure_future(flights.do("k", work))
+        second = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "done"
+
+
+def test_caller_arriving_after_last_waiter_left_starts_fresh():
+    runs = []
+
+    async def work():
+        runs.append(1)
+        await asyncio.sleep(0.02)
+        return len(runs)
+
+    async def scenario():
+        flights = SingleFlight("test")
+        first = asyncio.ensure_future(flights.do("k", work))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        # 最后一个等待者已离开并取消了共享任务，但任务的 done 回调尚未执行
+        late = await flights.do("k", work)
+        return late, first.cancelled()
+
+    assert asyncio.run(scenario()) == (2, True)
+    assert len(runs) == 2
+
+
+def test_shared_task_is_cancelled_only_when_every_waiter_leaves():
+    async def scenario():
+        flights = SingleFlight("test")
+        gate = asyncio.Event()
+
+        async def work():
+            gate.set()
+            await asyncio.sleep(10)
+
+        waiters = [asyncio.ensure_future(flights.do("k", work)) for _ in range(3)]
+        await gate.wait()
+        task, refcount = flights._calls["k"]
+        assert refcount == [3]
+        waiters[0].cancel()
+        waiters[1].cancel()
+        await asyncio.sleep(0)
+        alive = not task.cancelled() and refcount == [1]
+        waiters[2].cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        await asyncio.sleep(0)
+        return alive, task.cancelled(), "k" in flights._calls
+
+    assert asyncio.run(scenario()) == (True, True, False)
@@ -0,0 +1,37 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core import deps
+from app.modules.auth.models import User
+from app.modules.auth.principal import Principal
+from app.modules.auth.spaces import ALL_SPACES_MASK, format_spaces, parse_spaces
+
+
+def test_parse_and_format_spaces_round_trip():
+    mask = parse_spaces(" AI, couple,,")
+    assert mask == 9
+    assert format_spaces(mask) == "couple,ai"
+    assert parse_spaces(["family", "friends"]) == 6
+    with pytest.raises(ValueError):
+        parse_spaces("couple,unknown")
+
+
+def test_user_set_spaces_keeps_rows_in_sync():
+    user = User(email="a@example.com", hashed_password="x")
+    user.set_spaces(ALL_SPACES_MASK)
+    assert sorted(row.space for row in user.space_rows) == ["ai", "couple", "family", "friends"]
+    user.allowed_spaces = "couple"
+    assert user.space_mask == 1
+    assert [row.space for row in user.space_rows] == ["couple"]
+
+
+def test_require_space_checks_bitmask():
+    principal = Principal(
+        id=1, email="a@example.com", is_active=True, is_admin=False, role="user", space_mask=1
+    )
+    assert deps.require_space("couple")(current_user=principal) is principal
+    with pytest.raises(HTTPException) as exc:
+        deps.require_space("ai")(current_user=principal)
+    assert exc.value.status_code == 403
+    with pytest.raises(ValueError):
+        deps.require_space("unknown")
@@ -0,0 +1,133 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app.core.upstream import UpstreamGuard
+
+
+def _guard(**overrides) -> UpstreamGuard:
+    options = dict(
+        max_concurrency=2,
+        max_retries=2,
+        backoff_base=0.0,
+        backoff_max=0.0,
+        failure_threshold=3,
+        reset_timeout=60.0,
+    )
+    options.update(overrides)
+    return UpstreamGuard("test", **options)
+
+
+def _sender(statuses: list[int]):
+    calls = []
+
+    async def send():
+        calls.append(1)
+        return httpx.Response(statuses[min(len(calls), len(statuses)) - 1])
+
+    return send, calls
+
+
+def test_retries_retryable_status_until_success():
+    guard = _guard()
+    send, calls = _sender([503, 429, 200])
+    resp = asyncio.run(guard.request(send))
+    assert resp.status_code == 200
+    assert len(calls) == 3
+    assert guard.breaker.state == "closed"
+
+
+def test_non_retryable_status_is_returned_immediately():
+    guard = _guard()
+    send, calls = _sender([400])
+    assert asyncio.run(guard.request(send)).status_code == 400
+    assert len(calls) == 1
+
+
+def test_circuit_opens_and_fails_fast():
+    guard = _guard(max_retries=0, failure_threshold=2)
+    send, calls = _sender([500])
+    asyncio.run(guard.request(send))
+    asyncio.run(guard.request(send))
+    assert guard.breaker.state == "open"
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(guard.request(send))
+    assert exc_info.value.status_code == 503
+    assert len(calls) == 2
+
+
+def test_half_open_probe_closes_circuit():
+    guard = _guard(max_retries=0, failure_threshold=1, reset_timeout=0.0)
+    send, _ = _sender([500, 200])
+    asyncio.run(guard.request(send))
+    assert guard.breaker.state == "open"
+    assert asyncio.run(guard.request(send)).status_code == 200
+    assert guard.breaker.state == "closed"
+
+
+def _open_circuit(guard: UpstreamGuard) -> None:
+    send, _ = _sender([500])
+    asyncio.run(guard.request(send))
+    assert guard.breaker.state == "open"
+
+
+def test_cancelled_half_open_probe_releases_the_breaker():
+    guard = _guard(max_retries=0, failure_threshold=1, reset_timeout=0.0)
+    _open_circuit(guard)
+
+    async def hang():
+        await asyncio.sleep(10)
+
+    async def cancel_probe():
+        probe = asyncio.ensure_future(guard.request(hang))
+        await asyncio.sleep(0.01)
+        assert guard.breaker.state == "half_open"
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_probe())
+    send, _ = _sender([200])
+    assert asyncio.run(guard.request(send)).status_code == 200
+    assert guard.breaker.state == "closed"
+
+
+def test_unexpected_probe_error_reopens_instead_of_wedging():
+    guard = _guard(max_retries=0, failure_threshold=1, reset_timeout=0.0)
+    _open_circuit(guard)
+
+    async def broken():
+        raise ValueError("bad payload")
+
+    with pytest.raises(ValueError):
+        asyncio.run(guard.request(broken))
+    assert guard.breaker.state == "open"
+    send, _ = _sender([200])
+    assert asyncio.run(guard.request(send)).status_code == 200
+
+
+def test_cancelled_stream_probe_releases_the_breaker():
+    guard = _guard(max_retries=0, failure_threshold=1, reset_timeout=0.0)
+    _open_circuit(guard)
+
+    @asynccontextmanager
+    async def hanging_stream():
+        await asyncio.sleep(10)
+        yield httpx.Response(200)
+
+    async def consume():
+        async with guard.stream(hanging_stream):
+            pass
+
+    async def cancel_probe():
+        probe = asyncio.ensure_future(consume())
+        await asyncio.sleep(0.01)
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+    asyncio.run(cancel_probe())
+    assert guard.breaker.allow()
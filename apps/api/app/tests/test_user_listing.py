@@ -0,0 +1,51 @@
+import pytest
+
+from app.modules.auth import service
+from app.modules.auth.models import User
+from app.modules.auth.spaces import ALL_SPACES_MASK
+
+
+@pytest.fixture()
+def db(db):
+    for i in range(1, 8):
+        user = User(
+            email=f"user{i}@example.com", hashed_password="x", role="admin" if i == 1 else "user"
+        )
+        user.is_active = i != 7
+        user.set_spaces(ALL_SPACES_MASK if i <= 2 else 1)
+        db.add(user)
+    db.add(User(email="user_x@example.com", hashed_password="x"))
+    db.commit()
+    return db
+
+
+def test_list_users_pages_newest_first_with_total(db):
+    first = service.list_users(db, limit=3)
+    assert [u.id for u in first["items"]] == [8, 7, 6]
+    assert first["total"] == 8 and not first["total_is_estimate"]
+    second = service.list_users(db, limit=3, after=first["next_cursor"])
+    assert [u.id for u in second["items"]] == [5, 4, 3]
+    assert service.list_users(db, limit=3, before=second["prev_cursor"])["items"] == first["items"]
+
+
+def test_list_users_filters(db):
+    ai_users = service.list_users(db, limit=10, space="ai")
+    assert sorted(u.id for u in ai_users["items"]) == [1, 2]
+    assert ai_users["total"] == 2
+    assert [u.id for u in service.list_users(db, limit=10, is_active=False)["items"]] == [7]
+    assert [u.id for u in service.list_users(db, limit=10, role="admin")["items"]] == [1]
+
+
+def test_list_users_email_prefix_escapes_wildcards(db):
+    page = service.list_users(db, limit=2, email_prefix="user")
+    assert [u.email for u in page["items"]] == ["user1@example.com", "user2@example.com"]
+    assert page["total"] == 8
+    assert [u.email for u in service.list_users(db, limit=10, email_prefix="user_")["items"]] == [
+        "user_x@example.com"
+    ]
+
+
+def test_count_is_capped(db, monkeypatch):
+    monkeypatch.setattr(service, "USER_COUNT_CAP", 3)
+    page = service.list_users(db, limit=2, role="user")
+    assert page["total"] == 3 and page["total_is_estimate"]
@@ -0,0 +1 @@
+"""Local load-testing tools for the AI path (mock DashScope + benchmark harness)."""
@@ -0,0 +1,236 @@
+"""Mock DashScope server for load tests.
+
+Serves the text-generation and multimodal-generation endpoints with the same response
+shapes ``chat_with_qwen`` / ``stream_chat_with_qwen`` / ``_request_image`` parse, with a
+configurable latency distribution, error rate and streaming chunk cadence.
+
+    python -m bench.mock_dashscope --port 8090 --latency-ms 400 --error-rate 0.02
+
+then point the API at it with ``QWEN_BASE_URL=http://127.0.0.1:8090/api/v1``.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import math
+import random
+import uuid
+from dataclasses import dataclass
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+# 1x1 透明 PNG，供生成的图片 URL 下载（镜像任务）
+PIXEL_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mNkYAAAAAYAAjCB0C8AAAAASUVORK5CYII="
+)
+
+
+@dataclass
+class MockConfig:
+    # 延迟服从对数正态分布：median_ms 为中位数，sigma 控制长尾（0 表示固定延迟）
+    chat_latency_ms: float = 300.0
+    image_latency_ms: float = 2000.0
+    latency_sigma: float = 0.5
+    error_rate: float = 0.0
+    error_status: int = 500
+    stream_chunks: int = 8
+    reply_chars: int = 200
+    seed: int | None = None
+
+
+class LatencyModel:
+    def __init__(self, config: MockConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+
+    def sample(self, median_ms: float) -> float:
+        """Return a latency in seconds drawn around ``median_ms``."""
+        if self.config.latency_sigma <= 0:
+            return median_ms / 1000
+        return (
+            self.random.lognormvariate(math.log(max(median_ms, 0.001)), self.config.latency_sigma)
+            / 1000
+        )
+
+    def should_fail(self) -> bool:
+        return self.random.random() < self.config.error_rate
+
+
+def _error_response(config: MockConfig, request_id: str) -> JSONResponse:
+    code = "Throttling.RateQuota" if config.error_status == 429 else "InternalError"
+    return JSONResponse(
+        status_code=config.error_status,
+        content={"code": code, "message": "mock upstream failure", "request_id": request_id},
+    )
+
+
+def _reply_text(prompt: str, chars: int) -> str:
+    base = f"Mock reply to: {prompt} "
+    return (base * (chars // max(len(base), 1) + 1))[:chars]
+
+
+def _usage(prompt: str, reply: str) -> dict:
+    return {
+        "input_tokens": len(prompt),
+        "output_tokens": len(reply),
+        "total_tokens": len(prompt) + len(reply),
+    }
+
+
+def _last_user_text(body: dict) -> str:
+    messages = body.get("input", {}).get("messages") or []
+    if not messages:
+        return ""
+    content = messages[-1].get("content", "")
+    if isinstance(content, list):
+        return " ".join(item.get("text", "") for item in content if isinstance(item, dict))
+    return str(content)
+
+
+def create_mock_app(config: MockConfig | None = None) -> FastAPI:
+    config = config or MockConfig()
+    latency = LatencyModel(config)
+    app = FastAPI(title="Mock DashScope")
+    app.state.config = config
+    app.state.calls = {"chat": 0, "chat_stream": 0, "image": 0, "errors": 0}
+
+    @app.post("/api/v1/services/aigc/text-generation/generation")
+    async def text_generation(request: Request):
+        body = await request.json()
+        request_id = str(uuid.uuid4())
+        prompt = _last_user_text(body)
+        reply = _reply_text(prompt, config.reply_chars)
+        parameters = body.get("parameters") or {}
+        streaming = request.headers.get("x-dashscope-sse") == "enable"
+        app.state.calls["chat_stream" if streaming else "chat"] += 1
+
+        if latency.should_fail():
+            app.state.calls["errors"] += 1
+            await asyncio.sleep(latency.sample(config.chat_latency_ms) / 4)
+            return _error_response(config, request_id)
+
+        if streaming:
+            return StreamingResponse(
+                _stream_chunks(
+                    reply, prompt, request_id, latency.sample(config.chat_latency_ms), config
+                ),
+                media_type="text/event-stream",
+            )
+
+        await asyncio.sleep(latency.sample(config.chat_latency_ms))
+        if parameters.get("result_format") == "message":
+            output = {
+                "choices": [
+                    {"finish_reason": "stop", "message": {"role": "assistant", "content": reply}}
+                ]
+            }
+        else:
+            output = {"text": reply, "finish_reason": "stop"}
+        return {"output": output, "usage": _usage(prompt, reply), "request_id": request_id}
+
+    @app.post("/api/v1/services/aigc/multimodal-generation/generation")
+    async def multimodal_generation(request: Request):
+        body = await request.json()
+        request_id = str(uuid.uuid4())
+        app.state.calls["image"] += 1
+        if latency.should_fail():
+            app.state.calls["errors"] += 1
+            await asyncio.sleep(latency.sample(config.image_latency_ms) / 4)
+            return _error_response(config, request_id)
+
+        await asyncio.sleep(latency.sample(config.image_latency_ms))
+        size = (body.get("parameters") or {}).get("size", "1328*1328")
+        width, _, height = size.partition("*")
+        image_url = str(request.base_url.replace(path=f"/images/{request_id}.png"))
+        return {
+            "output": {
+                "choices": [
+                    {
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": [{"image": image_url}]},
+                    }
+                ]
+            },
+            "usage": {"width": int(width or 0), "height": int(height or 0), "image_count": 1},
+            "request_id": request_id,
+        }
+
+    @app.get("/images/{name}")
+    async def image_file(name: str):
+        return Response(content=PIXEL_PNG, media_type="image/png")
+
+    return app
+
+
+async def _stream_chunks(
+    reply: str, prompt: str, request_id: str, total_seconds: float, config: MockConfig
+):
+    """Yield DashScope-style SSE events (incremental output), spreading latency over the chunks."""
+    chunks = max(config.stream_chunks, 1)
+    step = math.ceil(len(reply) / chunks) or 1
+    pieces = [reply[i : i + step] for i in range(0, len(reply), step)] or [""]
+    for index, piece in enumerate(pieces, start=1):
+        await asyncio.sleep(total_seconds / len(pieces))
+        finish = "stop" if index == len(pieces) else "null"
+        data = {
+            "output": {
+                "choices": [
+                    {"finish_reason": finish, "message": {"role": "assistant", "content": piece}}
+                ]
+            },
+            "usage": _usage(prompt, reply[: index * step]),
+            "request_id": request_id,
+        }
+        payload = json.dumps(data, ensure_ascii=False)
+        yield f"id:{index}\nevent:result\n:HTTP_STATUS/200\ndata:{payload}\n\n"
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="median chat latency")
+    parser.add_argument(
+        "--image-latency-ms", type=float, default=2000.0, help="median image latency"
+    )
+    parser.add_argument(
+        "--latency-sigma", type=float, default=0.5, help="log-normal sigma, 0 = fixed"
+    )
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls that fail")
+    parser.add_argument(
+        "--error-status", type=int, default=500, help="status code for failed calls"
+    )
+    parser.add_argument(
+        "--stream-chunks", type=int, default=8, help="SSE chunks per streamed reply"
+    )
+    parser.add_argument("--reply-chars", type=int, default=200, help="length of generated replies")
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args: argparse.Namespace) -> MockConfig:
+    return MockConfig(
+        chat_latency_ms=args.latency_ms,
+        image_latency_ms=args.image_latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        stream_chunks=args.stream_chunks,
+        reply_chars=args.reply_chars,
+        seed=args.seed,
+    )
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run a mock DashScope server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+    uvicorn.run(
+        create_mock_app(config_from_args(args)), host=args.host, port=args.port, log_level="warning"
+    )
+
+
+if __name__ == "__main__":
+    main()
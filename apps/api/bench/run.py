@@ -0,0 +1,249 @@
+"""Benchmark the AI chat/image path against the mock DashScope server.
+
+Starts the mock on a local port, drives the real FastAPI app in-process at a fixed
+concurrency and reports latency percentiles, throughput and DB query counts:
+
+    python -m bench.run --scenario chat --requests 500 --concurrency 32 --latency-ms 300
+
+The API uses a throwaway SQLite database unless ``--database-url`` is given.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+
+from bench.mock_dashscope import add_mock_arguments, config_from_args, create_mock_app
+
+SCENARIOS = {
+    "chat": "/api/v1/spaces/ai/chat",
+    "chat-stream": "/api/v1/spaces/ai/chat/stream",
+    "image": "/api/v1/spaces/ai/image",
+}
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench-password"
+
+
+@dataclass
+class Result:
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    elapsed: float = 0.0
+    queries: int = 0
+
+
+class QueryCounter:
+    """Count statements executed by the app's sync and async engines."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs) -> None:
+        with self._lock:
+            self.count += 1
+
+    def install(self) -> None:
+        from sqlalchemy import event
+
+        from app.db.session import async_engine, engine
+
+        for target in (engine, async_engine.sync_engine):
+            event.listen(target, "before_cursor_execute", self)
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock_server(args: argparse.Namespace, port: int):
+    import uvicorn
+
+    config = uvicorn.Config(
+        create_mock_app(config_from_args(args)), host="127.0.0.1", port=port, log_level="warning"
+    )
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("mock DashScope server did not start")
+        time.sleep(0.05)
+    return server, thread
+
+
+def configure_environment(args: argparse.Namespace, mock_port: int) -> None:
+    """Point the API settings at the mock; must run before ``app`` is imported."""
+    os.environ["QWEN_API_KEY"] = "bench"
+    os.environ["QWEN_BASE_URL"] = f"http://127.0.0.1:{mock_port}/api/v1"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ["LOG_LEVEL"] = args.log_level
+    # 默认关闭图片缓存与镜像，测的是上游路径本身
+    os.environ.setdefault("IMAGE_CACHE_BACKEND", "memory" if args.image_cache else "none")
+    os.environ.setdefault("IMAGE_MIRROR_ENABLED", "false")
+
+
+async def _login(client) -> dict:
+    await client.post(
+        "/api/v1/auth/register",
+        json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD, "invite_code": ""},
+    )
+    resp = await client.post(
+        "/api/v1/auth/login", data={"username": BENCH_EMAIL, "password": BENCH_PASSWORD}
+    )
+    resp.raise_for_status()
+    return {"Authorization": f"Bearer {resp.json()['token']['access_token']}"}
+
+
+async def _one_request(client, scenario: str, headers: dict, body: dict) -> tuple[int, dict]:
+    url = SCENARIOS[scenario]
+    if scenario == "chat-stream":
+        session_id = body.get("session_id")
+        async with client.stream("POST", url, headers=headers, json=body) as resp:
+            async for line in resp.aiter_lines():
+                if line.startswith("data:") and session_id is None:
+                    session_id = json.loads(line[5:]).get("session_id", session_id)
+            return resp.status_code, {"session_id": session_id}
+    resp = await client.post(url, headers=headers, json=body)
+    data = (
+        resp.json() if resp.headers.get("content-type", "").startswith("application/json") else {}
+    )
+    return resp.status_code, data
+
+
+async def run_load(args: argparse.Namespace, counter: QueryCounter) -> Result:
+    import httpx
+
+    from app.main import app
+
+    result = Result()
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench", timeout=None
+        ) as client:
+            headers = await _login(client)
+            remaining = iter(range(args.requests))
+
+            async def worker(worker_id: int) -> None:
+                # 每个 worker 复用一个会话，覆盖历史拼装与消息写入路径
+                session_id = None
+                for index in remaining:
+                    body = {"prompt": f"bench prompt {worker_id}-{index}", "session_id": session_id}
+                    if args.scenario == "image":
+                        body["prompt"] = f"bench image {index}"
+                    started = time.perf_counter()
+                    try:
+                        status_code, data = await _one_request(client, args.scenario, headers, body)
+                    except Exception as exc:  # noqa: BLE001 - 统计为传输错误
+                        result.statuses[type(exc).__name__] += 1
+                        continue
+                    result.latencies.append(time.perf_counter() - started)
+                    result.statuses[status_code] += 1
+                    if args.reuse_sessions and data.get("session_id"):
+                        session_id = data["session_id"]
+
+            for _ in range(args.warmup):
+                await _one_request(client, args.scenario, headers, {"prompt": "warmup"})
+
+            queries_before = counter.count
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+            result.elapsed = time.perf_counter() - started
+            result.queries = counter.count - queries_before
+    return result
+
+
+def report(args: argparse.Namespace, result: Result) -> dict:
+    latencies = sorted(result.latencies)
+    completed = len(latencies)
+    summary = {
+        "scenario": args.scenario,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "statuses": {str(key): value for key, value in sorted(result.statuses.items(), key=str)},
+        "elapsed_s": round(result.elapsed, 3),
+        "throughput_rps": round(completed / result.elapsed, 2) if result.elapsed else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, pct) * 1000, 1)
+            for name, pct in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "db_queries": result.queries,
+        "db_queries_per_request": round(result.queries / completed, 2) if completed else 0.0,
+    }
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        lat = summary["latency_ms"]
+        print(
+            f"scenario     {args.scenario}  "
+            f"({args.requests} requests, concurrency {args.concurrency})"
+        )
+        print(f"statuses     {summary['statuses']}")
+        print(f"throughput   {summary['throughput_rps']} req/s over {summary['elapsed_s']} s")
+        print(f"latency ms   p50={lat['p50']} p95={lat['p95']} p99={lat['p99']} max={lat['max']}")
+        print(
+            f"db queries   {summary['db_queries']} total, "
+            f"{summary['db_queries_per_request']} per request"
+        )
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the AI path against a mock DashScope")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="chat")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--reuse-sessions", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--image-cache", action="store_true", help="keep the image cache enabled")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--json", action="store_true", help="print the summary as JSON")
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    tmpdir = None
+    if args.database_url is None:
+        tmpdir = tempfile.TemporaryDirectory(prefix="bench-")
+        args.database_url = f"sqlite:///{tmpdir.name}/bench.db"
+
+    port = _free_port()
+    server, thread = start_mock_server(args, port)
+    configure_environment(args, port)
+    try:
+        from app.db.base import Base, import_models
+        from app.db.session import engine
+
+        import_models()
+        Base.metadata.create_all(bind=engine)
+        counter = QueryCounter()
+        counter.install()
+        result = asyncio.run(run_load(args, counter))
+        report(args, result)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+        if tmpdir is not None:
+            tmpdir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -56,8 +56,21 @@ export interface ChatMessage {
   created_at?: string | null;
 }
 
-export async function listSessions(): Promise<ChatSession[]> {
-  const { data } = await http.get<ChatSession[]>("/api/v1/spaces/sessions");
+export interface CursorPage<T> {
+  items: T[];
+  next_cursor: string | null;
+  prev_cursor: string | null;
+}
+
+export interface CursorParams {
+  limit?: number;
+  before?: string;
+  after?: string;
+}
+
+// 会话按置顶/时间倒序；下一页用 after=next_cursor
+export async function listSessionsPage(params: CursorParams = {}): Promise<CursorPage<ChatSession>> {
+  const { data } = await http.get<CursorPage<ChatSession>>("/api/v1/spaces/sessions", { params });
   return data;
 }
 
@@ -66,8 +79,9 @@ export async function createSession(payload: ChatSessionCreate): Promise<ChatSes
   return data;
 }
 
-export async function listMessages(sessionId: number): Promise<ChatMessage[]> {
-  const { data } = await http.get<ChatMessage[]>(`/api/v1/spaces/sessions/${sessionId}/messages`);
+// 不带游标时返回最近的消息（按时间正序）；更早的消息用 before=prev_cursor 加载
+export async function listMessagesPage(sessionId: number, params: CursorParams = {}): Promise<CursorPage<ChatMessage>> {
+  const { data } = await http.get<CursorPage<ChatMessage>>(`/api/v1/spaces/sessions/${sessionId}/messages`, { params });
   return data;
 }
 
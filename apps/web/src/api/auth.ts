@@ -16,6 +16,8 @@ export interface RegisterPayload {
 export interface Token {
   access_token: string;
   token_type: string;
+  refresh_token?: string | null;
+  expires_in?: number | null;
 }
 
 export interface LoginResponse {
@@ -48,6 +50,15 @@ export async function register(payload: RegisterPayload): Promise<User> {
   return data;
 }
 
+export async function refreshToken(refresh_token: string): Promise<Token> {
+  const { data } = await http.post<Token>("/api/v1/auth/refresh", { refresh_token });
+  return data;
+}
+
+export async function logout(refresh_token?: string): Promise<void> {
+  await http.post("/api/v1/auth/logout", { refresh_token: refresh_token || null });
+}
+
 export async function fetchMe(): Promise<User> {
   const { data } = await http.get<User>("/api/v1/auth/me");
   return data;
@@ -1,4 +1,6 @@
 import http from "./http";
+import { useAuthStore } from "@/stores/auth";
+import type { Photo } from "./media";
 
 // ========== Couple ==========
 export interface Couple {
@@ -180,3 +182,112 @@ export async function updateWish(coupleId: number, wishId: number, payload: Wish
 export async function deleteWish(coupleId: number, wishId: number): Promise<void> {
   await http.delete(`/api/v1/couples/${coupleId}/wishes/${wishId}`);
 }
+
+// ========== Overview (首页聚合) ==========
+export interface CoupleOverview {
+  couple: Couple;
+  limit: number;
+  notes: Note[];
+  messages: Message[];
+  countdowns: Countdown[];
+  wishes: Wish[];
+  photos: Photo[];
+}
+
+export async function fetchCoupleOverview(coupleId: number, limit = 20): Promise<CoupleOverview> {
+  const { data } = await http.get<CoupleOverview>(`/api/v1/couples/${coupleId}/overview`, {
+    params: { limit },
+  });
+  return data;
+}
+
+// ========== Feed (动态时间线) ==========
+export interface FeedItem {
+  kind: "note" | "message" | "wish" | "countdown" | "photo";
+  id: number;
+  created_at: string;
+  data: Record<string, unknown>;
+}
+
+export interface FeedPage {
+  items: FeedItem[];
+  next_cursor: string | null;
+}
+
+export async function fetchCoupleFeed(coupleId: number, cursor?: string | null, limit = 20): Promise<FeedPage> {
+  const { data } = await http.get<FeedPage>(`/api/v1/couples/${coupleId}/feed`, {
+    params: { limit, cursor: cursor || undefined },
+  });
+  return data;
+}
+
+// ========== Events (实时推送) ==========
+export interface CoupleChangeEvent {
+  collection: "notes" | "messages" | "countdowns" | "wishes";
+  action: "created" | "updated" | "deleted";
+  id: number;
+  item?: Record<string, unknown>;
+}
+
+type ResyncHandler = () => void;
+
+// SSE 需要携带 Authorization 头，EventSource 不支持，因此用 fetch 读取流；断线后自动重连
+export function subscribeCoupleEvents(
+  coupleId: number,
+  onChange: (event: CoupleChangeEvent) => void,
+  onResync?: ResyncHandler,
+): () => void {
+  const controller = new AbortController();
+  let retryMs = 3000;
+
+  const connect = async () => {
+    const auth = useAuthStore();
+    const response = await fetch(`${http.defaults.baseURL}/api/v1/couples/${coupleId}/events`, {
+      headers: { Authorization: `Bearer ${auth.token}`, Accept: "text/event-stream" },
+      signal: controller.signal,
+    });
+    if (!response.ok || !response.body) throw new Error(`events ${response.status}`);
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buffer += value;
+      let boundary = buffer.indexOf("\n\n");
+      while (boundary >= 0) {
+        const frame = buffer.slice(0, boundary);
+        buffer = buffer.slice(boundary + 2);
+        boundary = buffer.indexOf("\n\n");
+        let event = "message";
+        let data = "";
+        for (const line of frame.split("\n")) {
+          if (line.startsWith("event: ")) event = line.slice(7);
+          else if (line.startsWith("data: ")) data += line.slice(6);
+          else if (line.startsWith("retry: ")) retryMs = Number(line.slice(7)) || retryMs;
+        }
+        if (event === "revoked") {
+          // 已被移出情侣空间，不再重连
+          controller.abort();
+          return;
+        }
+        if (event === "change") onChange(JSON.parse(data) as CoupleChangeEvent);
+        // 重连后可能错过了事件，同样需要重新拉取
+        else if (event === "resync" || event === "ready") onResync?.();
+      }
+    }
+  };
+
+  const loop = async () => {
+    while (!controller.signal.aborted) {
+      try {
+        await connect();
+      } catch {
+        // 网络错误或 token 过期：交给调用方用普通请求补齐（顺带触发 token 刷新），稍后重连
+        if (!controller.signal.aborted) onResync?.();
+      }
+      if (!controller.signal.aborted) await new Promise((resolve) => setTimeout(resolve, retryMs));
+    }
+  };
+  loop();
+  return () => controller.abort();
+}
@@ -12,9 +12,53 @@ const http = axios.create({
   },
 });
 
+// 并发的 401 共用同一次刷新，避免 refresh token 被重复轮换
+let refreshing: Promise<string> | null = null;
+
+function refreshAccessToken(): Promise<string> {
+  if (!refreshing) {
+    const auth = useAuthStore();
+    refreshing = axios
+      .post(`${baseURL}/api/v1/auth/refresh`, { refresh_token: auth.refreshToken })
+      .then(({ data }) => {
+        auth.setTokens(data);
+        return data.access_token as string;
+      })
+      .catch((err) => {
+        auth.clear();
+        throw err;
+      })
+      .finally(() => {
+        refreshing = null;
+      });
+  }
+  return refreshing;
+}
+
 http.interceptors.response.use(
   (response) => response,
-  (error) => {
+  async (error) => {
+    const original = error.config;
+    const url: string = original?.url || "";
+    if (
+      error.response?.status === 401 &&
+      original &&
+      !original._retried &&
+      !url.includes("/auth/login") &&
+      !url.includes("/auth/refresh")
+    ) {
+      try {
+        const auth = useAuthStore();
+        if (auth.refreshToken) {
+          original._retried = true;
+          const token = await refreshAccessToken();
+          original.headers = { ...original.headers, Authorization: `Bearer ${token}` };
+          return http(original);
+        }
+      } catch {
+        // 刷新失败，按原错误返回
+      }
+    }
     const message = error.response?.data?.detail || error.message || "Request failed";
     return Promise.reject(new Error(message));
   },
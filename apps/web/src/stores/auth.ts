@@ -13,6 +13,7 @@ export interface User {
 interface Token {
   access_token: string;
   token_type: string;
+  refresh_token?: string | null;
 }
 
 interface LoginResponse {
@@ -25,19 +26,31 @@ const STORAGE_KEY = "app_auth";
 export const useAuthStore = defineStore("auth", {
   state: () => ({
     token: (JSON.parse(localStorage.getItem(STORAGE_KEY) || "null") as { token?: string })?.token || "",
+    refreshToken:
+      (JSON.parse(localStorage.getItem(STORAGE_KEY) || "null") as { refreshToken?: string })?.refreshToken || "",
     user: (JSON.parse(localStorage.getItem(STORAGE_KEY) || "null") as { user?: User })?.user || null,
   }),
   actions: {
-    setSession(payload: LoginResponse) {
-      this.token = payload.token.access_token;
-      this.user = payload.user;
+    persist() {
       localStorage.setItem(
         STORAGE_KEY,
-        JSON.stringify({ token: this.token, user: this.user }),
+        JSON.stringify({ token: this.token, refreshToken: this.refreshToken, user: this.user }),
       );
     },
+    setSession(payload: LoginResponse) {
+      this.token = payload.token.access_token;
+      this.refreshToken = payload.token.refresh_token || "";
+      this.user = payload.user;
+      this.persist();
+    },
+    setTokens(token: Token) {
+      this.token = token.access_token;
+      this.refreshToken = token.refresh_token || this.refreshToken;
+      this.persist();
+    },
     clear() {
       this.token = "";
+      this.refreshToken = "";
       this.user = null;
       localStorage.removeItem(STORAGE_KEY);
     },
@@ -46,7 +59,7 @@ export const useAuthStore = defineStore("auth", {
       if (this.user) return;
       try {
         this.user = await fetchMe();
-        localStorage.setItem(STORAGE_KEY, JSON.stringify({ token: this.token, user: this.user }));
+        this.persist();
       } catch {
         this.clear();
       }